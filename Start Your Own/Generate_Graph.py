@@ -7,8 +7,14 @@ is simply reorganised and commented for clarity.
 
 import matplotlib.pyplot as plt
 import pandas as pd
-import yfinance as yf
 from pathlib import Path
+import sys
+
+# Allow importing the shared modules from the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from marketdata.benchmarks import BENCHMARK_START, SP500, default_benchmarks
+from observability.tracing import span
 
 DATA_DIR = Path(__file__).resolve().parent
 PORTFOLIO_CSV = str(DATA_DIR / "chatgpt_portfolio_update.csv")
@@ -16,25 +22,22 @@ PORTFOLIO_CSV = str(DATA_DIR / "chatgpt_portfolio_update.csv")
 
 def load_portfolio_totals() -> pd.DataFrame:
     """Load portfolio equity history including a baseline row."""
-    chatgpt_df = pd.read_csv(PORTFOLIO_CSV)
+    with span("csv.portfolio.read", path=PORTFOLIO_CSV):
+        chatgpt_df = pd.read_csv(PORTFOLIO_CSV)
     chatgpt_totals = chatgpt_df[chatgpt_df["Ticker"] == "TOTAL"].copy()
     chatgpt_totals["Date"] = pd.to_datetime(chatgpt_totals["Date"])
 
-    baseline_date = pd.Timestamp("2025-06-27")
+    baseline_date = pd.Timestamp(BENCHMARK_START)
     baseline_equity = 100
     baseline_row = pd.DataFrame({"Date": [baseline_date], "Total Equity": [baseline_equity]})
     return pd.concat([baseline_row, chatgpt_totals], ignore_index=True).sort_values("Date")
 
 
 def download_sp500(start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
-    """Download S&P 500 prices and normalise to a $100 baseline."""
-    sp500 = yf.download("^SPX", start=start_date, end=end_date + pd.Timedelta(days=1), progress=False)
-    sp500 = sp500.reset_index()
-    if isinstance(sp500.columns, pd.MultiIndex):
-        sp500.columns = sp500.columns.get_level_values(0)
-    spx_27_price = 6173.07
-    scaling_factor = 100 / spx_27_price
-    sp500["SPX Value ($100 Invested)"] = sp500["Close"] * scaling_factor
+    """Load S&P 500 prices normalised to $100 at the stored baseline close."""
+    sp500 = default_benchmarks().series(SP500, end=end_date)
+    sp500 = sp500[sp500.index >= start_date].reset_index()
+    sp500["SPX Value ($100 Invested)"] = sp500["Value"]
     return sp500
 
 
@@ -42,7 +45,7 @@ def main() -> None:
     """Generate and display the comparison graph."""
     chatgpt_totals = load_portfolio_totals()
 
-    start_date = pd.Timestamp("2025-06-27")
+    start_date = pd.Timestamp(BENCHMARK_START)
     end_date = chatgpt_totals["Date"].max()
     sp500 = download_sp500(start_date, end_date)
 
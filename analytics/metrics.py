@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+import pandas as pd
+
+
+METRICS_STATE_FILE = "performance_state.json"
+TRADING_DAYS = 252
+
+
+@dataclass
+class PerformanceState:
+    """Running moments of the daily equity series, enough to update in O(1)."""
+
+    first_date: Optional[str] = None
+    first_equity: float = 0.0
+    last_date: Optional[str] = None
+    last_equity: float = 0.0
+    last_benchmark: Optional[float] = None
+    n_obs: int = 0
+    # Welford mean / sum of squared deviations of daily returns
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    # Same, over negative returns only (downside deviation)
+    down_n: int = 0
+    down_mean: float = 0.0
+    down_m2: float = 0.0
+    peak: float = 0.0
+    max_drawdown: float = 0.0
+    # Paired returns against the benchmark (co-moment for beta)
+    pair_n: int = 0
+    pair_mean: float = 0.0
+    bench_mean: float = 0.0
+    co_m2: float = 0.0
+    bench_m2: float = 0.0
+
+
+@dataclass(frozen=True)
+class PerformanceMetrics:
+    as_of: Optional[str]
+    n_days: int
+    final_equity: float
+    total_return: float
+    std_daily: float
+    downside_std: float
+    sharpe: float
+    sortino: float
+    peak_equity: float
+    max_drawdown: float
+    cagr: float
+    beta: Optional[float]
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _sample_std(n: int, m2: float) -> float:
+    return math.sqrt(m2 / (n - 1)) if n > 1 else float("nan")
+
+
+def _ratio(num: float, den: float) -> float:
+    return num / den if den and den == den else float("nan")
+
+
+def _date_key(value: Any) -> str:
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class MetricsEngine:
+    """Incrementally maintained performance metrics for the TOTAL equity series.
+
+    Each new day's equity updates the running state in O(1): Welford
+    mean/variance of daily returns (all and negative-only), peak equity and
+    max drawdown, and the co-moments needed for beta against a benchmark.
+    The state is persisted as JSON at ``path`` so a run only has to feed the
+    days recorded since the last one. Re-feeding the latest day (a rerun on
+    the same date) replaces it using a one-step undo snapshot.
+
+    Sharpe and Sortino follow the daily report's definitions: total return
+    over the period less the compounded risk-free rate, divided by the daily
+    (downside) standard deviation scaled by ``sqrt(n_days)``.
+    """
+
+    def __init__(self, path: Optional[Path] = None, rf_annual: float = 0.045) -> None:
+        self.path = None if path is None else Path(path)
+        self.rf_annual = rf_annual
+        self.state = PerformanceState()
+        self._previous: Optional[PerformanceState] = None
+        if self.path is not None and self.path.exists():
+            try:
+                raw = json.loads(self.path.read_text())
+                self.state = PerformanceState(**raw["state"])
+                self._previous = PerformanceState(**raw["previous"]) if raw.get("previous") else None
+            except (OSError, ValueError, KeyError, TypeError):
+                self.reset()
+
+    def reset(self) -> None:
+        self.state = PerformanceState()
+        self._previous = None
+
+    def update(self, date: Any, equity: float, benchmark: Optional[float] = None) -> bool:
+        """Fold one day into the state; returns ``False`` for days already behind it."""
+        day = _date_key(date)
+        equity = float(equity)
+        s = self.state
+        if s.last_date is not None and day < s.last_date:
+            return False
+        if s.last_date == day:
+            if equity == s.last_equity and benchmark == s.last_benchmark:
+                return False
+            if self._previous is None:
+                self.reset()
+            else:
+                self.state = self._previous
+            s = self.state
+        self._previous = PerformanceState(**asdict(s))
+
+        if s.n_obs == 0:
+            s.first_date, s.first_equity, s.peak = day, equity, equity
+        elif s.last_equity:
+            r = equity / s.last_equity - 1.0
+            s.n += 1
+            delta = r - s.mean
+            s.mean += delta / s.n
+            s.m2 += delta * (r - s.mean)
+            if r < 0:
+                s.down_n += 1
+                d = r - s.down_mean
+                s.down_mean += d / s.down_n
+                s.down_m2 += d * (r - s.down_mean)
+            if benchmark is not None and s.last_benchmark:
+                b = float(benchmark) / s.last_benchmark - 1.0
+                s.pair_n += 1
+                dr = r - s.pair_mean
+                s.pair_mean += dr / s.pair_n
+                db = b - s.bench_mean
+                s.bench_mean += db / s.pair_n
+                s.co_m2 += dr * (b - s.bench_mean)
+                s.bench_m2 += db * (b - s.bench_mean)
+        s.peak = max(s.peak, equity)
+        if s.peak > 0:
+            s.max_drawdown = max(s.max_drawdown, 1.0 - equity / s.peak)
+        s.n_obs += 1
+        s.last_date, s.last_equity = day, equity
+        s.last_benchmark = None if benchmark is None else float(benchmark)
+        return True
+
+    def pending_totals(self, storage: Any) -> pd.DataFrame:
+        """TOTAL rows the state has not absorbed yet (plus the last one, to detect reruns).
+
+        Falls back to the full series, starting over, if the stored history
+        no longer contains the day the state last saw.
+        """
+        since = self.state.last_date
+        if since is not None:
+            totals = storage.total_equity_series(since=since)
+            if not totals.empty and _date_key(totals["Date"].iloc[0]) == since:
+                return totals
+            self.reset()
+        return storage.total_equity_series()
+
+    def sync(self, totals: pd.DataFrame, benchmark: Optional[Mapping[Any, float] | pd.Series] = None) -> PerformanceMetrics:
+        """Feed ``Date``/``Total Equity`` rows (oldest first) and return the metrics."""
+        closes: dict[str, float] = {}
+        if benchmark is not None:
+            items = benchmark.items() if hasattr(benchmark, "items") else benchmark
+            closes = {_date_key(k): float(v) for k, v in items if v == v}
+        for date, equity in zip(totals["Date"], totals["Total Equity"]):
+            self.update(date, equity, closes.get(_date_key(date)))
+        self.save()
+        return self.metrics()
+
+    def metrics(self) -> PerformanceMetrics:
+        s = self.state
+        total_return = (s.last_equity - s.first_equity) / s.first_equity if s.first_equity else float("nan")
+        rf_period = (1 + self.rf_annual) ** (s.n_obs / TRADING_DAYS) - 1
+        std_daily = _sample_std(s.n, s.m2)
+        downside_std = _sample_std(s.down_n, s.down_m2)
+        scale = math.sqrt(s.n_obs) if s.n_obs else float("nan")
+        cagr = float("nan")
+        if s.first_equity > 0 and s.last_equity > 0 and s.n > 0:
+            cagr = (s.last_equity / s.first_equity) ** (TRADING_DAYS / s.n) - 1
+        beta = s.co_m2 / s.bench_m2 if s.pair_n > 1 and s.bench_m2 > 0 else None
+        return PerformanceMetrics(
+            as_of=s.last_date,
+            n_days=s.n_obs,
+            final_equity=s.last_equity,
+            total_return=total_return,
+            std_daily=std_daily,
+            downside_std=downside_std,
+            sharpe=_ratio(total_return - rf_period, std_daily * scale),
+            sortino=_ratio(total_return - rf_period, downside_std * scale),
+            peak_equity=s.peak,
+            max_drawdown=s.max_drawdown,
+            cagr=cagr,
+            beta=beta,
+        )
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "state": asdict(self.state),
+            "previous": None if self._previous is None else asdict(self._previous),
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=2))
+        os.replace(tmp, self.path)
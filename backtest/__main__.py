@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from config import load_config
+from risk.manager import RiskManager
+
+from .engine import Backtester, load_bars_dir, load_plan_stream
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded plan stream over local bars.")
+    parser.add_argument("--bars-dir", required=True, help="Directory of <SYMBOL>.csv or .parquet OHLCV files")
+    parser.add_argument("--plans", required=True, help="JSONL plan/idea stream (e.g. llm_research_log.jsonl)")
+    parser.add_argument("--cash", type=float, default=100.0, help="Starting cash")
+    parser.add_argument("--spread-pct", type=float, default=0.0, help="Synthetic bid/ask spread around the open")
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--out", default="backtest_results", help="Directory for the portfolio CSV and trade log")
+    args = parser.parse_args()
+
+    from start_trading import build_risk_config
+
+    started = time.perf_counter()
+    plans = load_plan_stream(Path(args.plans))
+    bars = load_bars_dir(Path(args.bars_dir))
+    bt = Backtester(RiskManager(build_risk_config(load_config())), starting_cash=args.cash, spread_pct=args.spread_pct, slippage_bps=args.slippage_bps)
+    result = bt.run(bars, plans)
+    result.save(Path(args.out))
+    result.equity_curve.to_csv(Path(args.out) / "equity_curve.csv")
+
+    final = float(result.equity_curve["Total Equity"].iloc[-1])
+    print(f"Replayed {len(result.equity_curve)} bars x {len(bars)} symbols in {time.perf_counter() - started:.2f}s")
+    print(f"Trades: {len(result.trades)}  Rejected: {len(result.rejected)}  Final equity: {final:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from exchange.base import Quote
+from execution.executor import Executor, TradePlanItem
+from observability.tracing import span
+from risk.manager import EquityContext, RiskManager
+from storage.backend import PORTFOLIO_COLUMNS, PORTFOLIO_FILE, TRADE_LOG_FILE
+from storage.trade_log import TRADE_LOG_COLUMNS
+
+
+MARKET_TZ = "America/New_York"
+STOP_REASON = "AUTOMATED SELL - STOPLOSS TRIGGERED"
+STOP_ACTION = "SELL - Stop Loss Triggered"
+
+
+@dataclass
+class PlanEvent:
+    ts: pd.Timestamp
+    items: list[TradePlanItem]
+
+
+@dataclass
+class BacktestResult:
+    equity_curve: pd.DataFrame
+    portfolio: pd.DataFrame
+    trades: pd.DataFrame
+    rejected: list[dict[str, Any]] = field(default_factory=list)
+
+    def save(self, out_dir: Path) -> None:
+        """Write the portfolio history and trade log in the live CSV layout."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with span("csv.portfolio.write", path=str(out_dir / PORTFOLIO_FILE), rows=len(self.portfolio)):
+            self.portfolio.to_csv(out_dir / PORTFOLIO_FILE, index=False)
+        with span("csv.trade_log.write", path=str(out_dir / TRADE_LOG_FILE), rows=len(self.trades)):
+            self.trades.to_csv(out_dir / TRADE_LOG_FILE, index=False)
+
+
+def _plan_item(leg: Mapping[str, Any]) -> TradePlanItem:
+    return TradePlanItem(
+        symbol=str(leg["symbol"]).upper(),
+        side=str(leg["side"]).lower(),
+        qty=float(leg.get("qty", 1.0)),
+        type=leg.get("type", "market"),
+        limit_price=leg.get("limit_price"),
+        stop_price=leg.get("stop_price"),
+        client_order_id=leg.get("client_order_id"),
+    )
+
+
+def _idea_item(idea: Mapping[str, Any]) -> TradePlanItem:
+    # Mirrors LLMResearch.ideas_to_trade_plans for logged ideas.
+    typ = "limit" if idea.get("entry_type") == "limit" else "market"
+    return TradePlanItem(
+        symbol=str(idea["symbol"]).upper(),
+        side=str(idea["side"]).lower(),
+        qty=1.0,
+        type=typ,
+        limit_price=idea.get("entry") if typ == "limit" else None,
+        stop_price=idea.get("stop"),
+    )
+
+
+def _parse_ts(value: Any) -> pd.Timestamp:
+    if isinstance(value, (int, float)):
+        return pd.Timestamp(value, unit="s", tz="UTC")
+    return pd.Timestamp(value)
+
+
+def load_plan_stream(path: Path) -> list[PlanEvent]:
+    """Read a recorded plan/idea stream (JSONL), oldest first.
+
+    Each record needs a ``ts`` (epoch seconds or ISO string) or ``date`` and
+    either ``orders`` (legs in the ``--plan-file`` format) or ``ideas`` (as
+    written to ``llm_research_log.jsonl``). Records without either, such as
+    logged LLM errors, are skipped.
+    """
+    events: list[PlanEvent] = []
+    with Path(path).open() as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if "orders" in rec:
+                items = [_plan_item(leg) for leg in rec["orders"]]
+            elif "ideas" in rec:
+                items = [_idea_item(idea) for idea in rec["ideas"]]
+            else:
+                continue
+            ts = rec.get("ts", rec.get("date"))
+            if ts is None or not items:
+                continue
+            events.append(PlanEvent(_parse_ts(ts), items))
+    events.sort(key=lambda e: e.ts.value if e.ts.tzinfo is not None else e.ts.tz_localize("UTC").value)
+    return events
+
+
+def load_bars_dir(path: Path, symbols: Optional[Iterable[str]] = None) -> dict[str, pd.DataFrame]:
+    """Load ``<SYMBOL>.csv`` / ``<SYMBOL>.parquet`` OHLCV files from ``path``."""
+    wanted = None if symbols is None else {s.upper() for s in symbols}
+    out: dict[str, pd.DataFrame] = {}
+    for p in sorted(Path(path).iterdir()):
+        sym = p.stem.upper()
+        if wanted is not None and sym not in wanted:
+            continue
+        if p.suffix == ".csv":
+            with span("csv.bars.read", path=str(p)):
+                df = pd.read_csv(p, index_col=0, parse_dates=True)
+        elif p.suffix == ".parquet":
+            df = pd.read_parquet(p)
+        else:
+            continue
+        out[sym] = df.sort_index()
+    return out
+
+
+class Backtester:
+    """Replay bars through the live risk, sizing and stop-loss rules.
+
+    Each plan event executes at the open of the first bar at or after its
+    timestamp: the executor's :meth:`~execution.executor.Executor.prepare_order`
+    sizes the leg and runs ``RiskManager.evaluate`` against an
+    ``EquityContext`` built from the simulated book. Market legs fill at the
+    open, limit legs at the better of open and limit if the bar trades
+    through it (otherwise they expire). Positions are then checked for stop
+    hits the way ``process_portfolio`` does it: a bar whose low, rounded to
+    cents, is at or below the stop sells the whole position at the stop.
+    Stop scans between plan events are vectorised over bars and symbols.
+    """
+
+    def __init__(
+        self,
+        risk: RiskManager,
+        starting_cash: float = 100.0,
+        spread_pct: float = 0.0,
+        slippage_bps: float = 0.0,
+        whole_shares: bool = True,
+    ) -> None:
+        self.risk = risk
+        self.starting_cash = float(starting_cash)
+        self.spread_pct = spread_pct
+        self.slippage_bps = slippage_bps
+        self.whole_shares = whole_shares
+        self._sizer = Executor(client=None, risk=risk, logger=logging.getLogger(__name__))  # type: ignore[arg-type]
+
+    def run(self, bars: Mapping[str, pd.DataFrame], plans: Iterable[PlanEvent]) -> BacktestResult:
+        frames = {s.upper(): df for s, df in bars.items() if not df.empty}
+        if not frames:
+            raise ValueError("No bars to replay")
+        self._load(frames)
+        self._reset()
+        events = self._align(plans)
+
+        cursor = 0
+        for bar, items in events:
+            self._scan_stops(cursor, bar)
+            for item in items:
+                self._execute(bar, item)
+            cursor = bar
+        self._scan_stops(cursor, len(self.index))
+        return self._result()
+
+    # -- setup ----------------------------------------------------------
+
+    def _load(self, frames: dict[str, pd.DataFrame]) -> None:
+        panel = pd.concat({s: df[["Open", "High", "Low", "Close"]] for s, df in frames.items()}, axis=1).sort_index()
+        self.symbols = list(frames)
+        self.col = {s: i for i, s in enumerate(self.symbols)}
+        self.index = pd.DatetimeIndex(panel.index)
+        field_of = lambda name: panel.xs(name, axis=1, level=1)[self.symbols].to_numpy(dtype=float)
+        self.open, self.high, self.low, self.close = (field_of(n) for n in ("Open", "High", "Low", "Close"))
+        self.mark = pd.DataFrame(self.close).ffill().to_numpy()
+        self.low_cents = np.round(self.low, 2)
+        local = self.index.tz_convert(MARKET_TZ) if self.index.tz is not None else self.index
+        self.day = local.normalize()
+        self.day_labels = np.asarray(local.strftime("%Y-%m-%d"))
+        new_day = np.r_[True, self.day[1:] != self.day[:-1]]
+        self.day_first = np.maximum.accumulate(np.where(new_day, np.arange(len(self.index)), 0))
+        self.session_ends = np.flatnonzero(np.r_[self.day[1:] != self.day[:-1], True])
+
+    def _reset(self) -> None:
+        n = len(self.symbols)
+        self.cash = self.starting_cash
+        self.shares = np.zeros(n)
+        self.avg = np.zeros(n)
+        self.cost = np.zeros(n)
+        self.stop = np.full(n, np.nan)
+        self.trades: list[dict[str, Any]] = []
+        self.stop_sells: list[tuple[int, int, float, float, float]] = []
+        self.rejected: list[dict[str, Any]] = []
+        self.realized: dict[str, float] = {}
+        self.day_start_equity: dict[str, float] = {}
+        self.states: list[tuple[int, float, np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._record(0)
+
+    def _align(self, plans: Iterable[PlanEvent]) -> list[tuple[int, list[TradePlanItem]]]:
+        out: dict[int, list[TradePlanItem]] = {}
+        for ev in plans:
+            ts = ev.ts
+            if self.index.tz is not None:
+                ts = ts.tz_localize(self.index.tz) if ts.tzinfo is None else ts.tz_convert(self.index.tz)
+            elif ts.tzinfo is not None:
+                ts = ts.tz_convert(MARKET_TZ).tz_localize(None)
+            bar = int(self.index.searchsorted(ts, side="left"))
+            if bar < len(self.index):
+                out.setdefault(bar, []).extend(ev.items)
+        return sorted(out.items())
+
+    # -- book keeping ---------------------------------------------------
+
+    def _record(self, bar: int) -> None:
+        self.states.append((bar, self.cash, self.shares.copy(), self.avg.copy(), self.cost.copy(), self.stop.copy()))
+
+    def _equity_at(self, bar: int, prices: np.ndarray) -> float:
+        px = np.where(np.isnan(prices), 0.0, prices)
+        return self.cash + float(self.shares @ px)
+
+    def _touch_day(self, bar: int) -> str:
+        label = str(self.day_labels[bar])
+        if label not in self.day_start_equity:
+            first = int(self.day_first[bar])
+            prices = self.mark[first - 1] if first > 0 else self.open[first]
+            self.day_start_equity[label] = self._equity_at(first, prices)
+        return label
+
+    def _context(self, bar: int, col: int) -> EquityContext:
+        label = self._touch_day(bar)
+        prev = self.mark[bar - 1] if bar > 0 else self.open[bar]
+        prices = np.where(np.isnan(self.open[bar]), prev, self.open[bar])
+        equity = max(self._equity_at(bar, prices), 1e-9)
+        held = self.shares > 0
+        px = np.where(np.isnan(prices), 0.0, prices)
+        guarded = held & ~np.isnan(self.stop)
+        heat = float(np.sum(np.maximum(px[guarded] - self.stop[guarded], 0.0) * self.shares[guarded])) / equity
+        return EquityContext(
+            equity=equity,
+            symbol_exposure=float(self.shares[col] * px[col]) / equity,
+            day_realized_pnl_pct=self.realized.get(label, 0.0) / max(self.day_start_equity[label], 1e-9),
+            open_positions=int(held.sum()),
+            portfolio_heat_pct=heat,
+        )
+
+    def _reject(self, bar: int, item: TradePlanItem, reason: str) -> None:
+        self.rejected.append({"Date": str(self.day_labels[bar]), "Ticker": item.symbol, "Side": item.side, "Reason": reason})
+
+    # -- execution ------------------------------------------------------
+
+    def _execute(self, bar: int, item: TradePlanItem) -> None:
+        col = self.col.get(item.symbol.upper())
+        if col is None or np.isnan(self.open[bar, col]):
+            self._reject(bar, item, "No bar data")
+            return
+        if item.type not in ("market", "limit"):
+            self._reject(bar, item, f"Unsupported order type in backtest: {item.type}")
+            return
+        o = float(self.open[bar, col])
+        half = o * self.spread_pct / 2.0
+        quote = Quote(symbol=item.symbol, bid=o - half, ask=o + half, last=o, timestamp=str(self.index[bar]))
+        try:
+            req = self._sizer.prepare_order(item, quote, self._context(bar, col), True)
+        except Exception as e:
+            self._reject(bar, item, str(e))
+            return
+        qty = math.floor(req.qty + 1e-9) if self.whole_shares else req.qty
+        buy = req.side == "buy"
+        if not buy:
+            qty = min(qty, float(self.shares[col]))
+        if qty <= 0:
+            self._reject(bar, item, "No shares to trade after sizing")
+            return
+
+        touch = o + half if buy else o - half
+        if req.type == "limit":
+            assert req.limit_price is not None
+            if buy and self.low[bar, col] > req.limit_price or not buy and self.high[bar, col] < req.limit_price:
+                self._reject(bar, item, "Limit not reached")
+                return
+            price = min(touch, req.limit_price) if buy else max(touch, req.limit_price)
+        else:
+            slip = touch * self.slippage_bps / 10_000.0
+            price = touch + slip if buy else touch - slip
+
+        label = self._touch_day(bar)
+        if buy:
+            if qty * price > self.cash + 1e-9:
+                self._reject(bar, item, f"Cost {qty * price:.2f} exceeds cash {self.cash:.2f}")
+                return
+            held = self.shares[col]
+            self.avg[col] = (self.avg[col] * held + price * qty) / (held + qty)
+            self.shares[col] = held + qty
+            self.cost[col] += price * qty
+            self.cash -= price * qty
+            if req.stop_price is not None:
+                self.stop[col] = req.stop_price
+            self.trades.append(
+                {"Date": label, "Ticker": item.symbol, "Shares Bought": qty, "Buy Price": price, "Cost Basis": price * qty, "PnL": 0.0, "Reason": "PLAN BUY - New position"}
+            )
+        else:
+            self._sell(bar, col, qty, price, "PLAN SELL - Plan exit")
+        self._record(bar)
+
+    def _sell(self, bar: int, col: int, qty: float, price: float, reason: str) -> float:
+        label = self._touch_day(bar)
+        held = self.shares[col]
+        basis = self.cost[col] * qty / held
+        pnl = (price - self.avg[col]) * qty
+        self.cash += price * qty
+        self.shares[col] = held - qty
+        self.cost[col] -= basis
+        if self.shares[col] <= 1e-12:
+            self.shares[col] = 0.0
+            self.avg[col] = 0.0
+            self.cost[col] = 0.0
+            self.stop[col] = np.nan
+        self.realized[label] = self.realized.get(label, 0.0) + pnl
+        self.trades.append(
+            {"Date": label, "Ticker": self.symbols[col], "Shares Sold": qty, "Sell Price": price, "Cost Basis": basis, "PnL": round(pnl, 2), "Reason": reason}
+        )
+        return pnl
+
+    def _scan_stops(self, lo: int, hi: int) -> None:
+        """Sell every position whose stop is crossed in bars ``lo`` to ``hi - 1``."""
+        cols = np.flatnonzero((self.shares > 0) & ~np.isnan(self.stop))
+        if hi <= lo or not len(cols):
+            return
+        crossed = self.low_cents[lo:hi, cols] <= self.stop[cols]
+        hit = crossed.any(axis=0)
+        first = crossed.argmax(axis=0)
+        for k in np.argsort(np.where(hit, first, hi), kind="stable")[: int(hit.sum())]:
+            bar, col = lo + int(first[k]), int(cols[k])
+            stop, qty, buy_price = float(self.stop[col]), float(self.shares[col]), float(self.avg[col])
+            self._sell(bar, col, qty, stop, STOP_REASON)
+            self.stop_sells.append((bar, col, qty, stop, buy_price))
+            self._record(bar)
+
+    # -- output ---------------------------------------------------------
+
+    def _result(self) -> BacktestResult:
+        bars = np.array([s[0] for s in self.states])
+        cash = np.array([s[1] for s in self.states])
+        shares = np.stack([s[2] for s in self.states])
+        state_of = np.searchsorted(bars, np.arange(len(self.index)), side="right") - 1
+        mark = np.where(np.isnan(self.mark), 0.0, self.mark)
+        held_value = np.einsum("ts,ts->t", mark, shares[state_of])
+        equity_curve = pd.DataFrame({"Cash Balance": cash[state_of], "Total Equity": cash[state_of] + held_value}, index=self.index.rename("Date"))
+
+        portfolio = self._portfolio_rows(state_of, mark, held_value, cash)
+        trades = pd.DataFrame(self.trades, columns=TRADE_LOG_COLUMNS)
+        return BacktestResult(equity_curve=equity_curve, portfolio=portfolio, trades=trades, rejected=self.rejected)
+
+    def _portfolio_rows(self, state_of: np.ndarray, mark: np.ndarray, held_value: np.ndarray, cash: np.ndarray) -> pd.DataFrame:
+        ends = self.session_ends
+        st = state_of[ends]
+        shares = np.stack([s[2] for s in self.states])[st]
+        avg = np.stack([s[3] for s in self.states])[st]
+        cost = np.stack([s[4] for s in self.states])[st]
+        stop = np.stack([s[5] for s in self.states])[st]
+        day_idx, col = np.nonzero(shares > 0)
+        price = mark[ends][day_idx, col]
+        n_shares = shares[day_idx, col]
+        holds = pd.DataFrame(
+            {
+                "Date": self.day_labels[ends][day_idx],
+                "Ticker": np.asarray(self.symbols, dtype=object)[col],
+                "Shares": n_shares,
+                "Buy Price": avg[day_idx, col],
+                "Cost Basis": cost[day_idx, col],
+                "Stop Loss": stop[day_idx, col],
+                "Current Price": price,
+                "Total Value": np.round(price * n_shares, 2),
+                "PnL": np.round((price - avg[day_idx, col]) * n_shares, 2),
+                "Action": "HOLD",
+                "_order": day_idx * 2,
+            }
+        )
+
+        sells = pd.DataFrame(self.stop_sells, columns=["bar", "col", "qty", "stop", "buy_price"])
+        day_pos = np.searchsorted(ends, sells["bar"].to_numpy(), side="left")
+        stopped = pd.DataFrame(
+            {
+                "Date": self.day_labels[sells["bar"].to_numpy(dtype=int)],
+                "Ticker": np.asarray(self.symbols, dtype=object)[sells["col"].to_numpy(dtype=int)],
+                "Shares": sells["qty"].to_numpy(),
+                "Buy Price": sells["buy_price"].to_numpy(),
+                "Cost Basis": np.round(sells["buy_price"].to_numpy() * sells["qty"].to_numpy(), 2),
+                "Stop Loss": sells["stop"].to_numpy(),
+                "Current Price": sells["stop"].to_numpy(),
+                "Total Value": np.round(sells["stop"].to_numpy() * sells["qty"].to_numpy(), 2),
+                "PnL": np.round((sells["stop"].to_numpy() - sells["buy_price"].to_numpy()) * sells["qty"].to_numpy(), 2),
+                "Action": STOP_ACTION,
+                "_order": day_pos * 2,
+            }
+        )
+
+        total_value = held_value[ends]
+        day_pnl = holds.groupby("_order")["PnL"].sum().reindex(np.arange(len(ends)) * 2, fill_value=0.0).to_numpy()
+        totals = pd.DataFrame(
+            {
+                "Date": self.day_labels[ends],
+                "Ticker": "TOTAL",
+                "Total Value": np.round(total_value, 2),
+                "PnL": np.round(day_pnl, 2),
+                "Cash Balance": np.round(cash[st], 2),
+                "Total Equity": np.round(total_value + cash[st], 2),
+                "_order": np.arange(len(ends)) * 2 + 1,
+            }
+        )
+        frames = [f for f in (holds, stopped, totals) if not f.empty]
+        out = pd.concat(frames, ignore_index=True).sort_values("_order", kind="stable")
+        return out.drop(columns="_order").reindex(columns=PORTFOLIO_COLUMNS).fillna("").reset_index(drop=True)
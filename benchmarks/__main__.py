@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from .suite import CASES, SIZES, compare, run_suite
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the trading hot paths on synthetic portfolios with fake clients.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in SIZES), help="Comma-separated portfolio/universe sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case and size (the minimum is reported)")
+    parser.add_argument("--only", default=None, help=f"Comma-separated case names: {', '.join(c.name for c in CASES)}")
+    parser.add_argument("--out", default=None, help="JSON report path (default benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = None if args.only is None else [s.strip() for s in args.only.split(",") if s.strip()]
+
+    def progress(r) -> None:
+        print(f"{r.case:<32} n={r.size:>6}  min {r.min_s * 1e3:10.2f} ms  {r.per_item_us:10.1f} us/item")
+
+    report = run_suite(sizes, repeat=args.repeat, only=only, progress=progress)
+    meta = report["meta"]
+    out = Path(args.out) if args.out else Path(__file__).resolve().parent / "results" / f"{meta['timestamp'].replace(':', '')}-{meta['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Saved {len(report['results'])} results to {out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        for row in compare(baseline, report):
+            flag = "  <-- slower" if row["ratio"] > 1.2 else ""
+            print(f"{row['case']:<32} n={row['size']:>6}  x{row['ratio']:.2f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from exchange.base import OrderRequest, Quote
+from exchange.simulated import PriceFeed, SimulatedExchange
+from execution.executor import Executor, TradePlanItem
+from execution.stop_monitor import PriceBatch, StopBook, StopMonitor
+from marketdata.cache import BarCache, is_intraday, set_default_cache
+from risk.manager import EquityContext, RiskConfig, RiskManager
+from storage.trade_log import TradeLogWriter
+
+
+SIZES = (10, 100, 1_000, 10_000)
+
+# A case times ``run(state)`` after an untimed ``setup(size, workdir) -> state``.
+Setup = Callable[[int, Path], Any]
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Setup
+    run: Callable[[Any], Any]
+    max_size: Optional[int] = None
+
+
+@dataclass
+class CaseResult:
+    case: str
+    size: int
+    repeat: int
+    min_s: float
+    median_s: float
+    mean_s: float
+    per_item_us: float
+
+
+# -- synthetic data -----------------------------------------------------------
+
+
+def synthetic_symbols(n: int) -> list[str]:
+    return [f"S{i:05d}" for i in range(n)]
+
+
+def _price(i: int) -> float:
+    return round(2.0 + (i * 7919 % 5000) / 100.0, 2)
+
+
+class SyntheticFetcher:
+    """Stand-in for the network fetcher: precomputed bars, zero latency.
+
+    Daily series span the last five sessions; minute series cover the last
+    30 minutes. Frames are built once up front so timing only sees the cost
+    of the code under test.
+    """
+
+    def __init__(self, symbols: Iterable[str], seed: int = 0) -> None:
+        rng = np.random.default_rng(seed)
+        self.calls = 0
+        self._daily: dict[str, pd.DataFrame] = {}
+        self._minute: dict[str, pd.DataFrame] = {}
+        days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=5)
+        minutes = pd.date_range(end=pd.Timestamp.now(tz="UTC").floor("min"), periods=30, freq="min")
+        for i, sym in enumerate(symbols):
+            base = _price(i)
+            walk = base * np.cumprod(1 + rng.normal(0, 0.01, len(days)))
+            self._daily[sym] = _ohlcv(days, walk)
+            self._minute[sym] = _ohlcv(minutes, base * np.cumprod(1 + rng.normal(0, 0.001, len(minutes))))
+
+    def __call__(self, symbols: list[str], interval: str, start: str, end: Optional[str]) -> dict[str, pd.DataFrame]:
+        self.calls += 1
+        source = self._minute if is_intraday(interval) else self._daily
+        return {s: source[s] for s in symbols if s in source}
+
+
+def _ohlcv(index: pd.DatetimeIndex, close: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.98, "Close": close, "Volume": 1e5},
+        index=index,
+    )
+
+
+def synthetic_portfolio(n: int, stop_hit_every: int = 20) -> pd.DataFrame:
+    """``n`` holdings in the trading script's layout; every ``stop_hit_every``-th stop sits above the price."""
+    symbols = synthetic_symbols(n)
+    buy = np.array([_price(i) for i in range(n)])
+    shares = 1 + np.arange(n) % 50
+    stop = np.where(np.arange(n) % stop_hit_every == 0, buy * 2.0, buy * 0.5).round(2)
+    return pd.DataFrame(
+        {"ticker": symbols, "shares": shares, "buy_price": buy, "cost_basis": (buy * shares).round(2), "stop_loss": stop}
+    )
+
+
+def synthetic_history(portfolio: pd.DataFrame, days: int = 5, cash: float = 1000.0) -> pd.DataFrame:
+    """Portfolio CSV history: ``days`` daily snapshots of ``portfolio`` plus TOTAL rows."""
+    frames = []
+    for day in pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days).strftime("%Y-%m-%d"):
+        rows = pd.DataFrame(
+            {
+                "Date": day,
+                "Ticker": portfolio["ticker"],
+                "Shares": portfolio["shares"],
+                "Buy Price": portfolio["buy_price"],
+                "Cost Basis": portfolio["cost_basis"],
+                "Stop Loss": portfolio["stop_loss"],
+                "Current Price": portfolio["buy_price"],
+                "Total Value": portfolio["cost_basis"],
+                "PnL": 0.0,
+                "Action": "HOLD",
+                "Cash Balance": "",
+                "Total Equity": "",
+            }
+        )
+        total = float(portfolio["cost_basis"].sum())
+        frames.append(rows)
+        frames.append(
+            pd.DataFrame(
+                [{"Date": day, "Ticker": "TOTAL", "Total Value": total, "PnL": 0.0, "Cash Balance": cash, "Total Equity": total + cash}]
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _use_cache(workdir: Path, symbols: list[str], name: str) -> BarCache:
+    cache = BarCache(workdir / f"{name}.sqlite", fetcher=SyntheticFetcher(symbols))
+    set_default_cache(cache)
+    return cache
+
+
+# -- cases --------------------------------------------------------------------
+
+
+def _process_portfolio_setup(n: int, workdir: Path) -> Any:
+    import trading_script as ts
+
+    ctx = ts.PortfolioContext.open(workdir / "data", backend="csv")
+    portfolio = synthetic_portfolio(n)
+    cache = _use_cache(workdir, list(portfolio["ticker"]), "process")
+    # Warm the bar cache so the timing covers the script, not the first download.
+    cache.get_bars_batch(list(portfolio["ticker"]), "1d", period="1d")
+    return ts, portfolio, ctx
+
+
+def _process_portfolio_run(state: Any) -> Any:
+    ts, portfolio, ctx = state
+    return ts.process_portfolio(portfolio, 1000.0, interactive=False, ctx=ctx)
+
+
+def _load_state_setup(n: int, workdir: Path) -> Any:
+    import trading_script as ts
+
+    (workdir / "data").mkdir(parents=True, exist_ok=True)
+    path = workdir / "data" / "history.csv"
+    synthetic_history(synthetic_portfolio(n)).to_csv(path, index=False)
+    return ts, str(path)
+
+
+def _load_state_run(state: Any) -> Any:
+    ts, path = state
+    return ts.load_latest_portfolio_state(path)
+
+
+def _trade_rows(n: int) -> list[dict[str, Any]]:
+    return [
+        {"Date": "2025-08-01", "Ticker": s, "Shares Sold": 1, "Sell Price": 10.0, "Cost Basis": 9.0, "PnL": 1.0, "Reason": "BENCH"}
+        for s in synthetic_symbols(n)
+    ]
+
+
+def _trade_log_append_run(state: Any) -> None:
+    path, rows = state
+    writer = TradeLogWriter(path)
+    for row in rows:
+        writer.append(row)
+
+
+def _trade_log_batch_run(state: Any) -> None:
+    path, rows = state
+    writer = TradeLogWriter(path)
+    with writer.batch():
+        for row in rows:
+            writer.append(row)
+
+
+def _trade_log_setup(n: int, workdir: Path) -> Any:
+    return workdir / "trade_log.csv", _trade_rows(n)
+
+
+def _screen_setup(n: int, workdir: Path) -> Any:
+    symbols = synthetic_symbols(n)
+    return workdir, symbols, SyntheticFetcher(symbols)
+
+
+def _screen_run(state: Any) -> Any:
+    from strategy.screeners import screen_universe_detailed
+
+    workdir, symbols, fetcher = state
+    # A cold cache per run, so every batch goes through the (fake) fetch path.
+    path = workdir / f"screen-{time.perf_counter_ns()}.sqlite"
+    cache = BarCache(path, fetcher=fetcher)
+    try:
+        return screen_universe_detailed(symbols, RiskConfig(), max_candidates=len(symbols), early_stop=False, cache=cache)
+    finally:
+        cache.close()
+
+
+def _risk_inputs(n: int) -> Any:
+    risk = RiskManager(RiskConfig(max_notional_per_trade=1e9, max_positions=10**6))
+    reqs = [OrderRequest(symbol=s, side="buy", qty=1.0, stop_price=_price(i) * 0.9, order_class="bracket") for i, s in enumerate(synthetic_symbols(n))]
+    quotes = [Quote(symbol=r.symbol, bid=_price(i), ask=_price(i) * 1.001, last=_price(i), timestamp=None) for i, r in enumerate(reqs)]
+    ctx = EquityContext(equity=1e6, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
+    return risk, reqs, quotes, ctx
+
+
+def _risk_evaluate_run(state: Any) -> None:
+    risk, reqs, quotes, ctx = state
+    for req, quote in zip(reqs, quotes):
+        risk.evaluate(req, quote, ctx, True)
+
+
+def _risk_batch_run(state: Any) -> None:
+    risk, reqs, quotes, ctx = state
+    risk.evaluate_batch(reqs, quotes, ctx, True)
+
+
+def _executor_setup(n: int, workdir: Path) -> Any:
+    symbols = synthetic_symbols(n)
+    feed = PriceFeed()
+    for i, s in enumerate(symbols):
+        feed.set_price(s, _price(i))
+    client = SimulatedExchange(feed, cash=1e9)
+    risk = RiskManager(RiskConfig(max_notional_per_trade=1e9, max_positions=10**6, require_bracket=False))
+    ex = Executor(client, risk)
+    ctx = EquityContext(equity=1e9, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
+    return ex, [TradePlanItem(symbol=s, side="buy", qty=1.0) for s in symbols], ctx
+
+
+def _executor_run(state: Any) -> None:
+    ex, items, ctx = state
+    for item in items:
+        ex.place_and_reconcile(item, ctx)
+
+
+def _stop_monitor_setup(n: int, workdir: Path) -> Any:
+    symbols = tuple(synthetic_symbols(n))
+    book = StopBook(capacity=n)
+    for i, s in enumerate(symbols):
+        book.set(s, 10.0, _price(i) * 0.9)
+    monitor = StopMonitor(book)
+    # Quotes sit above every stop so each timed tick checks all positions and sells none.
+    batch = PriceBatch(0.0, symbols, np.array([_price(i) for i in range(n)]))
+    monitor.process(batch)
+    return monitor, batch
+
+
+def _stop_monitor_run(state: Any) -> None:
+    monitor, batch = state
+    monitor.process(batch)
+
+
+CASES: list[Case] = [
+    Case("process_portfolio", _process_portfolio_setup, _process_portfolio_run),
+    Case("load_latest_portfolio_state", _load_state_setup, _load_state_run),
+    # Every append is fsynced; past a thousand rows this only measures the disk.
+    Case("trade_log.append", _trade_log_setup, _trade_log_append_run, max_size=1_000),
+    Case("trade_log.batch", _trade_log_setup, _trade_log_batch_run),
+    Case("screen_universe", _screen_setup, _screen_run),
+    Case("RiskManager.evaluate", lambda n, _: _risk_inputs(n), _risk_evaluate_run),
+    Case("RiskManager.evaluate_batch", lambda n, _: _risk_inputs(n), _risk_batch_run),
+    Case("Executor.place_and_reconcile", _executor_setup, _executor_run),
+    Case("StopMonitor.process", _stop_monitor_setup, _stop_monitor_run),
+]
+
+
+# -- runner -------------------------------------------------------------------
+
+
+def run_case(case: Case, size: int, repeat: int = 3) -> CaseResult:
+    times: list[float] = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+            workdir = Path(tmp)
+            (workdir / "data").mkdir()
+            with contextlib.redirect_stdout(io.StringIO()):
+                state = case.setup(size, workdir)
+                t0 = time.perf_counter()
+                case.run(state)
+                times.append(time.perf_counter() - t0)
+            set_default_cache(None)
+    return CaseResult(
+        case=case.name,
+        size=size,
+        repeat=repeat,
+        min_s=min(times),
+        median_s=statistics.median(times),
+        mean_s=statistics.fmean(times),
+        per_item_us=min(times) / size * 1e6,
+    )
+
+
+def run_suite(sizes: Iterable[int] = SIZES, repeat: int = 3, only: Optional[Iterable[str]] = None, progress: Optional[Callable[[CaseResult], None]] = None) -> dict[str, Any]:
+    """Run every case (or those named in ``only``) at each size and return a JSON-ready report."""
+    wanted = None if only is None else set(only)
+    results = []
+    for case in CASES:
+        if wanted is not None and case.name not in wanted:
+            continue
+        for size in sizes:
+            if case.max_size is not None and size > case.max_size:
+                continue
+            result = run_case(case, size, repeat)
+            results.append(asdict(result))
+            if progress is not None:
+                progress(result)
+    return {"meta": environment(), "results": results}
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[dict[str, Any]]:
+    """Per (case, size) ratio of current to baseline ``min_s``; above 1.0 is slower."""
+    before = {(r["case"], r["size"]): r for r in baseline.get("results", [])}
+    out = []
+    for r in current.get("results", []):
+        old = before.get((r["case"], r["size"]))
+        if old is None or not old["min_s"]:
+            continue
+        out.append({"case": r["case"], "size": r["size"], "baseline_s": old["min_s"], "current_s": r["min_s"], "ratio": r["min_s"] / old["min_s"]})
+    return out
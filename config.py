@@ -1,47 +1,105 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Literal, cast
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, Optional, cast
 
-from dotenv import load_dotenv
 
-load_dotenv()
+Mode = Literal["dry-run", "paper", "live"]
 
+_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+_dotenv_loaded = False
 
-Mode = Literal["dry-run", "paper", "live"]
+
+def _getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    """``os.getenv`` that loads ``.env`` into the environment on first use."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _dotenv_loaded = True
+    return os.getenv(name, default)
+
+
+# Field defaults are read when an AppConfig is built, not when this module is imported.
+def _str(name: str, default: Optional[str] = None) -> Any:
+    return field(default_factory=lambda: _getenv(name, default))
+
+
+def _float(name: str, default: float) -> Any:
+    return field(default_factory=lambda: float(_getenv(name, str(default))))
+
+
+def _int(name: str, default: int) -> Any:
+    return field(default_factory=lambda: int(_getenv(name, str(default))))
+
+
+def _bool(name: str, default: bool) -> Any:
+    return field(default_factory=lambda: _getenv(name, str(default).lower()).lower() == "true")
+
+
+def _cache_path(name: str, filename: str) -> Any:
+    return field(default_factory=lambda: _getenv(name, str(_CACHE_DIR / filename)))
 
 
 @dataclass
 class AppConfig:
     mode: Mode = "dry-run"
     exchange: str = "alpaca"
-    alpaca_base_url: str | None = os.getenv("ALPACA_BASE_URL")
-    max_notional_per_trade: float = float(os.getenv("RISK_MAX_NOTIONAL_PER_TRADE", "25"))
-    max_symbol_exposure_pct: float = float(os.getenv("RISK_MAX_SYMBOL_EXPOSURE_PCT", "0.4"))
-    daily_loss_cap_pct: float = float(os.getenv("RISK_DAILY_LOSS_CAP_PCT", "0.06"))
-    min_price: float = float(os.getenv("RISK_MIN_PRICE", "1"))
-    max_spread_pct: float = float(os.getenv("RISK_MAX_SPREAD_PCT", "0.03"))
-    allow_after_hours: bool = os.getenv("RISK_ALLOW_AFTER_HOURS", "false").lower() == "true"
-    max_position_risk_pct: float = float(os.getenv("RISK_MAX_POSITION_RISK_PCT", "0.02"))
-    max_portfolio_heat_pct: float = float(os.getenv("RISK_MAX_PORTFOLIO_HEAT_PCT", "0.10"))
-    max_positions: int = int(os.getenv("RISK_MAX_POSITIONS", "5"))
-    daily_loss_tier_warn_pct: float = float(os.getenv("RISK_DAILY_LOSS_TIER_WARN_PCT", "0.045"))
-    daily_loss_tier_block_pct: float = float(os.getenv("RISK_DAILY_LOSS_TIER_BLOCK_PCT", "0.054"))
-    require_bracket: bool = os.getenv("RISK_REQUIRE_BRACKET", "true").lower() == "true"
-    default_stop_loss_pct: float = float(os.getenv("RISK_DEFAULT_STOP_LOSS_PCT", "0.10"))
-    openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
-    llm_model: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
-    llm_cadence_seconds: int = int(os.getenv("LLM_CADENCE_SECONDS", "900"))
-    llm_universe_file: str | None = os.getenv("LLM_UNIVERSE_FILE")
-    llm_max_daily_usd: float = float(os.getenv("LLM_MAX_DAILY_USD", "2.0"))
-    llm_strategy_text: str = os.getenv("LLM_STRATEGY_TEXT", "Focus on liquid micro-cap momentum with tight spreads, avoid illiquid names, set hard stops at entry.")
+    alpaca_base_url: str | None = _str("ALPACA_BASE_URL")
+    max_notional_per_trade: float = _float("RISK_MAX_NOTIONAL_PER_TRADE", 25)
+    max_symbol_exposure_pct: float = _float("RISK_MAX_SYMBOL_EXPOSURE_PCT", 0.4)
+    daily_loss_cap_pct: float = _float("RISK_DAILY_LOSS_CAP_PCT", 0.06)
+    min_price: float = _float("RISK_MIN_PRICE", 1)
+    max_spread_pct: float = _float("RISK_MAX_SPREAD_PCT", 0.03)
+    allow_after_hours: bool = _bool("RISK_ALLOW_AFTER_HOURS", False)
+    max_position_risk_pct: float = _float("RISK_MAX_POSITION_RISK_PCT", 0.02)
+    max_portfolio_heat_pct: float = _float("RISK_MAX_PORTFOLIO_HEAT_PCT", 0.10)
+    max_positions: int = _int("RISK_MAX_POSITIONS", 5)
+    daily_loss_tier_warn_pct: float = _float("RISK_DAILY_LOSS_TIER_WARN_PCT", 0.045)
+    daily_loss_tier_block_pct: float = _float("RISK_DAILY_LOSS_TIER_BLOCK_PCT", 0.054)
+    require_bracket: bool = _bool("RISK_REQUIRE_BRACKET", True)
+    default_stop_loss_pct: float = _float("RISK_DEFAULT_STOP_LOSS_PCT", 0.10)
+    openai_api_key: str | None = _str("OPENAI_API_KEY")
+    llm_model: str = _str("LLM_MODEL", "gpt-4o-mini")
+    llm_cadence_seconds: int = _int("LLM_CADENCE_SECONDS", 900)
+    llm_universe_file: str | None = _str("LLM_UNIVERSE_FILE")
+    llm_ensemble_models: str = _str("LLM_ENSEMBLE_MODELS", "")
+    llm_ensemble_deadline_seconds: float = _float("LLM_ENSEMBLE_DEADLINE_SECONDS", 20)
+    llm_stream: bool = _bool("LLM_STREAM", False)
+    llm_max_daily_usd: float = _float("LLM_MAX_DAILY_USD", 2.0)
+    llm_spend_path: str = _cache_path("LLM_SPEND_PATH", "llm_spend.json")
+    llm_strategy_text: str = _str("LLM_STRATEGY_TEXT", "Focus on liquid micro-cap momentum with tight spreads, avoid illiquid names, set hard stops at entry.")
+    llm_cache_path: str = _cache_path("LLM_CACHE_PATH", "llm_responses.sqlite")
+    llm_cache_ttl_seconds: float = _float("LLM_CACHE_TTL_SECONDS", 1800)
+    llm_cache_max_entries: int = _int("LLM_CACHE_MAX_ENTRIES", 256)
+    reconcile_seconds: float = _float("RECONCILE_SECONDS", 300)
+    stop_monitor_seconds: float = _float("STOP_MONITOR_SECONDS", 30)
+    portfolio_workers: int = _int("PORTFOLIO_WORKERS", 0)
+    quote_ttl_seconds: float = _float("QUOTE_TTL_SECONDS", 2)
+    quote_stale_seconds: float = _float("QUOTE_STALE_SECONDS", 5)
+    max_concurrent_orders: int = _int("MAX_CONCURRENT_ORDERS", 4)
+    sim_starting_cash: float = _float("SIM_STARTING_CASH", 100)
+    sim_slippage_bps: float = _float("SIM_SLIPPAGE_BPS", 0)
+    storage_backend: str = _str("STORAGE_BACKEND", "csv")
+    market_data_cache_path: str = _cache_path("MARKET_DATA_CACHE_PATH", "ohlcv.sqlite")
+    benchmark_cache_path: str = _cache_path("BENCHMARK_CACHE_PATH", "benchmarks.sqlite")
+    market_data_offline: bool = _bool("MARKET_DATA_OFFLINE", False)
+    market_data_intraday_ttl_seconds: float = _float("MARKET_DATA_INTRADAY_TTL_SECONDS", 60)
+    market_data_intraday_retention_days: int = _int("MARKET_DATA_INTRADAY_RETENTION_DAYS", 7)
+    market_data_max_series: int | None = field(default_factory=lambda: int(_getenv("MARKET_DATA_MAX_SERIES", "0")) or None)
+    trace_enabled: bool = _bool("TRACE_ENABLED", False)
+    trace_path: str = _cache_path("TRACE_PATH", "spans.jsonl")
+    trace_max_bytes: int = _int("TRACE_MAX_BYTES", 10_000_000)
+    trace_backups: int = _int("TRACE_BACKUPS", 3)
 
 
 def load_config() -> AppConfig:
-    mode_str = os.getenv("MODE", "dry-run")
+    mode_str = _getenv("MODE", "dry-run")
     if mode_str not in ("dry-run", "paper", "live"):
         mode_str = "dry-run"
-    exchange = os.getenv("EXCHANGE", "alpaca")
+    exchange = _getenv("EXCHANGE", "alpaca")
     cfg = AppConfig(mode=cast(Mode, mode_str), exchange=exchange)
     return cfg
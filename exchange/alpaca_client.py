@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 from dataclasses import dataclass
 
+from observability.tracing import traced
+
 from .base import ExchangeClient, OrderRequest, OrderResponse, Quote
+from .order_stream import LocalOrderStream
 
 try:
     from alpaca.trading.client import TradingClient
@@ -25,6 +29,11 @@ except Exception:
     AlpacaTif = None  # type: ignore[assignment]
     StockLatestQuoteRequest = None  # type: ignore[assignment]
 
+try:
+    from alpaca.trading.stream import TradingStream
+except Exception:
+    TradingStream = None  # type: ignore[assignment]
+
 
 @dataclass
 class _Clients:
@@ -45,27 +54,63 @@ class AlpacaClient(ExchangeClient):
             trading=TradingClient(key, secret, paper=use_paper),  # type: ignore[call-arg]
             data=StockHistoricalDataClient(key, secret),  # type: ignore[call-arg]
         )
+        self._credentials = (key, secret, use_paper)
+        self._updates = LocalOrderStream()
+        self._stream: Any = None
+        self._stream_lock = threading.Lock()
 
+    @traced("alpaca.get_account")
     def get_account(self) -> Dict[str, Any]:
         acct = self._clients.trading.get_account()
         return dict(acct)
 
+    @traced("alpaca.get_positions")
     def get_positions(self) -> List[Dict[str, Any]]:
         positions = self._clients.trading.get_all_positions()
         return [dict(p) for p in positions]
 
-    def get_quote(self, symbol: str) -> Quote:
-        if StockLatestQuoteRequest is None:
-            return Quote(symbol=symbol, bid=None, ask=None, last=None, timestamp=None)
-        req = StockLatestQuoteRequest(symbol_or_symbols=symbol)
-        resp = self._clients.data.get_stock_latest_quote(req)
-        q = resp[symbol]
+    @staticmethod
+    def _to_quote(symbol: str, q: Any) -> Quote:
         bid = float(q.bid_price) if q and q.bid_price is not None else None
         ask = float(q.ask_price) if q and q.ask_price is not None else None
         last = None
         ts = str(q.timestamp) if q and q.timestamp is not None else None
         return Quote(symbol=symbol, bid=bid, ask=ask, last=last, timestamp=ts)
 
+    @staticmethod
+    def _to_response(o: Any) -> OrderResponse:
+        side = str(getattr(o.side, "value", o.side)).lower()
+        return OrderResponse(
+            id=str(o.id),
+            symbol=str(o.symbol),
+            side="buy" if side == "buy" else "sell",
+            qty=float(o.qty),
+            filled_qty=float(o.filled_qty or 0),
+            status=str(getattr(o.status, "value", o.status)),
+            avg_fill_price=float(o.filled_avg_price) if o.filled_avg_price is not None else None,
+            submitted_at=str(o.submitted_at) if o.submitted_at else None,
+            updated_at=str(o.updated_at) if o.updated_at else None,
+            raw=dict(o),
+        )
+
+    @traced("alpaca.get_quote")
+    def get_quote(self, symbol: str) -> Quote:
+        if StockLatestQuoteRequest is None:
+            return Quote(symbol=symbol, bid=None, ask=None, last=None, timestamp=None)
+        req = StockLatestQuoteRequest(symbol_or_symbols=symbol)
+        resp = self._clients.data.get_stock_latest_quote(req)
+        return self._to_quote(symbol, resp[symbol])
+
+    @traced("alpaca.get_quotes")
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Quote]:
+        if not symbols:
+            return {}
+        if StockLatestQuoteRequest is None:
+            return {s: Quote(symbol=s, bid=None, ask=None, last=None, timestamp=None) for s in symbols}
+        req = StockLatestQuoteRequest(symbol_or_symbols=list(symbols))
+        resp = self._submit_with_retry(self._clients.data.get_stock_latest_quote, req)
+        return {s: self._to_quote(s, resp.get(s)) for s in symbols}
+
     def _submit_with_retry(self, fn, *args, **kwargs):
         attempt = 0
         backoff = 0.5
@@ -79,6 +124,7 @@ class AlpacaClient(ExchangeClient):
                 time.sleep(backoff)
                 backoff = min(5.0, backoff * 2.0)
 
+    @traced("alpaca.place_order")
     def place_order(self, req: OrderRequest) -> OrderResponse:
         if OrderSide is None or AlpacaTif is None or MarketOrderRequest is None:
             raise RuntimeError("alpaca-py is not installed. Cannot place orders.")
@@ -127,57 +173,44 @@ class AlpacaClient(ExchangeClient):
             except Exception:
                 pass
 
-        return OrderResponse(
-            id=str(order.id),
-            symbol=str(order.symbol),
-            side=req.side,
-            qty=float(order.qty),
-            filled_qty=float(order.filled_qty or 0),
-            status=str(order.status),
-            avg_fill_price=float(order.filled_avg_price) if order.filled_avg_price is not None else None,
-            submitted_at=str(order.submitted_at) if order.submitted_at else None,
-            updated_at=str(order.updated_at) if order.updated_at else None,
-            raw=dict(order),
-        )
+        resp = self._to_response(order)
+        resp.side = req.side
+        return resp
 
+    @traced("alpaca.get_order")
     def get_order(self, order_id: str) -> OrderResponse:
         order = self._submit_with_retry(self._clients.trading.get_order_by_id, order_id)
-        return OrderResponse(
-            id=str(order.id),
-            symbol=str(order.symbol),
-            side="buy" if str(order.side).lower() == "buy" else "sell",
-            qty=float(order.qty),
-            filled_qty=float(order.filled_qty or 0),
-            status=str(order.status),
-            avg_fill_price=float(order.filled_avg_price) if order.filled_avg_price is not None else None,
-            submitted_at=str(order.submitted_at) if order.submitted_at else None,
-            updated_at=str(order.updated_at) if order.updated_at else None,
-            raw=dict(order),
-        )
+        return self._to_response(order)
 
+    @traced("alpaca.list_open_orders")
     def list_open_orders(self) -> list[OrderResponse]:
         if GetOrdersRequest is None:
             return []
         orders = self._submit_with_retry(self._clients.trading.get_orders, GetOrdersRequest(status="open"))  # type: ignore[call-arg]
-        out: list[OrderResponse] = []
-        for o in orders:
-            out.append(OrderResponse(
-                id=str(o.id),
-                symbol=str(o.symbol),
-                side="buy" if str(o.side).lower() == "buy" else "sell",
-                qty=float(o.qty),
-                filled_qty=float(o.filled_qty or 0),
-                status=str(o.status),
-                avg_fill_price=float(o.filled_avg_price) if o.filled_avg_price is not None else None,
-                submitted_at=str(o.submitted_at) if o.submitted_at else None,
-                updated_at=str(o.updated_at) if o.updated_at else None,
-                raw=dict(o),
-            ))
-        return out
+        return [self._to_response(o) for o in orders]
 
+    @traced("alpaca.cancel_order")
     def cancel_order(self, order_id: str) -> None:
         self._submit_with_retry(self._clients.trading.cancel_order_by_id, order_id)
 
+    @traced("alpaca.is_market_open")
     def is_market_open(self) -> bool:
         clock = self._clients.trading.get_clock()
         return bool(clock.is_open)
+
+    def subscribe_order_updates(self, callback: Callable[[OrderResponse], None]) -> Optional[Callable[[], None]]:
+        """Subscribe to the trade-updates websocket (started on first use)."""
+        if TradingStream is None:
+            return None
+        with self._stream_lock:
+            if self._stream is None:
+                key, secret, paper = self._credentials
+                stream = TradingStream(key, secret, paper=paper)
+
+                async def on_update(data: Any) -> None:
+                    self._updates.publish(self._to_response(data.order))
+
+                stream.subscribe_trade_updates(on_update)
+                threading.Thread(target=stream.run, name="alpaca-trade-updates", daemon=True).start()
+                self._stream = stream
+        return self._updates.subscribe(callback)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Protocol, Optional, Literal, Dict, Any
+from typing import Protocol, Optional, Literal, Dict, Any, Callable
 
 
 Side = Literal["buy", "sell"]
@@ -46,12 +46,60 @@ class OrderResponse:
     raw: Dict[str, Any] | None = None
 
 
+# One row of the execution audit log per submitted order.
+AUDIT_COLUMNS = [
+    "timestamp",
+    "symbol",
+    "side",
+    "qty",
+    "type",
+    "time_in_force",
+    "client_order_id",
+    "status",
+    "filled_qty",
+    "avg_fill_price",
+    "order_id",
+    "order_class",
+    "stop_price",
+    "take_profit_price",
+]
+
+
 class ExchangeClient(Protocol):
     def get_account(self) -> Dict[str, Any]: ...
     def get_positions(self) -> list[Dict[str, Any]]: ...
     def get_quote(self, symbol: str) -> Quote: ...
+
+    def get_quotes(self, symbols: list[str]) -> Dict[str, Quote]:
+        """Latest quotes for many symbols; clients override with one request."""
+        return {s: self.get_quote(s) for s in symbols}
+
     def place_order(self, req: OrderRequest) -> OrderResponse: ...
     def get_order(self, order_id: str) -> OrderResponse: ...
     def list_open_orders(self) -> list[OrderResponse]: ...
     def cancel_order(self, order_id: str) -> None: ...
     def is_market_open(self) -> bool: ...
+
+    def subscribe_order_updates(self, callback: Callable[[OrderResponse], None]) -> Optional[Callable[[], None]]:
+        """Push every order state change to ``callback``.
+
+        Returns an unsubscribe function, or None when the client has no
+        update stream and callers must poll ``get_order`` instead.
+        """
+        return None
+
+
+def fetch_quotes(client: Any, symbols: list[str]) -> Dict[str, Quote]:
+    """Call ``client.get_quotes``, falling back to per-symbol ``get_quote``."""
+    get_quotes = getattr(client, "get_quotes", None)
+    if get_quotes is not None:
+        return get_quotes(symbols)
+    return {s: client.get_quote(s) for s in symbols}
+
+
+def subscribe_order_updates(client: Any, callback: Callable[[OrderResponse], None]) -> Optional[Callable[[], None]]:
+    """Call ``client.subscribe_order_updates`` if the client has one."""
+    subscribe = getattr(client, "subscribe_order_updates", None)
+    if subscribe is None:
+        return None
+    return subscribe(callback)
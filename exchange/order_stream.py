@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, List
+
+from .base import OrderResponse
+
+
+OrderCallback = Callable[[OrderResponse], None]
+
+
+class LocalOrderStream:
+    """In-process order-update fan-out.
+
+    Exchange clients publish every order state change here and subscribers
+    (usually the Executor) receive it synchronously on the publishing thread.
+    It doubles as the fake trade-update stream in tests.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: List[OrderCallback] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: OrderCallback) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def publish(self, update: OrderResponse) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for cb in subscribers:
+            try:
+                cb(update)
+            except Exception:
+                pass
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .base import Quote, fetch_quotes
+
+
+@dataclass
+class _Entry:
+    quote: Quote
+    fetched_at: float
+
+
+class QuoteCache:
+    """In-process quote snapshot shared by batch callers and the risk path.
+
+    Quotes younger than ``ttl_seconds`` are served as-is. Quotes up to
+    ``stale_seconds`` past the TTL are still served, while a background thread
+    refreshes them (stale-while-revalidate). Anything older or missing is
+    fetched synchronously, with all misses of one call in a single
+    ``get_quotes`` request.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: float = 2.0,
+        stale_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.clock = clock
+        self.requests = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def get_quote(self, symbol: str) -> Quote:
+        return self.get_quotes([symbol])[symbol]
+
+    def get_quotes(self, symbols: Iterable[str]) -> Dict[str, Quote]:
+        syms = list(dict.fromkeys(symbols))
+        now = self.clock()
+        out: Dict[str, Quote] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        with self._lock:
+            for s in syms:
+                entry = self._entries.get(s)
+                age = None if entry is None else now - entry.fetched_at
+                if entry is None or age is None or age >= self.ttl_seconds + self.stale_seconds:
+                    missing.append(s)
+                    continue
+                out[s] = entry.quote
+                if age >= self.ttl_seconds and s not in self._refreshing:
+                    self._refreshing.add(s)
+                    stale.append(s)
+        if missing:
+            out.update(self._fetch(missing))
+        if stale:
+            threading.Thread(target=self._revalidate, args=(stale,), daemon=True).start()
+        return {s: out[s] for s in syms}
+
+    def invalidate(self, symbols: Optional[Iterable[str]] = None) -> None:
+        with self._lock:
+            if symbols is None:
+                self._entries.clear()
+            else:
+                for s in symbols:
+                    self._entries.pop(s, None)
+
+    def _fetch(self, symbols: list[str]) -> Dict[str, Quote]:
+        quotes = fetch_quotes(self.client, symbols)
+        fetched_at = self.clock()
+        with self._lock:
+            self.requests += 1
+            for s, q in quotes.items():
+                self._entries[s] = _Entry(q, fetched_at)
+        return quotes
+
+    def _revalidate(self, symbols: list[str]) -> None:
+        try:
+            self._fetch(symbols)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(symbols)
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .base import ExchangeClient, OrderRequest, OrderResponse, Quote
+from .order_stream import LocalOrderStream
+
+
+OPEN_STATUSES = ("new", "partially_filled")
+
+
+class ManualClock:
+    """A clock that only moves when told to, for deterministic replays."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.t = float(start)
+
+    def __call__(self) -> float:
+        return self.t
+
+    def advance(self, seconds: float) -> float:
+        self.t += seconds
+        return self.t
+
+    def set(self, t: float) -> None:
+        self.t = float(t)
+
+
+@dataclass
+class _Series:
+    ts: np.ndarray
+    last: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+
+
+class PriceFeed:
+    """Replayable per-symbol price series, looked up by clock time.
+
+    A quote at time ``t`` is the latest tick at or before ``t`` (the first
+    tick if ``t`` precedes the series). Series are added from arrays, from
+    OHLCV frames (``from_bars``) or as a constant (``set_price``). When a
+    ``loader`` is given, unknown symbols are pulled through it on first use.
+    """
+
+    def __init__(self, spread_pct: float = 0.001, loader: Optional[Callable[[str], pd.DataFrame]] = None) -> None:
+        self.spread_pct = spread_pct
+        self.loader = loader
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def add(self, symbol: str, ts: Any, last: Any, bid: Any = None, ask: Any = None) -> None:
+        ts_arr = np.asarray(ts, dtype=float)
+        last_arr = np.asarray(last, dtype=float)
+        half = last_arr * self.spread_pct / 2.0
+        bid_arr = last_arr - half if bid is None else np.asarray(bid, dtype=float)
+        ask_arr = last_arr + half if ask is None else np.asarray(ask, dtype=float)
+        order = np.argsort(ts_arr, kind="stable")
+        with self._lock:
+            self._series[symbol.upper()] = _Series(ts_arr[order], last_arr[order], bid_arr[order], ask_arr[order])
+
+    def set_price(self, symbol: str, price: float) -> None:
+        self.add(symbol, [0.0], [price])
+
+    def add_bars(self, symbol: str, bars: pd.DataFrame, price_col: str = "Close") -> None:
+        if bars.empty:
+            return
+        idx = pd.DatetimeIndex(bars.index)
+        if idx.tz is None:
+            idx = idx.tz_localize("UTC")
+        self.add(symbol, idx.asi8 / 1e9, bars[price_col].to_numpy(dtype=float))
+
+    @classmethod
+    def from_bars(cls, frames: Mapping[str, pd.DataFrame], price_col: str = "Close", spread_pct: float = 0.001) -> "PriceFeed":
+        feed = cls(spread_pct=spread_pct)
+        for sym, df in frames.items():
+            feed.add_bars(sym, df, price_col)
+        return feed
+
+    def symbols(self) -> list[str]:
+        return list(self._series)
+
+    def quote(self, symbol: str, t: float) -> Optional[tuple[float, float, float]]:
+        """``(bid, ask, last)`` at time ``t``, or None if the symbol is unknown."""
+        symbol = symbol.upper()
+        s = self._series.get(symbol)
+        if s is None and self.loader is not None:
+            try:
+                self.add_bars(symbol, self.loader(symbol))
+            except Exception:
+                pass
+            s = self._series.get(symbol)
+        if s is None or len(s.ts) == 0:
+            return None
+        i = max(int(np.searchsorted(s.ts, t, side="right")) - 1, 0)
+        return float(s.bid[i]), float(s.ask[i]), float(s.last[i])
+
+
+@dataclass
+class _SimOrder:
+    id: str
+    req: OrderRequest
+    created_at: float
+    status: str = "new"
+    filled_qty: float = 0.0
+    avg_fill_price: Optional[float] = None
+    updated_at: float = 0.0
+    triggered: bool = False
+    parent_id: Optional[str] = None
+    children: List[str] = field(default_factory=list)
+
+    @property
+    def remaining(self) -> float:
+        return self.req.qty - self.filled_qty
+
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t, tz=timezone.utc).isoformat()
+
+
+class SimulatedExchange(ExchangeClient):
+    """In-memory exchange driven by a :class:`PriceFeed` and a clock.
+
+    Market orders fill at the touch (ask for buys, bid for sells) plus
+    ``slippage_bps``; limit, stop and stop-limit orders rest until the quote
+    crosses them. Resting orders are matched whenever the exchange is called
+    after the clock has moved, or explicitly via :meth:`match`. A bracket buy
+    (``order_class="bracket"``) gets a sell-stop leg at ``stop_price`` and,
+    with ``take_profit_price``, a sell-limit leg; the legs track the parent's
+    filled quantity and cancel each other when one fills. ``max_fill_qty``
+    caps how much of an order fills per match, producing partial fills. With
+    a ``calendar``, ``is_market_open`` follows it; otherwise the market is
+    always open. Every state change is published to order-update
+    subscribers.
+    """
+
+    def __init__(
+        self,
+        feed: PriceFeed,
+        cash: float = 100_000.0,
+        clock: Callable[[], float] = time.time,
+        slippage_bps: float = 0.0,
+        max_fill_qty: Optional[float] = None,
+        calendar: Any = None,
+    ) -> None:
+        self.feed = feed
+        self.cash = float(cash)
+        self.clock = clock
+        self.slippage_bps = slippage_bps
+        self.max_fill_qty = max_fill_qty
+        self.calendar = calendar
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self._orders: Dict[str, _SimOrder] = {}
+        self._open: Dict[str, Dict[str, _SimOrder]] = {}
+        self._by_client_id: Dict[str, str] = {}
+        self._ids = itertools.count(1)
+        self._updates = LocalOrderStream()
+        self._lock = threading.RLock()
+        self._matched_at: Optional[float] = None
+
+    # -- ExchangeClient -------------------------------------------------
+
+    def get_account(self) -> Dict[str, Any]:
+        with self._lock:
+            self._catch_up()
+            equity = self.cash + sum(self._market_value(sym, p["qty"]) for sym, p in self.positions.items())
+            return {"cash": self.cash, "equity": equity, "buying_power": self.cash, "status": "ACTIVE"}
+
+    def get_positions(self) -> list[Dict[str, Any]]:
+        with self._lock:
+            self._catch_up()
+            return [
+                {
+                    "symbol": sym,
+                    "qty": p["qty"],
+                    "avg_entry_price": p["avg_entry_price"],
+                    "market_value": self._market_value(sym, p["qty"]),
+                }
+                for sym, p in self.positions.items()
+                if p["qty"] != 0
+            ]
+
+    def get_quote(self, symbol: str) -> Quote:
+        q = self.feed.quote(symbol, self.clock())
+        if q is None:
+            return Quote(symbol=symbol, bid=None, ask=None, last=None, timestamp=None)
+        bid, ask, last = q
+        return Quote(symbol=symbol, bid=bid, ask=ask, last=last, timestamp=_iso(self.clock()))
+
+    def get_quotes(self, symbols: list[str]) -> Dict[str, Quote]:
+        return {s: self.get_quote(s) for s in symbols}
+
+    def place_order(self, req: OrderRequest) -> OrderResponse:
+        _validate(req)
+        with self._lock:
+            self._catch_up()
+            if req.client_order_id and req.client_order_id in self._by_client_id:
+                raise ValueError(f"client_order_id {req.client_order_id} already used")
+            order = self._new_order(req)
+            q = self.feed.quote(req.symbol, self.clock())
+            if q is None:
+                self._set_status(order, "rejected")
+            elif req.side == "buy" and req.qty * q[1] > self.cash + 1e-9:
+                self._set_status(order, "rejected")
+            else:
+                self._publish(order)
+                self._match_order(order, q)
+            return self._response(order)
+
+    def get_order(self, order_id: str) -> OrderResponse:
+        with self._lock:
+            self._catch_up()
+            if order_id not in self._orders:
+                raise KeyError(f"Unknown order {order_id}")
+            return self._response(self._orders[order_id])
+
+    def list_open_orders(self) -> list[OrderResponse]:
+        with self._lock:
+            self._catch_up()
+            return [self._response(o) for book in self._open.values() for o in book.values()]
+
+    def cancel_order(self, order_id: str) -> None:
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                raise KeyError(f"Unknown order {order_id}")
+            if order.status in OPEN_STATUSES:
+                self._set_status(order, "canceled")
+
+    def is_market_open(self) -> bool:
+        if self.calendar is None:
+            return True
+        return bool(self.calendar.is_open(datetime.fromtimestamp(self.clock(), tz=timezone.utc)))
+
+    def subscribe_order_updates(self, callback: Callable[[OrderResponse], None]) -> Optional[Callable[[], None]]:
+        return self._updates.subscribe(callback)
+
+    # -- simulation -----------------------------------------------------
+
+    def match(self) -> None:
+        """Match every resting order against the quotes at the current time."""
+        with self._lock:
+            self._matched_at = self.clock()
+            for sym in list(self._open):
+                q = self.feed.quote(sym, self._matched_at)
+                if q is None:
+                    continue
+                for order in list(self._open.get(sym, {}).values()):
+                    self._match_order(order, q)
+
+    def _catch_up(self) -> None:
+        if self._matched_at != self.clock():
+            self.match()
+
+    def _new_order(self, req: OrderRequest, parent_id: Optional[str] = None) -> _SimOrder:
+        now = self.clock()
+        order = _SimOrder(id=f"sim-{next(self._ids)}", req=req, created_at=now, updated_at=now, parent_id=parent_id)
+        self._orders[order.id] = order
+        self._open.setdefault(req.symbol, {})[order.id] = order
+        if req.client_order_id:
+            self._by_client_id[req.client_order_id] = order.id
+        return order
+
+    def _match_order(self, order: _SimOrder, q: tuple[float, float, float]) -> None:
+        if order.status not in OPEN_STATUSES or order.remaining <= 0:
+            return
+        price = self._executable_price(order, q)
+        if price is None:
+            return
+        qty = order.remaining if self.max_fill_qty is None else min(order.remaining, self.max_fill_qty)
+        self._fill(order, qty, price)
+
+    def _executable_price(self, order: _SimOrder, q: tuple[float, float, float]) -> Optional[float]:
+        bid, ask, last = q
+        req = order.req
+        buy = req.side == "buy"
+        if req.type in ("stop", "stop_limit") and not order.triggered:
+            assert req.stop_price is not None
+            if (buy and last >= req.stop_price) or (not buy and last <= req.stop_price):
+                order.triggered = True
+            else:
+                return None
+        touch = ask if buy else bid
+        if req.type in ("limit", "stop_limit"):
+            assert req.limit_price is not None
+            if (buy and touch > req.limit_price) or (not buy and touch < req.limit_price):
+                return None
+            return touch
+        slip = touch * self.slippage_bps / 10_000.0
+        return touch + slip if buy else touch - slip
+
+    def _fill(self, order: _SimOrder, qty: float, price: float) -> None:
+        req = order.req
+        prev = order.filled_qty
+        order.filled_qty = prev + qty
+        order.avg_fill_price = price if prev == 0 else ((order.avg_fill_price or 0.0) * prev + price * qty) / order.filled_qty
+        signed = qty if req.side == "buy" else -qty
+        self.cash -= signed * price
+        pos = self.positions.setdefault(req.symbol, {"qty": 0.0, "avg_entry_price": 0.0})
+        new_qty = pos["qty"] + signed
+        if new_qty == 0:
+            pos["avg_entry_price"] = 0.0
+        elif pos["qty"] == 0 or (pos["qty"] > 0) != (new_qty > 0):
+            pos["avg_entry_price"] = price
+        elif abs(new_qty) > abs(pos["qty"]):
+            pos["avg_entry_price"] = (pos["avg_entry_price"] * abs(pos["qty"]) + price * qty) / abs(new_qty)
+        pos["qty"] = new_qty
+        self._set_status(order, "filled" if order.remaining <= 1e-12 else "partially_filled")
+        if req.order_class == "bracket" and req.side == "buy":
+            self._sync_legs(order)
+        if order.parent_id is not None and order.status == "filled":
+            for sibling in self._orders[order.parent_id].children:
+                if sibling != order.id and self._orders[sibling].status in OPEN_STATUSES:
+                    self._set_status(self._orders[sibling], "canceled")
+
+    def _sync_legs(self, parent: _SimOrder) -> None:
+        req = parent.req
+        if not parent.children:
+            legs = []
+            if req.stop_price is not None:
+                legs.append(OrderRequest(symbol=req.symbol, side="sell", qty=0.0, type="stop", stop_price=req.stop_price, time_in_force=req.time_in_force, client_order_id=(req.client_order_id or parent.id) + "-stop"))
+            if req.take_profit_price is not None:
+                legs.append(OrderRequest(symbol=req.symbol, side="sell", qty=0.0, type="limit", limit_price=req.take_profit_price, time_in_force=req.time_in_force, client_order_id=(req.client_order_id or parent.id) + "-tp"))
+            for leg in legs:
+                parent.children.append(self._new_order(leg, parent_id=parent.id).id)
+        for child_id in parent.children:
+            child = self._orders[child_id]
+            if child.status in OPEN_STATUSES:
+                child.req.qty = parent.filled_qty
+                self._publish(child)
+
+    def _set_status(self, order: _SimOrder, status: str) -> None:
+        order.status = status
+        order.updated_at = self.clock()
+        if status not in OPEN_STATUSES:
+            book = self._open.get(order.req.symbol)
+            if book is not None:
+                book.pop(order.id, None)
+                if not book:
+                    del self._open[order.req.symbol]
+        self._publish(order)
+
+    def _publish(self, order: _SimOrder) -> None:
+        if self._updates.has_subscribers:
+            self._updates.publish(self._response(order))
+
+    def _market_value(self, symbol: str, qty: float) -> float:
+        q = self.feed.quote(symbol, self.clock())
+        return 0.0 if q is None else qty * q[2]
+
+    @staticmethod
+    def _response(order: _SimOrder) -> OrderResponse:
+        req = order.req
+        return OrderResponse(
+            id=order.id,
+            symbol=req.symbol,
+            side=req.side,
+            qty=req.qty,
+            filled_qty=order.filled_qty,
+            status=order.status,
+            avg_fill_price=order.avg_fill_price,
+            submitted_at=_iso(order.created_at),
+            updated_at=_iso(order.updated_at),
+            raw={
+                "type": req.type,
+                "client_order_id": req.client_order_id,
+                "limit_price": req.limit_price,
+                "stop_price": req.stop_price,
+                "parent_id": order.parent_id,
+                "legs": list(order.children),
+            },
+        )
+
+
+def _validate(req: OrderRequest) -> None:
+    if req.qty <= 0:
+        raise ValueError("qty must be positive")
+    if req.type == "limit" and req.limit_price is None:
+        raise ValueError("limit_price required for limit orders")
+    if req.type == "stop" and req.stop_price is None:
+        raise ValueError("stop_price required for stop orders")
+    if req.type == "stop_limit" and (req.stop_price is None or req.limit_price is None):
+        raise ValueError("stop_price and limit_price required for stop_limit orders")
+    if req.type not in ("market", "limit", "stop", "stop_limit"):
+        raise ValueError(f"Unsupported order type: {req.type}")
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import threading
 import time
 import uuid
-from dataclasses import dataclass
-from typing import Optional, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Optional
 from pathlib import Path
 import csv
 import math
 
-from exchange.base import ExchangeClient, OrderRequest, OrderResponse
+from exchange.base import AUDIT_COLUMNS, ExchangeClient, OrderRequest, OrderResponse, Quote, subscribe_order_updates
+from exchange.quote_cache import QuoteCache
 from risk.manager import RiskManager, EquityContext, RiskDecision
+from execution.ledger import PortfolioLedger
+from observability.tracing import span, traced
+
+
+TERMINAL_STATUSES = ("filled", "partially_filled", "canceled", "replaced", "rejected")
 
 
 @dataclass
@@ -21,14 +30,38 @@ class TradePlanItem:
     limit_price: Optional[float] = None
     stop_price: Optional[float] = None
     client_order_id: Optional[str] = None
+    # A sell that only closes or shrinks a held position (e.g. a stop-loss exit).
+    reduce_only: bool = False
+
+
+@dataclass
+class BatchResult:
+    item: TradePlanItem
+    request: Optional[OrderRequest] = None
+    response: Optional[OrderResponse] = None
+    error: Optional[str] = None
 
 
 class Executor:
-    def __init__(self, client: ExchangeClient, risk: RiskManager, logger: Optional[Any] = None, audit_log_path: Optional[Path] = None) -> None:
+    def __init__(self, client: ExchangeClient, risk: RiskManager, logger: Optional[Any] = None, audit_log_path: Optional[Path] = None, audit_backend: Optional[Any] = None, quote_cache: Optional[QuoteCache] = None, ledger: Optional[PortfolioLedger] = None) -> None:
         self.client = client
         self.risk = risk
         self.logger = logger
         self.audit_log_path = audit_log_path
+        self.audit_backend = audit_backend
+        self.quotes = quote_cache or QuoteCache(client)
+        self.ledger = ledger
+        self.fill_timeout = 20.0
+        self.poll_interval = 1.0
+        self.min_poll_interval = 0.05
+        self.max_stream_check_interval = 5.0
+        self.use_order_stream = True
+        self._events = _OrderEvents()
+        self._stream_state: Optional[bool] = None
+
+    def prefetch_quotes(self, symbols: list[str]) -> dict[str, Quote]:
+        """Load one quote snapshot for ``symbols`` with a single request."""
+        return self.quotes.get_quotes(symbols)
 
     def _log(self, msg: str) -> None:
         if self.logger:
@@ -37,24 +70,8 @@ class Executor:
             print(msg)
 
     def _audit(self, req: OrderRequest, resp: OrderResponse) -> None:
-        if not self.audit_log_path:
+        if not self.audit_log_path and self.audit_backend is None:
             return
-        header = [
-            "timestamp",
-            "symbol",
-            "side",
-            "qty",
-            "type",
-            "time_in_force",
-            "client_order_id",
-            "status",
-            "filled_qty",
-            "avg_fill_price",
-            "order_id",
-            "order_class",
-            "stop_price",
-            "take_profit_price",
-        ]
         row = [
             str(int(time.time())),
             req.symbol,
@@ -71,22 +88,127 @@ class Executor:
             "" if req.stop_price is None else req.stop_price,
             "" if req.take_profit_price is None else req.take_profit_price,
         ]
+        if self.audit_backend is not None:
+            self.audit_backend.append_execution(dict(zip(AUDIT_COLUMNS, row)))
+            return
         path = self.audit_log_path
         path.parent.mkdir(parents=True, exist_ok=True)
         write_header = not path.exists()
-        with path.open("a", newline="") as f:
+        with span("csv.execution_log.append", path=str(path)), path.open("a", newline="") as f:
             w = csv.writer(f)
             if write_header:
-                w.writerow(header)
+                w.writerow(AUDIT_COLUMNS)
             w.writerow(row)
 
-    def place_and_reconcile(self, item: TradePlanItem, equity_ctx: EquityContext) -> OrderResponse:
-        quote = self.client.get_quote(item.symbol)
+    @traced("executor.place_and_reconcile")
+    def place_and_reconcile(self, item: TradePlanItem, equity_ctx: Optional[EquityContext] = None) -> OrderResponse:
+        """Place one order; ``equity_ctx`` defaults to the ledger's snapshot."""
+        quote = self.quotes.get_quote(item.symbol)
+        market_open = self.client.is_market_open()
+        if self.ledger is not None:
+            self.ledger.mark(item.symbol, _ref_price(quote))
+        req = self.prepare_order(item, quote, equity_ctx or self._ledger_context(item.symbol), market_open)
+        self._ensure_stream()
+        self._log(f"Submitting order {req.symbol} {req.side} {req.qty} {req.type}")
+        resp = self._submit(req)
+        return self._reconcile([(req, resp)])[0]
+
+    @traced("executor.place_batch")
+    def place_batch(self, items: list[TradePlanItem], equity_ctx: Optional[EquityContext] = None, max_concurrency: int = 4) -> list[BatchResult]:
+        """Place a whole plan with one quote snapshot and one reconcile loop.
+
+        Quotes and market status are fetched once. Risk checks run in plan
+        order against a context that absorbs each accepted buy (exposure,
+        open positions, heat), so later legs see the earlier ones. Approved
+        orders are submitted by up to ``max_concurrency`` threads and all
+        outstanding orders are polled together. Results follow ``items``;
+        a rejected or failed leg carries its ``error`` instead of raising.
+        Without ``equity_ctx`` each leg starts from the ledger's snapshot
+        for its symbol.
+        """
+        results = [BatchResult(item=i) for i in items]
+        if not items:
+            return results
+        quotes = self.quotes.get_quotes([i.symbol for i in items])
         market_open = self.client.is_market_open()
 
-        ref_price = quote.last
-        if ref_price is None and quote.bid is not None and quote.ask is not None:
-            ref_price = (quote.bid + quote.ask) / 2.0
+        if self.ledger is not None:
+            self.ledger.mark_many({s: _ref_price(q) for s, q in quotes.items()})
+
+        plan = _PlanContext(lambda symbol: equity_ctx or self._ledger_context(symbol))
+        approved = [r for r in results if self._approve(r, quotes[r.item.symbol], plan, market_open)]
+        if approved:
+            self._ensure_stream()
+            with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(approved)))) as pool:
+                list(pool.map(self._submit_leg, approved))
+        live = [r for r in approved if r.response is not None]
+        final = self._reconcile([(r.request, r.response) for r in live])
+        for r, resp in zip(live, final):
+            r.response = resp
+        return results
+
+    @traced("executor.place_stream")
+    def place_stream(self, items: Iterable[TradePlanItem], equity_ctx: Optional[EquityContext] = None, max_concurrency: int = 4) -> list[BatchResult]:
+        """Like :meth:`place_batch`, for a plan that is still being produced.
+
+        Each leg is quoted, risk-checked and submitted as soon as ``items``
+        yields it, so work on the first legs overlaps with generation of the
+        rest (e.g. a streaming LLM response). Risk context accumulates across
+        legs exactly as in :meth:`place_batch`; all orders are reconciled
+        together once ``items`` is exhausted.
+        """
+        results: list[BatchResult] = []
+        plan = _PlanContext(lambda symbol: equity_ctx or self._ledger_context(symbol))
+        market_open: Optional[bool] = None
+        approved: list[BatchResult] = []
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            for item in items:
+                r = BatchResult(item=item)
+                results.append(r)
+                try:
+                    quote = self.quotes.get_quotes([item.symbol])[item.symbol]
+                    if market_open is None:
+                        market_open = self.client.is_market_open()
+                except Exception as e:
+                    r.error = f"Quote failed: {e}"
+                    continue
+                if self.ledger is not None:
+                    self.ledger.mark(item.symbol, _ref_price(quote))
+                if not self._approve(r, quote, plan, market_open):
+                    continue
+                approved.append(r)
+                self._ensure_stream()
+                pool.submit(self._submit_leg, r)
+        live = [r for r in approved if r.response is not None]
+        final = self._reconcile([(r.request, r.response) for r in live])
+        for r, resp in zip(live, final):
+            r.response = resp
+        return results
+
+    def _approve(self, r: BatchResult, quote: Quote, plan: "_PlanContext", market_open: bool) -> bool:
+        try:
+            r.request = self.prepare_order(r.item, quote, plan.leg(r.item.symbol), market_open)
+        except Exception as e:
+            r.error = str(e)
+            return False
+        plan.absorb(r.request, quote)
+        return True
+
+    def _submit_leg(self, r: BatchResult) -> None:
+        assert r.request is not None
+        self._log(f"Submitting order {r.request.symbol} {r.request.side} {r.request.qty} {r.request.type}")
+        try:
+            r.response = self._submit(r.request)
+        except Exception as e:
+            r.error = f"Submit failed: {e}"
+
+    def prepare_order(self, item: TradePlanItem, quote: Quote, equity_ctx: EquityContext, market_open: bool) -> OrderRequest:
+        """Size ``item``, attach the default bracket stop and run risk checks.
+
+        Reduce-only sells skip the entry limits (see
+        :meth:`RiskManager.evaluate_exit`).
+        """
+        ref_price = _ref_price(quote)
 
         stop_price = item.stop_price
         if stop_price is None and self.risk.cfg.require_bracket and item.side.lower().startswith("b") and ref_price is not None:
@@ -114,43 +236,184 @@ class Executor:
             order_class="bracket" if (stop_price is not None and item.side.lower().startswith("b")) else None,
         )
 
-        decision: RiskDecision = self.risk.evaluate(req, quote, equity_ctx, market_open)
+        if item.reduce_only and req.side == "sell":
+            decision: RiskDecision = self.risk.evaluate_exit(req, quote, market_open)
+        else:
+            decision = self.risk.evaluate(req, quote, equity_ctx, market_open)
         if not decision.approved:
             if decision.adjusted_qty and decision.adjusted_qty > 0:
                 self._log(f"Risk adjusted qty from {req.qty} to {decision.adjusted_qty}: {decision.reason}")
                 req.qty = decision.adjusted_qty
             else:
                 raise RuntimeError(f"Risk rejected order: {decision.reason}")
+        return req
 
-        self._log(f"Submitting order {req.symbol} {req.side} {req.qty} {req.type}")
+    @traced("executor.submit")
+    def _submit(self, req: OrderRequest) -> OrderResponse:
         attempt = 0
         backoff = 0.5
         while True:
             try:
-                resp = self.client.place_order(req)
-                break
-            except Exception as e:
+                return self.client.place_order(req)
+            except Exception:
                 attempt += 1
                 if attempt >= 5:
                     raise
                 time.sleep(backoff)
                 backoff = min(5.0, backoff * 2.0)
 
-        tries = 0
-        last = resp
-        while tries < 20:
-            time.sleep(1.0)
-            try:
-                o = self.client.get_order(resp.id)
-            except Exception:
-                tries += 1
-                continue
-            last = o
-            if o.status.lower() in ("filled", "partially_filled", "canceled", "replaced", "rejected"):
-                self._log(f"Order status: {o.status} filled_qty={o.filled_qty} avg={o.avg_fill_price}")
-                self._audit(req, o)
-                return o
-            tries += 1
-        self._log("Timed out waiting for fill; returning last known order state")
-        self._audit(req, last)
+    def _ledger_context(self, symbol: str) -> EquityContext:
+        if self.ledger is None:
+            raise ValueError("equity_ctx is required when the executor has no ledger")
+        return self.ledger.context(symbol)
+
+    def _ensure_stream(self) -> bool:
+        """Subscribe to the client's order updates once; False if it has none."""
+        if self._stream_state is None:
+            unsubscribe = None
+            if self.use_order_stream:
+                try:
+                    unsubscribe = subscribe_order_updates(self.client, self._events.record)
+                except Exception as e:
+                    self._log(f"Order update stream unavailable, polling instead: {e}")
+            self._stream_state = unsubscribe is not None
+        return self._stream_state
+
+    @traced("executor.reconcile")
+    def _reconcile(self, orders: list[tuple[OrderRequest, OrderResponse]]) -> list[OrderResponse]:
+        """Wait until every order is terminal or ``fill_timeout`` passes.
+
+        With an order update stream the wait ends as soon as fill events
+        arrive; ``get_order`` is only called as a safety check when a wait
+        times out. Without one, orders are polled at intervals that start at
+        ``min_poll_interval`` and double up to ``poll_interval``.
+        """
+        streaming = self._ensure_stream()
+        last = [resp for _, resp in orders]
+        pending = list(range(len(orders)))
+        deadline = time.monotonic() + self.fill_timeout
+        if streaming:
+            interval, cap = self.poll_interval, self.max_stream_check_interval
+        else:
+            interval, cap = self.min_poll_interval, self.poll_interval
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait = min(interval, remaining)
+            woke = False
+            if streaming:
+                woke = self._events.wait_terminal([last[i].id for i in pending], wait)
+            else:
+                time.sleep(wait)
+            still = []
+            for idx in pending:
+                o = self._events.get(last[idx].id) if streaming else None
+                if o is None or o.status.lower() not in TERMINAL_STATUSES:
+                    if woke:
+                        still.append(idx)
+                        continue
+                    try:
+                        o = self.client.get_order(last[idx].id)
+                    except Exception:
+                        still.append(idx)
+                        continue
+                last[idx] = o
+                if o.status.lower() in TERMINAL_STATUSES:
+                    self._log(f"Order status: {o.status} filled_qty={o.filled_qty} avg={o.avg_fill_price}")
+                    self._audit(orders[idx][0], o)
+                    self._events.discard(o.id)
+                else:
+                    still.append(idx)
+            pending = still
+            if not woke:
+                interval = min(cap, interval * 2.0)
+        if pending:
+            self._log("Timed out waiting for fill; returning last known order state")
+            for idx in pending:
+                self._audit(orders[idx][0], last[idx])
+                self._events.discard(last[idx].id)
+        if self.ledger is not None:
+            for (req, _), o in zip(orders, last):
+                self.ledger.on_order(req, o)
         return last
+
+
+class _PlanContext:
+    """Risk context for the legs of one plan.
+
+    Each accepted buy adds its exposure, a position and its stop distance
+    (heat) on top of the base context, so later legs see the earlier ones.
+    """
+
+    def __init__(self, base: Callable[[str], EquityContext]) -> None:
+        self._base = base
+        self._exposure: dict[str, float] = {}
+        self._positions = 0
+        self._heat = 0.0
+
+    def leg(self, symbol: str) -> EquityContext:
+        base = self._base(symbol)
+        return replace(
+            base,
+            symbol_exposure=base.symbol_exposure + self._exposure.get(symbol, 0.0),
+            open_positions=base.open_positions + self._positions,
+            portfolio_heat_pct=base.portfolio_heat_pct + self._heat,
+        )
+
+    def absorb(self, req: OrderRequest, quote: Quote) -> None:
+        if req.side != "buy":
+            return
+        ref = _ref_price(quote)
+        equity = max(self._base(req.symbol).equity, 1e-9)
+        if ref is not None:
+            self._exposure[req.symbol] = self._exposure.get(req.symbol, 0.0) + ref * req.qty / equity
+        if ref is not None and req.stop_price is not None:
+            self._heat += abs(ref - req.stop_price) * req.qty / equity
+        self._positions += 1
+
+
+class _OrderEvents:
+    """Latest streamed state per order id, with waiting on terminal states."""
+
+    def __init__(self, max_orders: int = 10_000) -> None:
+        self.max_orders = max_orders
+        self._latest: OrderedDict[str, OrderResponse] = OrderedDict()
+        self._cond = threading.Condition()
+
+    def record(self, update: OrderResponse) -> None:
+        with self._cond:
+            self._latest[update.id] = update
+            self._latest.move_to_end(update.id)
+            while len(self._latest) > self.max_orders:
+                self._latest.popitem(last=False)
+            self._cond.notify_all()
+
+    def get(self, order_id: str) -> Optional[OrderResponse]:
+        with self._cond:
+            return self._latest.get(order_id)
+
+    def discard(self, order_id: str) -> None:
+        with self._cond:
+            self._latest.pop(order_id, None)
+
+    def wait_terminal(self, order_ids: list[str], timeout: float) -> bool:
+        """Block until one of ``order_ids`` is terminal; False on timeout."""
+
+        def any_terminal() -> bool:
+            for oid in order_ids:
+                o = self._latest.get(oid)
+                if o is not None and o.status.lower() in TERMINAL_STATUSES:
+                    return True
+            return False
+
+        with self._cond:
+            return self._cond.wait_for(any_terminal, timeout)
+
+
+def _ref_price(quote: Quote) -> Optional[float]:
+    if quote.last is not None:
+        return quote.last
+    if quote.bid is not None and quote.ask is not None:
+        return (quote.bid + quote.ask) / 2.0
+    return None
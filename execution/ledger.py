@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from exchange.base import OrderRequest, OrderResponse
+from orchestration.market_calendar import MARKET_TZ
+from risk.manager import EquityContext
+
+
+def _market_today() -> date:
+    return datetime.now(MARKET_TZ).date()
+
+
+@dataclass
+class LedgerPosition:
+    symbol: str
+    qty: float = 0.0
+    avg_price: float = 0.0
+    last_price: float = 0.0
+    stop_price: Optional[float] = None
+
+    @property
+    def market_value(self) -> float:
+        return self.qty * self.last_price
+
+    @property
+    def open_risk(self) -> float:
+        if self.stop_price is None or self.qty <= 0:
+            return 0.0
+        return max(self.last_price - self.stop_price, 0.0) * self.qty
+
+
+class PortfolioLedger:
+    """In-memory book of cash and positions that yields ``EquityContext``.
+
+    Fills, price marks and stop changes each update running totals for
+    market value, open risk (heat) and the day's realized PnL in O(1), so
+    :meth:`context` is instant and never rereads CSVs or asks the broker.
+    Realized PnL resets when the market date changes, with the equity at
+    that moment as the day's starting equity.
+    """
+
+    def __init__(self, cash: float, today: Callable[[], date] = _market_today) -> None:
+        self.cash = float(cash)
+        self.positions: Dict[str, LedgerPosition] = {}
+        self.today = today
+        self._market_value = 0.0
+        self._open_risk = 0.0
+        self._open_positions = 0
+        self._day = today()
+        self._day_realized = 0.0
+        self._day_start_equity = self.cash
+        self._order_fills: Dict[str, tuple[float, float]] = {}
+        self._lock = threading.RLock()
+
+    # -- construction ---------------------------------------------------
+
+    @classmethod
+    def from_portfolio(cls, portfolio: Any, cash: float, prices: Optional[Mapping[str, float]] = None, **kwargs: Any) -> "PortfolioLedger":
+        """Seed from the trading script's holdings (``ticker``, ``shares``, ``buy_price``, ``stop_loss``).
+
+        Holdings without a finite price in ``prices`` are valued at their buy
+        price.
+        """
+        records = portfolio.to_dict("records") if hasattr(portfolio, "to_dict") else list(portfolio)
+        ledger = cls(cash, **kwargs)
+        for row in records:
+            shares = float(row.get("shares") or 0)
+            if shares == 0:
+                continue
+            symbol = str(row["ticker"]).upper()
+            buy = float(row.get("buy_price") or 0.0)
+            stop = row.get("stop_loss")
+            stop = None if stop in (None, "") or stop != stop else float(stop)
+            last = (prices or {}).get(symbol)
+            last = buy if last is None or not math.isfinite(float(last)) else float(last)
+            ledger._set_position(LedgerPosition(symbol, shares, buy, last, stop))
+        ledger._day_start_equity = ledger.equity
+        return ledger
+
+    @classmethod
+    def from_account(cls, client: Any, **kwargs: Any) -> "PortfolioLedger":
+        """Seed from one ``get_account``/``get_positions``/``list_open_orders`` round trip."""
+        acct = client.get_account()
+        ledger = cls(float(acct.get("cash", 0.0)), **kwargs)
+        for p in client.get_positions():
+            qty = float(p["qty"])
+            avg = float(p.get("avg_entry_price") or 0.0)
+            last = p.get("current_price")
+            if last is None and p.get("market_value") is not None and qty:
+                last = float(p["market_value"]) / qty
+            ledger._set_position(LedgerPosition(str(p["symbol"]).upper(), qty, avg, float(last if last is not None else avg)))
+        try:
+            for o in client.list_open_orders():
+                stop = (o.raw or {}).get("stop_price")
+                if o.side == "sell" and stop is not None:
+                    ledger.set_stop(o.symbol, float(stop))
+        except Exception:
+            pass
+        start = acct.get("last_equity")
+        ledger._day_start_equity = float(start) if start is not None else ledger.equity
+        return ledger
+
+    def resync(self, client: Any) -> None:
+        """Take cash and positions from the broker, keeping the day's bookkeeping.
+
+        For periodic reconciliation: fills made elsewhere are picked up in
+        place, while the realized PnL behind the daily-loss limits, the
+        day's starting equity and the per-order fill record (which stops a
+        late update being booked twice) carry on. A position's known stop
+        is kept when the broker has no open stop order for it.
+        """
+        fresh = PortfolioLedger.from_account(client, today=self.today)
+        with self._lock:
+            self._roll()
+            old = self.positions
+            self.cash = fresh.cash
+            self.positions = {}
+            self._market_value = 0.0
+            self._open_risk = 0.0
+            self._open_positions = 0
+            for pos in fresh.positions.values():
+                if pos.stop_price is None and pos.symbol in old:
+                    pos.stop_price = old[pos.symbol].stop_price
+                self._set_position(pos)
+
+    # -- updates --------------------------------------------------------
+
+    def apply_fill(self, symbol: str, side: str, qty: float, price: float, stop_price: Optional[float] = None) -> float:
+        """Book a fill and return the PnL it realized."""
+        if qty <= 0:
+            return 0.0
+        with self._lock:
+            self._roll()
+            symbol = symbol.upper()
+            pos = self.positions.get(symbol) or LedgerPosition(symbol, last_price=price)
+            realized = 0.0
+            signed = qty if side == "buy" else -qty
+            new_qty = pos.qty + signed
+            if pos.qty > 0 and signed < 0:
+                realized = (price - pos.avg_price) * min(qty, pos.qty)
+            elif pos.qty < 0 and signed > 0:
+                realized = (pos.avg_price - price) * min(qty, -pos.qty)
+            if new_qty == 0:
+                avg = 0.0
+            elif pos.qty == 0 or (pos.qty > 0) != (new_qty > 0):
+                avg = price
+            elif abs(new_qty) > abs(pos.qty):
+                avg = (pos.avg_price * abs(pos.qty) + price * qty) / abs(new_qty)
+            else:
+                avg = pos.avg_price
+            stop = stop_price if stop_price is not None else pos.stop_price
+            self.cash -= signed * price
+            self._day_realized += realized
+            self._set_position(LedgerPosition(symbol, new_qty, avg, price, None if new_qty == 0 else stop))
+            return realized
+
+    def on_order(self, req: OrderRequest, resp: OrderResponse) -> float:
+        """Book whatever part of ``resp`` has not been booked yet.
+
+        Order updates may arrive several times (partial fills, polls and
+        stream events); only the newly filled quantity since the last update
+        for that order id is applied.
+        """
+        with self._lock:
+            prev_qty, prev_avg = self._order_fills.get(resp.id, (0.0, 0.0))
+            filled = float(resp.filled_qty or 0.0)
+            if filled <= prev_qty or resp.avg_fill_price is None:
+                return 0.0
+            delta = filled - prev_qty
+            price = (resp.avg_fill_price * filled - prev_avg * prev_qty) / delta
+            self._order_fills[resp.id] = (filled, float(resp.avg_fill_price))
+            stop = req.stop_price if req.side == "buy" and req.order_class == "bracket" else None
+            return self.apply_fill(req.symbol, req.side, delta, price, stop)
+
+    def mark(self, symbol: str, price: Optional[float]) -> None:
+        if price is None or price != price:
+            return
+        with self._lock:
+            pos = self.positions.get(symbol.upper())
+            if pos is not None:
+                self._set_position(LedgerPosition(pos.symbol, pos.qty, pos.avg_price, float(price), pos.stop_price))
+
+    def mark_many(self, prices: Mapping[str, Optional[float]]) -> None:
+        for symbol, price in prices.items():
+            self.mark(symbol, price)
+
+    def set_stop(self, symbol: str, stop_price: Optional[float]) -> None:
+        with self._lock:
+            pos = self.positions.get(symbol.upper())
+            if pos is not None:
+                self._set_position(LedgerPosition(pos.symbol, pos.qty, pos.avg_price, pos.last_price, stop_price))
+
+    # -- queries --------------------------------------------------------
+
+    @property
+    def equity(self) -> float:
+        return self.cash + self._market_value
+
+    def context(self, symbol: Optional[str] = None) -> EquityContext:
+        with self._lock:
+            self._roll()
+            equity = self.equity
+            denom = max(equity, 1e-9)
+            pos = self.positions.get(symbol.upper()) if symbol else None
+            return EquityContext(
+                equity=equity,
+                symbol_exposure=(pos.market_value / denom) if pos is not None else 0.0,
+                day_realized_pnl_pct=self._day_realized / max(self._day_start_equity, 1e-9),
+                open_positions=self._open_positions,
+                portfolio_heat_pct=self._open_risk / denom,
+            )
+
+    def symbols(self) -> Iterable[str]:
+        return list(self.positions)
+
+    # -- internals ------------------------------------------------------
+
+    def _set_position(self, new: LedgerPosition) -> None:
+        old = self.positions.get(new.symbol)
+        if old is not None:
+            self._market_value -= old.market_value
+            self._open_risk -= old.open_risk
+            self._open_positions -= old.qty != 0
+        if new.qty == 0:
+            self.positions.pop(new.symbol, None)
+            return
+        self.positions[new.symbol] = new
+        self._market_value += new.market_value
+        self._open_risk += new.open_risk
+        self._open_positions += 1
+
+    def _roll(self) -> None:
+        today = self.today()
+        if today != self._day:
+            self._day = today
+            self._day_realized = 0.0
+            self._day_start_equity = self.equity
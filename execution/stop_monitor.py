@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping, Optional, Protocol, Sequence
+
+import numpy as np
+import pandas as pd
+
+from exchange.base import OrderResponse, Quote
+from execution.executor import Executor, TradePlanItem
+from observability.tracing import span
+
+
+@dataclass
+class PriceBatch:
+    """Prices for many symbols at one instant.
+
+    ``price`` is what a stop is tested against (a quote's bid, a bar's
+    low); NaN means no price for that symbol this tick. ``fill`` is the
+    price a market sell would likely get (a quote's bid, a bar's open);
+    without it, simulated fills are booked at the stop price.
+    """
+
+    ts: float
+    symbols: tuple[str, ...]
+    price: np.ndarray
+    fill: Optional[np.ndarray] = None
+
+
+@dataclass
+class StopFill:
+    symbol: str
+    shares: float
+    stop: float
+    cost: float
+    trigger_price: float
+    fill_price: float
+    ts: float
+    response: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+    @property
+    def pnl(self) -> float:
+        return round((self.fill_price - self.cost) * self.shares, 2)
+
+
+class PriceSource(Protocol):
+    def next_batch(self) -> Optional[PriceBatch]: ...
+
+
+class StopBook:
+    """Position stops held in flat NumPy arrays, one slot per symbol.
+
+    Slot 0 is a permanently disarmed sentinel that unknown symbols map to,
+    so a batch can be checked with two gathers and a comparison and no
+    masking. The slot lookup for a batch's symbol tuple is cached by
+    identity, so a feed that reuses the same tuple pays for it once.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self._slot: dict[str, int] = {}
+        self._symbols: list[str] = [""]
+        self.stops = np.full(capacity, np.nan)
+        self.shares = np.zeros(capacity)
+        self.cost = np.zeros(capacity)
+        self.armed = np.zeros(capacity, dtype=bool)
+        self.last = np.full(capacity, np.nan)
+        self._cached_key: Optional[tuple[str, ...]] = None
+        self._cached_idx = np.zeros(0, dtype=np.intp)
+        self._active: Optional[tuple[str, ...]] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_portfolio(cls, portfolio: Any) -> "StopBook":
+        """Seed from the trading script's holdings (``ticker``, ``shares``, ``buy_price``, ``stop_loss``)."""
+        records = portfolio.to_dict("records") if hasattr(portfolio, "to_dict") else list(portfolio)
+        book = cls(capacity=max(64, 2 * len(records)))
+        for row in records:
+            stop = row.get("stop_loss")
+            if stop in (None, "") or stop != stop:
+                continue
+            book.set(str(row["ticker"]), float(row.get("shares") or 0), float(stop), float(row.get("buy_price") or 0.0))
+        return book
+
+    def set(self, symbol: str, shares: float, stop: float, cost: float = 0.0) -> None:
+        """Arm (or re-arm) ``symbol``'s stop; zero shares disarms it."""
+        symbol = symbol.upper()
+        with self._lock:
+            i = self._slot.get(symbol)
+            if i is None:
+                i = len(self._symbols)
+                if i >= len(self.stops):
+                    self._grow(2 * len(self.stops))
+                self._symbols.append(symbol)
+                self._slot[symbol] = i
+                self._cached_key = None
+            self.stops[i] = stop
+            self.shares[i] = shares
+            self.cost[i] = cost
+            self.armed[i] = shares > 0
+            self._active = None
+
+    def remove(self, symbol: str) -> None:
+        with self._lock:
+            i = self._slot.get(symbol.upper())
+            if i is not None:
+                self.armed[i] = False
+                self._active = None
+
+    def symbols(self) -> tuple[str, ...]:
+        """Armed symbols; the same tuple object until the book changes."""
+        with self._lock:
+            if self._active is None:
+                self._active = tuple(s for i, s in enumerate(self._symbols) if self.armed[i])
+            return self._active
+
+    def slots(self, symbols: tuple[str, ...]) -> np.ndarray:
+        with self._lock:
+            if symbols is not self._cached_key:
+                get = self._slot.get
+                self._cached_idx = np.fromiter((get(s.upper(), 0) for s in symbols), dtype=np.intp, count=len(symbols))
+                self._cached_key = symbols
+            return self._cached_idx
+
+    def crossed(self, idx: np.ndarray, price: np.ndarray) -> np.ndarray:
+        """Mask of batch positions whose armed stop is at or above ``price`` (NaN never crosses)."""
+        return self.armed[idx] & (price <= self.stops[idx])
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        """Latest price seen for ``symbol`` by :meth:`StopMonitor.process`, if any."""
+        i = self._slot.get(symbol.upper())
+        if i is None or np.isnan(self.last[i]):
+            return None
+        return float(self.last[i])
+
+    def _disarm(self, slots: np.ndarray) -> None:
+        self.armed[slots] = False
+        self._active = None
+
+    def _grow(self, capacity: int) -> None:
+        n = len(self.stops)
+        self.stops = np.concatenate([self.stops, np.full(capacity - n, np.nan)])
+        self.shares = np.concatenate([self.shares, np.zeros(capacity - n)])
+        self.cost = np.concatenate([self.cost, np.zeros(capacity - n)])
+        self.armed = np.concatenate([self.armed, np.zeros(capacity - n, dtype=bool)])
+        self.last = np.concatenate([self.last, np.full(capacity - n, np.nan)])
+
+
+class StopMonitor:
+    """Check every tick's prices against a :class:`StopBook` and sell crossed positions.
+
+    Crossed stops are disarmed in the same step they are detected, so a
+    position is never sold twice. With an ``executor`` (which needs a
+    ledger for risk context) all of a tick's sells go out in one
+    :meth:`Executor.place_batch`; the fill price is the broker's average,
+    and any unfilled remainder is re-armed. A sell that fails outright is
+    reported with ``shares == 0`` and an ``error``, and its stop re-armed.
+    Without one, fills are simulated at the batch's ``fill`` price capped at
+    the stop. Each fill is passed to ``on_fill``.
+    """
+
+    def __init__(
+        self,
+        book: StopBook,
+        executor: Optional[Executor] = None,
+        on_fill: Optional[Callable[[StopFill], Any]] = None,
+        max_concurrency: int = 4,
+    ) -> None:
+        self.book = book
+        self.executor = executor
+        self.on_fill = on_fill
+        self.max_concurrency = max_concurrency
+        self.ticks = 0
+        self.fills: list[StopFill] = []
+
+    def process(self, batch: PriceBatch) -> list[StopFill]:
+        book = self.book
+        with book._lock:
+            self.ticks += 1
+            idx = book.slots(batch.symbols)
+            book.last[idx] = np.where(np.isnan(batch.price), book.last[idx], batch.price)
+            hit = book.crossed(idx, batch.price)
+            if not hit.any():
+                return []
+            slots = idx[hit]
+            stops = book.stops[slots]
+            est = stops if batch.fill is None else np.fmin(stops, batch.fill[hit])
+            triggered = [
+                StopFill(book._symbols[s], float(book.shares[s]), float(stop), float(book.cost[s]), float(p), float(f), batch.ts)
+                for s, stop, p, f in zip(slots, stops, batch.price[hit], est)
+            ]
+            book._disarm(slots)
+        if self.executor is not None:
+            self._sell(triggered)
+        for fill in triggered:
+            self.fills.append(fill)
+            if self.on_fill is not None:
+                self.on_fill(fill)
+        return triggered
+
+    def poll(self, source: PriceSource) -> list[StopFill]:
+        """Process one batch from ``source``; nothing if it has none."""
+        batch = source.next_batch()
+        return [] if batch is None else self.process(batch)
+
+    def run(self, source: PriceSource, stop: Optional[threading.Event] = None, interval: float = 0.0) -> list[StopFill]:
+        """Process batches until ``source`` is exhausted or ``stop`` is set."""
+        fills: list[StopFill] = []
+        while stop is None or not stop.is_set():
+            batch = source.next_batch()
+            if batch is None:
+                break
+            fills.extend(self.process(batch))
+            if interval > 0:
+                (stop.wait if stop is not None else time.sleep)(interval)
+        return fills
+
+    def _sell(self, triggered: list[StopFill]) -> None:
+        assert self.executor is not None
+        items = [TradePlanItem(symbol=f.symbol, side="sell", qty=f.shares, type="market", reduce_only=True) for f in triggered]
+        with span("stop_monitor.sell", orders=len(items)):
+            results = self.executor.place_batch(items, max_concurrency=self.max_concurrency)
+        for fill, r in zip(triggered, results):
+            fill.response = r.response
+            if r.response is None:
+                # Nothing was sold: keep the position armed so the next tick retries.
+                fill.error = r.error
+                self.book.set(fill.symbol, fill.shares, fill.stop, fill.cost)
+                fill.shares = 0.0
+                continue
+            filled = float(r.response.filled_qty or 0)
+            if r.response.avg_fill_price is not None:
+                fill.fill_price = float(r.response.avg_fill_price)
+            if filled < fill.shares:
+                self.book.set(fill.symbol, fill.shares - filled, fill.stop, fill.cost)
+                fill.shares = filled
+                if filled == 0:
+                    fill.error = f"Stop sell not filled (status {r.response.status})"
+
+
+class ReplayFeed:
+    """Replays a T x N price matrix one row (tick) at a time, for tests and backtests.
+
+    Every batch carries the same ``symbols`` tuple, with NaN where a symbol
+    has no price at that tick.
+    """
+
+    def __init__(self, ts: Sequence[float], symbols: Iterable[str], price: Any, fill: Any = None) -> None:
+        self.ts = np.asarray(ts, dtype=float)
+        self.symbols = tuple(s.upper() for s in symbols)
+        self.price = np.asarray(price, dtype=float).reshape(len(self.ts), len(self.symbols))
+        self.fill = None if fill is None else np.asarray(fill, dtype=float).reshape(self.price.shape)
+        self.pos = 0
+
+    @classmethod
+    def from_bars(cls, bars: Mapping[str, pd.DataFrame]) -> "ReplayFeed":
+        """Minute (or any) bars per symbol: stops test the ``Low``, fills use the ``Open``."""
+        frames = {s: f for s, f in bars.items() if not f.empty}
+        symbols = list(frames)
+        if not symbols:
+            return cls([], [], np.zeros((0, 0)))
+        low = pd.concat({s: f["Low"] for s, f in frames.items()}, axis=1).sort_index()
+        opens = pd.concat({s: f["Open"] for s, f in frames.items()}, axis=1).reindex(low.index)
+        idx = pd.DatetimeIndex(low.index)
+        if idx.tz is None:
+            idx = idx.tz_localize("UTC")
+        return cls(idx.asi8 / 1e9, symbols, low[symbols].to_numpy(dtype=float), opens[symbols].to_numpy(dtype=float))
+
+    @classmethod
+    def from_cache(cls, symbols: Sequence[str], interval: str = "1m", period: str = "1d", cache: Any = None) -> "ReplayFeed":
+        """Today's intraday bars for ``symbols`` from the bar cache (one batched fetch)."""
+        if cache is None:
+            from marketdata.cache import default_cache
+
+            cache = default_cache()
+        return cls.from_bars(cache.get_bars_batch(list(symbols), interval, period=period))
+
+    def next_batch(self) -> Optional[PriceBatch]:
+        if self.pos >= len(self.ts):
+            return None
+        i = self.pos
+        self.pos += 1
+        return PriceBatch(float(self.ts[i]), self.symbols, self.price[i], None if self.fill is None else self.fill[i])
+
+    def rewind(self) -> None:
+        self.pos = 0
+
+
+class BarFeed:
+    """Live batches from the latest intraday bar of each ``symbols_fn()`` symbol.
+
+    Each poll is one batched bar-cache request, so bars are re-downloaded
+    at most once per ``MARKET_DATA_INTRADAY_TTL_SECONDS``.
+    """
+
+    def __init__(self, symbols_fn: Callable[[], tuple[str, ...]], interval: str = "1m", cache: Any = None, clock: Callable[[], float] = time.time) -> None:
+        self.symbols_fn = symbols_fn
+        self.interval = interval
+        self.cache = cache
+        self.clock = clock
+
+    def next_batch(self) -> Optional[PriceBatch]:
+        symbols = self.symbols_fn()
+        if not symbols:
+            return PriceBatch(self.clock(), symbols, np.zeros(0))
+        cache = self.cache
+        if cache is None:
+            from marketdata.cache import default_cache
+
+            cache = default_cache()
+        bars = cache.get_bars_batch(list(symbols), self.interval, period="1d")
+        low = np.full(len(symbols), np.nan)
+        opens = np.full(len(symbols), np.nan)
+        for i, s in enumerate(symbols):
+            frame = bars.get(s)
+            if frame is not None and not frame.empty:
+                low[i] = frame["Low"].iloc[-1]
+                opens[i] = frame["Open"].iloc[-1]
+        return PriceBatch(self.clock(), symbols, low, opens)
+
+
+class QuoteFeed:
+    """Live batches from one quote request per poll for ``symbols_fn()`` (e.g. ``StopBook.symbols``).
+
+    Stops test the bid (what a market sell would hit), falling back to the
+    last trade when a quote has no bid.
+    """
+
+    def __init__(self, quotes_fn: Callable[[list[str]], Mapping[str, Quote]], symbols_fn: Callable[[], tuple[str, ...]], clock: Callable[[], float] = time.time) -> None:
+        self.quotes_fn = quotes_fn
+        self.symbols_fn = symbols_fn
+        self.clock = clock
+
+    def next_batch(self) -> Optional[PriceBatch]:
+        symbols = self.symbols_fn()
+        if not symbols:
+            return PriceBatch(self.clock(), symbols, np.zeros(0))
+        with span("stop_monitor.quotes", symbols=len(symbols)):
+            quotes = self.quotes_fn(list(symbols))
+        price = np.array([_sell_price(quotes.get(s)) for s in symbols], dtype=float)
+        return PriceBatch(self.clock(), symbols, price, price)
+
+
+def _sell_price(q: Optional[Quote]) -> float:
+    if q is None:
+        return np.nan
+    if q.bid is not None and q.bid > 0:
+        return float(q.bid)
+    if q.last is not None:
+        return float(q.last)
+    return np.nan
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, Optional
+
+import pandas as pd
+
+from marketdata.cache import BarCache, _as_date, _last_session, default_cache
+
+
+# The experiment started on this date; "$100 invested" curves are anchored here.
+BENCHMARK_START = "2025-06-27"
+SP500 = "^SPX"
+REPORT_BENCHMARKS = ("^RUT", "IWO", "XBI")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS benchmark_bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL NOT NULL,
+    volume REAL,
+    PRIMARY KEY (symbol, date)
+);
+CREATE TABLE IF NOT EXISTS benchmark_baselines (
+    symbol TEXT PRIMARY KEY,
+    start TEXT NOT NULL,
+    base_date TEXT NOT NULL,
+    base_close REAL NOT NULL
+);
+"""
+
+
+class BenchmarkStore:
+    """Locally stored benchmark closes normalised to "$100 invested".
+
+    Each symbol's closes from ``start`` onwards are kept in SQLite. A
+    refresh only asks the bar cache for sessions from the newest stored
+    date on (re-reading that one, which may have been partial), at most
+    once per completed session, so a long-running process picks up each
+    close once the market has shut. The first stored close is pinned as the
+    symbol's baseline, so the normalisation never changes under a
+    re-download. ``baselines`` pins a known value up front (e.g. a published
+    close).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        bars: Optional[BarCache] = None,
+        start: str | date = BENCHMARK_START,
+        baselines: Optional[Mapping[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self._bars = bars
+        self.start = _as_date(start).isoformat()
+        self.clock = clock
+        self._refreshed: dict[str, str] = {}
+        self._lock = threading.RLock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        for sym, close in (baselines or {}).items():
+            self._conn.execute(
+                "INSERT OR IGNORE INTO benchmark_baselines(symbol, start, base_date, base_close) VALUES (?, ?, ?, ?)",
+                (sym.upper(), self.start, self.start, float(close)),
+            )
+        self._conn.commit()
+
+    @property
+    def bars(self) -> BarCache:
+        return self._bars if self._bars is not None else default_cache()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def refresh(self, symbols: Iterable[str]) -> None:
+        """Append any sessions newer than what is stored, in one bar-cache request."""
+        session = _last_session(self.clock()).isoformat()
+        syms = [s for s in dict.fromkeys(s.upper() for s in symbols) if self._refreshed.get(s) != session]
+        if not syms:
+            return
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT symbol, MAX(date) FROM benchmark_bars WHERE symbol IN ({','.join('?' for _ in syms)}) GROUP BY symbol",
+                syms,
+            ).fetchall()
+        last = dict(rows)
+        fetch_from = min((last.get(s) or self.start) for s in syms)
+        frames = self.bars.get_bars_batch(syms, "1d", start=fetch_from)
+        with self._lock:
+            for sym in syms:
+                frame = frames.get(sym)
+                if frame is None or frame.empty:
+                    continue
+                frame = frame[frame.index >= pd.Timestamp(last.get(sym) or self.start)].dropna(subset=["Close"])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO benchmark_bars(symbol, date, close, volume) VALUES (?, ?, ?, ?)",
+                    [
+                        (sym, ts.strftime("%Y-%m-%d"), float(c), None if pd.isna(v) else float(v))
+                        for ts, c, v in zip(frame.index, frame["Close"], frame["Volume"])
+                    ],
+                )
+                if not frame.empty:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO benchmark_baselines(symbol, start, base_date, base_close) VALUES (?, ?, ?, ?)",
+                        (sym, self.start, frame.index[0].strftime("%Y-%m-%d"), float(frame["Close"].iloc[0])),
+                    )
+            self._conn.commit()
+            for sym in syms:
+                self._refreshed[sym] = session
+
+    def baseline(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT base_close FROM benchmark_baselines WHERE symbol = ?", (symbol.upper(),)).fetchone()
+        return None if row is None else float(row[0])
+
+    def series(self, symbol: str, end: str | date | None = None, refresh: bool = True, invested: float = 100.0) -> pd.DataFrame:
+        """Stored ``Close``/``Volume`` plus ``Value`` (``invested`` at the baseline), indexed by ``Date``.
+
+        ``end`` is inclusive.
+        """
+        sym = symbol.upper()
+        if refresh:
+            self.refresh([sym])
+        query = "SELECT date, close, volume FROM benchmark_bars WHERE symbol = ? AND date >= ?"
+        params: list[object] = [sym, self.start]
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(_as_date(end).isoformat())
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY date", params).fetchall()
+        frame = pd.DataFrame(rows, columns=["Date", "Close", "Volume"])
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        frame = frame.set_index("Date").astype(float)
+        base = self.baseline(sym)
+        frame["Value"] = frame["Close"] * (invested / base) if base else float("nan")
+        return frame
+
+    def value_invested(self, symbol: str, end: str | date | None = None, invested: float = 100.0) -> float:
+        """What ``invested`` at the baseline close is worth at the last session up to ``end``."""
+        frame = self.series(symbol, end=end, invested=invested)
+        if frame.empty:
+            raise ValueError(f"No benchmark data stored for {symbol}")
+        return float(frame["Value"].iloc[-1])
+
+
+_DEFAULT_STORE: Optional[BenchmarkStore] = None
+
+
+def default_benchmarks() -> BenchmarkStore:
+    """Return the process-wide benchmark store configured from ``AppConfig``."""
+    global _DEFAULT_STORE
+    if _DEFAULT_STORE is None:
+        from config import load_config
+
+        _DEFAULT_STORE = BenchmarkStore(Path(load_config().benchmark_cache_path))
+    return _DEFAULT_STORE
+
+
+def set_default_benchmarks(store: Optional[BenchmarkStore]) -> None:
+    """Replace the process-wide store (``None`` rebuilds it from config)."""
+    global _DEFAULT_STORE
+    _DEFAULT_STORE = store
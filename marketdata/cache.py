@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from observability.tracing import span
+from orchestration.market_calendar import MarketCalendar
+
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DAILY_INTERVALS = ("1d", "5d", "1wk", "1mo", "3mo")
+MARKET_TZ = "America/New_York"
+
+# fetcher(symbols, interval, start, end) -> {symbol: bars}; ``end`` is exclusive.
+Fetcher = Callable[[list[str], str, str, Optional[str]], dict[str, pd.DataFrame]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+def is_intraday(interval: str) -> bool:
+    return interval not in DAILY_INTERVALS
+
+
+def split_by_symbol(data: pd.DataFrame, symbols: list[str]) -> dict[str, pd.DataFrame]:
+    """Split a ``yf.download`` result into one OHLCV frame per symbol."""
+    out: dict[str, pd.DataFrame] = {}
+    if data is None or data.empty:
+        return out
+    if isinstance(data.columns, pd.MultiIndex):
+        level = 0 if set(data.columns.get_level_values(0)) & set(symbols) else 1
+        for sym in symbols:
+            if sym not in data.columns.get_level_values(level):
+                continue
+            frame = data.xs(sym, axis=1, level=level)
+            frame = frame[[c for c in BAR_COLUMNS if c in frame.columns]].dropna(how="all")
+            if not frame.empty:
+                out[sym] = frame
+    elif len(symbols) == 1:
+        out[symbols[0]] = data[[c for c in BAR_COLUMNS if c in data.columns]].dropna(how="all")
+    return out
+
+
+def yf_fetch(symbols: list[str], interval: str, start: str, end: Optional[str] = None) -> dict[str, pd.DataFrame]:
+    """Download bars for ``symbols`` from yfinance in a single request."""
+    import yfinance as yf
+
+    with span("yfinance.download", symbols=len(symbols), interval=interval):
+        data = yf.download(
+            symbols if len(symbols) > 1 else symbols[0],
+            start=start,
+            end=end,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,
+            progress=False,
+        )
+    return split_by_symbol(data, symbols)
+
+
+class BarCache:
+    """On-disk OHLCV cache keyed by symbol, interval and bar timestamp.
+
+    Bars live in a SQLite database. Each request only downloads the tail of
+    the series after the newest stored bar (re-fetching that bar, which may
+    have been partial), plus any head before the earliest covered date.
+    Intraday series younger than ``intraday_ttl_seconds`` are served without
+    a network call. So are daily series fetched earlier the same calendar
+    day after the latest session close, except that while a session is in
+    progress its still-forming daily bar gets the intraday TTL as well.
+    With ``offline=True`` the network is never touched.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fetcher: Optional[Fetcher] = None,
+        offline: bool = False,
+        intraday_ttl_seconds: float = 60.0,
+        intraday_retention_days: Optional[int] = 7,
+        max_series: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.fetcher = fetcher or yf_fetch
+        self.offline = offline
+        self.intraday_ttl_seconds = intraday_ttl_seconds
+        self.intraday_retention_days = intraday_retention_days
+        self.max_series = max_series
+        self.clock = clock
+        self.network_calls = 0
+        self._lock = threading.RLock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_bars(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start: str | date | None = None,
+        end: str | date | None = None,
+        period: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Return bars for one symbol in the flat ``yf.download`` layout."""
+        sym = symbol.upper()
+        return self.get_bars_batch([sym], interval, start=start, end=end, period=period)[sym]
+
+    def get_bars_batch(
+        self,
+        symbols: Iterable[str],
+        interval: str = "1d",
+        start: str | date | None = None,
+        end: str | date | None = None,
+        period: Optional[str] = None,
+    ) -> dict[str, pd.DataFrame]:
+        """Return bars for many symbols, refreshing stale ones in one request.
+
+        ``start``/``end`` bound the bars by date (``end`` exclusive). Without
+        ``start``, ``period`` selects the most recent sessions (``"2d"`` is the
+        last two sessions; ``"1mo"``/``"1y"`` are calendar windows).
+        """
+        syms = list(dict.fromkeys(s.upper() for s in symbols))
+        start_s = None if start is None else _as_date(start).isoformat()
+        end_s = None if end is None else _as_date(end).isoformat()
+        if not syms:
+            return {}
+        if not self.offline:
+            self._refresh(syms, interval, start_s, end_s, period)
+        with self._lock:
+            frames = self._read(syms, interval, start_s, end_s, period)
+            now = self.clock()
+            self._conn.executemany(
+                "UPDATE coverage SET last_access = ? WHERE symbol = ? AND interval = ?",
+                [(now, s, interval) for s in syms],
+            )
+            self._conn.commit()
+        return frames
+
+    def evict(self) -> int:
+        """Apply the retention rules and return the number of bars removed."""
+        removed = 0
+        with self._lock:
+            if self.intraday_retention_days is not None:
+                cutoff = datetime.fromtimestamp(self.clock(), tz=timezone.utc).replace(tzinfo=None)
+                cutoff -= timedelta(days=self.intraday_retention_days)
+                placeholders = ",".join("?" for _ in DAILY_INTERVALS)
+                cur = self._conn.execute(
+                    f"DELETE FROM bars WHERE interval NOT IN ({placeholders}) AND ts < ?",
+                    (*DAILY_INTERVALS, cutoff.isoformat()),
+                )
+                removed += cur.rowcount
+                self._conn.execute(
+                    f"UPDATE coverage SET start = ? WHERE interval NOT IN ({placeholders}) AND start < ?",
+                    (cutoff.date().isoformat(), *DAILY_INTERVALS, cutoff.date().isoformat()),
+                )
+            if self.max_series is not None:
+                stale = self._conn.execute(
+                    "SELECT symbol, interval FROM coverage ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                    (self.max_series,),
+                ).fetchall()
+                for sym, interval in stale:
+                    cur = self._conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (sym, interval))
+                    removed += cur.rowcount
+                    self._conn.execute("DELETE FROM coverage WHERE symbol = ? AND interval = ?", (sym, interval))
+            self._conn.commit()
+        return removed
+
+    def _refresh(
+        self,
+        syms: list[str],
+        interval: str,
+        start: Optional[str],
+        end: Optional[str],
+        period: Optional[str],
+    ) -> None:
+        now = self.clock()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT c.symbol, c.start, c.fetched_at, MAX(b.ts) FROM coverage c "
+                f"LEFT JOIN bars b ON b.symbol = c.symbol AND b.interval = c.interval "
+                f"WHERE c.interval = ? AND c.symbol IN ({','.join('?' for _ in syms)}) GROUP BY c.symbol",
+                (interval, *syms),
+            ).fetchall()
+        known = {sym: (cov_start, fetched_at, last_ts) for sym, cov_start, fetched_at, last_ts in rows}
+
+        # Group symbols by the window they need so each group is one round trip.
+        want_from = start or _period_start(period or "1d", now)
+        requests: dict[tuple[str, Optional[str]], list[str]] = {}
+        for sym in syms:
+            if sym not in known:
+                requests.setdefault((want_from, end), []).append(sym)
+                continue
+            cov_start, fetched_at, last_ts = known[sym]
+            if want_from < cov_start:
+                requests.setdefault((want_from, cov_start), []).append(sym)
+            if end is not None and last_ts is not None and end <= last_ts[:10]:
+                continue
+            if not self._is_fresh(fetched_at, interval, now):
+                requests.setdefault((last_ts[:10] if last_ts else cov_start, None), []).append(sym)
+
+        # The network round trips run without the lock so concurrent callers overlap.
+        for (req_start, req_end), group in requests.items():
+            fetched = self.fetcher(group, interval, req_start, req_end)
+            with self._lock:
+                self.network_calls += 1
+                for sym in group:
+                    frame = fetched.get(sym)
+                    self._upsert(sym, interval, frame if frame is not None else pd.DataFrame(columns=BAR_COLUMNS))
+                    cov_start = known.get(sym, (None,))[0]
+                    first = req_start if cov_start is None else min(req_start, cov_start)
+                    self._conn.execute(
+                        "INSERT INTO coverage(symbol, interval, start, fetched_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(symbol, interval) DO UPDATE SET start = excluded.start, fetched_at = excluded.fetched_at",
+                        (sym, interval, first, now, now),
+                    )
+                self._conn.commit()
+        if requests:
+            self.evict()
+
+    def _is_fresh(self, fetched_at: float, interval: str, now: float) -> bool:
+        if is_intraday(interval) or _in_session(now):
+            return now - fetched_at < self.intraday_ttl_seconds
+        # Outside a session, a fetch from before the latest close lacks its final bar.
+        return _date_of(fetched_at) == _date_of(now) and fetched_at >= _last_close(now)
+
+    def _upsert(self, symbol: str, interval: str, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        frame = frame.reindex(columns=BAR_COLUMNS)
+        idx = pd.DatetimeIndex(frame.index)
+        if idx.tz is not None:
+            idx = idx.tz_convert("UTC").tz_localize(None)
+        if is_intraday(interval):
+            stamps = idx.strftime("%Y-%m-%dT%H:%M:%S")
+        else:
+            stamps = idx.strftime("%Y-%m-%d")
+        values = frame.astype(float).to_numpy()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO bars(symbol, interval, ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(symbol, interval, ts, *(None if pd.isna(v) else float(v) for v in row)) for ts, row in zip(stamps, values)],
+        )
+
+    def _read(
+        self,
+        syms: list[str],
+        interval: str,
+        start: Optional[str],
+        end: Optional[str],
+        period: Optional[str],
+    ) -> dict[str, pd.DataFrame]:
+        query = (
+            "SELECT symbol, ts, open, high, low, close, volume FROM bars "
+            f"WHERE interval = ? AND symbol IN ({','.join('?' for _ in syms)})"
+        )
+        params: list[object] = [interval, *syms]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND ts < ?"
+            params.append(end)
+        query += " ORDER BY symbol, ts"
+        raw = pd.DataFrame(
+            self._conn.execute(query, params).fetchall(),
+            columns=["symbol", "ts", *BAR_COLUMNS],
+        )
+        intraday = is_intraday(interval)
+        index_name = "Datetime" if intraday else "Date"
+        if intraday:
+            raw["ts"] = pd.to_datetime(raw["ts"], utc=True).dt.tz_convert(MARKET_TZ)
+        else:
+            raw["ts"] = pd.to_datetime(raw["ts"])
+        out: dict[str, pd.DataFrame] = {}
+        groups = dict(tuple(raw.groupby("symbol", sort=False)))
+        for sym in syms:
+            frame = groups.get(sym)
+            if frame is None:
+                frame = raw.iloc[0:0]
+            frame = frame.set_index("ts")[BAR_COLUMNS].rename_axis(index_name)
+            if start is None and period is not None:
+                frame = _apply_period(frame, period, intraday, self.clock())
+            out[sym] = frame
+        return out
+
+
+def _apply_period(frame: pd.DataFrame, period: str, intraday: bool, now: float) -> pd.DataFrame:
+    if frame.empty or period == "max":
+        return frame
+    m = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if m is None:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        sessions = frame.index.date if intraday else frame.index.normalize()
+        keep = pd.Index(sessions).unique()[-n:]
+        return frame[pd.Index(sessions).isin(keep)]
+    days = {"wk": 7, "mo": 31, "y": 366}[unit] * n
+    cutoff = pd.Timestamp(_date_of(now)) - pd.Timedelta(days=days)
+    stamps = frame.index.tz_localize(None) if intraday else frame.index
+    return frame[stamps >= cutoff]
+
+
+def _as_date(value: str | date) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _date_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts).date().isoformat()
+
+
+_CALENDAR = MarketCalendar()
+
+
+def _last_session(ts: float) -> date:
+    """Date of the last regular session that had closed by ``ts``."""
+    return _CALENDAR.last_completed_session(datetime.fromtimestamp(ts, timezone.utc)).date
+
+
+def _last_close(ts: float) -> float:
+    """Timestamp of the last regular session close at or before ``ts``."""
+    return _CALENDAR.last_completed_session(datetime.fromtimestamp(ts, timezone.utc)).close.timestamp()
+
+
+def _in_session(ts: float) -> bool:
+    """Whether a regular session is in progress at ``ts``."""
+    return _CALENDAR.is_open(datetime.fromtimestamp(ts, timezone.utc))
+
+
+def _period_start(period: str, now: float) -> str:
+    """Earliest date a ``period`` request can reach back to."""
+    today = datetime.fromtimestamp(now).date()
+    if period == "max":
+        return "1970-01-01"
+    m = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if m is None:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        # Sessions to calendar days, with slack for weekends and holidays.
+        days = n + 2 * (n // 5) + 4
+    else:
+        days = {"wk": 7, "mo": 31, "y": 366}[unit] * n
+    return (today - timedelta(days=days)).isoformat()
+
+
+_DEFAULT_CACHE: Optional[BarCache] = None
+
+
+def default_cache() -> BarCache:
+    """Return the process-wide cache configured from ``AppConfig``."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        from config import load_config
+
+        cfg = load_config()
+        _DEFAULT_CACHE = BarCache(
+            Path(cfg.market_data_cache_path),
+            offline=cfg.market_data_offline,
+            intraday_ttl_seconds=cfg.market_data_intraday_ttl_seconds,
+            intraday_retention_days=cfg.market_data_intraday_retention_days,
+            max_series=cfg.market_data_max_series,
+        )
+    return _DEFAULT_CACHE
+
+
+def set_default_cache(cache: Optional[BarCache]) -> None:
+    """Replace the process-wide cache (``None`` rebuilds it from config)."""
+    global _DEFAULT_CACHE
+    _DEFAULT_CACHE = cache
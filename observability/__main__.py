@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from .tracing import summarize_files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-call-site latency percentiles from span JSONL files.")
+    parser.add_argument("paths", nargs="+", help="Span files, e.g. .cache/spans.jsonl .cache/spans.jsonl.1")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize_files(Path(p) for p in args.paths)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{'call site':<44} {'count':>7} {'err':>5} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, s in summary.items():
+        print(f"{name:<44} {s['count']:>7} {s['errors']:>5} {s.get('p50_ms', 0):>10.2f} {s.get('p90_ms', 0):>10.2f} {s.get('p99_ms', 0):>10.2f} {s.get('max_ms', 0):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Checked on every span; while None a span costs one global read and returns a shared no-op object.
+_TRACER: Optional["Tracer"] = None
+
+PERCENTILES = (50, 90, 99)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """One timed call site; ``set`` adds attributes before it closes."""
+
+    __slots__ = ("tracer", "name", "attrs", "_start", "_wall")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> "Span":
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        duration = time.perf_counter() - self._start
+        error = None if exc_type is None else f"{exc_type.__name__}: {exc}"
+        self.tracer.record(self.name, self._wall, duration, error, self.attrs)
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Writes finished spans to a rotating JSONL file and keeps per-site latency stats.
+
+    Each line is ``{"ts", "name", "ms", "error", "thread", ...attrs}``. The
+    file rolls over at ``max_bytes`` keeping ``backups`` old files. For
+    every span name the most recent ``window`` durations are kept in memory
+    for :meth:`summary`, which is also written next to the log on
+    :meth:`close` (and at interpreter exit).
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 10_000_000, backups: int = 3, window: int = 2048) -> None:
+        self.path = None if path is None else Path(path)
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._logger: Optional[logging.Logger] = None
+        self._handler: Optional[logging.Handler] = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups)
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(self._handler)
+
+    def record(self, name: str, wall: float, duration: float, error: Optional[str], attrs: Dict[str, Any]) -> None:
+        with self._lock:
+            window = self._durations.get(name)
+            if window is None:
+                window = self._durations[name] = deque(maxlen=self.window)
+            window.append(duration)
+            self._counts[name] = self._counts.get(name, 0) + 1
+            if error is not None:
+                self._errors[name] = self._errors.get(name, 0) + 1
+        if self._logger is not None:
+            record = {"ts": round(wall, 6), "name": name, "ms": round(duration * 1000.0, 3), "error": error, "thread": threading.current_thread().name}
+            record.update(attrs)
+            self._logger.info(json.dumps(record, default=str))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {name: (list(d), self._counts[name], self._errors.get(name, 0)) for name, d in self._durations.items()}
+        return {name: _stats(durations, count, errors) for name, (durations, count, errors) in sorted(snapshot.items())}
+
+    def close(self) -> None:
+        if self.path is not None and self._counts:
+            summary_path = self.path.with_name(self.path.stem + ".summary.json")
+            summary_path.write_text(json.dumps(self.summary(), indent=2))
+        if self._handler is not None and self._logger is not None:
+            self._logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+            self._logger = None
+
+
+def _stats(durations: Iterable[float], count: int, errors: int) -> Dict[str, float]:
+    ordered = sorted(durations)
+    out: Dict[str, float] = {"count": count, "errors": errors}
+    if not ordered:
+        return out
+    for p in PERCENTILES:
+        idx = min(len(ordered) - 1, max(0, round(p / 100.0 * len(ordered) + 0.5) - 1))
+        out[f"p{p}_ms"] = round(ordered[idx] * 1000.0, 3)
+    out["max_ms"] = round(ordered[-1] * 1000.0, 3)
+    out["mean_ms"] = round(sum(ordered) / len(ordered) * 1000.0, 3)
+    return out
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Context manager timing the enclosed block as ``name`` (a no-op while tracing is off)."""
+    tracer = _TRACER
+    if tracer is None:
+        return _NOOP
+    return Span(tracer, name, attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of :func:`span`; defaults to the function's qualified name."""
+
+    def decorate(fn: F) -> F:
+        site = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = _TRACER
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with Span(tracer, site, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def enable(path: Optional[Path] = None, max_bytes: int = 10_000_000, backups: int = 3) -> Tracer:
+    """Start tracing (replacing any active tracer) and return the tracer."""
+    global _TRACER
+    disable()
+    _TRACER = Tracer(path, max_bytes=max_bytes, backups=backups)
+    return _TRACER
+
+
+def disable() -> None:
+    """Stop tracing, flushing the active tracer's summary."""
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    if tracer is not None:
+        tracer.close()
+
+
+def active() -> Optional[Tracer]:
+    return _TRACER
+
+
+def configure(cfg: Any) -> Optional[Tracer]:
+    """Enable tracing from ``AppConfig`` (``trace_enabled``/``trace_path``/...)."""
+    if not getattr(cfg, "trace_enabled", False):
+        return None
+    return enable(Path(cfg.trace_path), max_bytes=cfg.trace_max_bytes, backups=cfg.trace_backups)
+
+
+def summarize_files(paths: Iterable[Path]) -> Dict[str, Dict[str, float]]:
+    """Percentile summary per call site from span JSONL files (e.g. a log and its backups)."""
+    durations: Dict[str, list[float]] = {}
+    errors: Dict[str, int] = {}
+    for path in paths:
+        with Path(path).open() as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                durations.setdefault(rec["name"], []).append(rec["ms"] / 1000.0)
+                if rec.get("error"):
+                    errors[rec["name"]] = errors.get(rec["name"], 0) + 1
+    return {name: _stats(d, len(d), errors.get(name, 0)) for name, d in sorted(durations.items())}
+
+
+atexit.register(disable)
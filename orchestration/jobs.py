@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Deque, Iterable, Literal, Optional
+
+from .market_calendar import MarketCalendar
+from .scheduler import _now_et
+
+log = logging.getLogger(__name__)
+
+Overrun = Literal["skip", "coalesce"]
+LAG_WINDOW = 512
+
+
+@dataclass
+class Job:
+    """A named callable run on a fixed grid of absolute times.
+
+    Slots fall at ``anchor + k * every_seconds``. The anchor is midnight ET
+    when ``align`` is set (so a 15-minute job runs at :00, :15, :30, :45) and
+    the scheduler's start time otherwise (first run immediately). Each run
+    starts a random ``0..jitter_seconds`` after its slot; the next slot is
+    always taken from the grid, never from when the previous run finished.
+
+    ``overrun`` decides what happens when a slot arrives while
+    ``max_concurrency`` runs are still in flight: ``"skip"`` drops the slot,
+    ``"coalesce"`` queues a single catch-up run that starts as soon as one
+    finishes, however many slots were missed. ``cadence_fn``, if given,
+    can stretch the interval after each slot (never below ``every_seconds``).
+    """
+
+    name: str
+    fn: Callable[[], Any]
+    every_seconds: float
+    jitter_seconds: float = 0.0
+    overrun: Overrun = "skip"
+    max_concurrency: int = 1
+    market_hours_only: bool = True
+    align: bool = True
+    cadence_fn: Optional[Callable[[], float]] = None
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    errors: int = 0
+    skipped: int = 0
+    coalesced: int = 0
+    missed: int = 0
+    running: int = 0
+    last_duration_s: Optional[float] = None
+    max_duration_s: float = 0.0
+    last_error: Optional[str] = None
+    lags: Deque[float] = field(default_factory=lambda: deque(maxlen=LAG_WINDOW))
+
+    def to_dict(self) -> dict[str, Any]:
+        out = {k: v for k, v in self.__dict__.items() if k != "lags"}
+        out.update(_lag_summary(self.lags))
+        return out
+
+
+@dataclass
+class _JobState:
+    job: Job
+    anchor: datetime
+    slot: datetime
+    fire_at: datetime
+    stats: JobStats = field(default_factory=JobStats)
+    pending: bool = False
+
+
+def _lag_summary(lags: Iterable[float]) -> dict[str, float]:
+    ordered = sorted(lags)
+    if not ordered:
+        return {}
+    return {
+        "lag_p50_s": ordered[len(ordered) // 2],
+        "lag_p99_s": ordered[min(len(ordered) - 1, math.ceil(0.99 * len(ordered)) - 1)],
+        "lag_max_s": ordered[-1],
+    }
+
+
+class JobScheduler:
+    """Run several :class:`Job` s on their own absolute-time schedules.
+
+    One loop thread sleeps until the earliest due run and hands it to a
+    worker pool sized by the jobs' ``max_concurrency``, so a slow job never
+    delays another job's slots. With a ``calendar``, market-hours jobs are
+    moved to the first grid slot of the next session while the market is
+    closed, and ``is_market_open_fn`` is consulted once per session to
+    confirm the broker agrees. A "closed" answer (e.g. a few hundred ms of
+    clock skew at the open) holds market-hours jobs back and asks again every
+    ``confirm_retry_seconds``; only after ``confirm_attempts`` such answers
+    is that session skipped.
+
+    :meth:`stats` reports per-job runs, errors, skipped/coalesced/missed
+    slots, durations and start-lag percentiles, plus the loop's own wake-up
+    lag.
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        calendar: Optional[MarketCalendar] = None,
+        is_market_open_fn: Optional[Callable[[], bool]] = None,
+        now_fn: Callable[[], datetime] = _now_et,
+        wait_fn: Optional[Callable[[float], Any]] = None,
+        rng: Optional[random.Random] = None,
+        confirm_attempts: int = 10,
+        confirm_retry_seconds: float = 15.0,
+    ) -> None:
+        self.jobs = list(jobs)
+        names = [j.name for j in self.jobs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Job names must be unique: {names}")
+        for j in self.jobs:
+            if j.every_seconds <= 0 or j.max_concurrency < 1:
+                raise ValueError(f"Job {j.name!r} needs every_seconds > 0 and max_concurrency >= 1")
+        self.calendar = calendar
+        self.is_market_open_fn = is_market_open_fn
+        self.now_fn = now_fn
+        self.rng = rng or random.Random()
+        self.confirm_attempts = confirm_attempts
+        self.confirm_retry_seconds = confirm_retry_seconds
+        self._wake = threading.Event()
+        self._wait_fn = wait_fn or self._wake.wait
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._states: dict[str, _JobState] = {}
+        self._loop_lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self._verified: Optional[date] = None
+        self._skipped: Optional[date] = None
+        self._denials: tuple[Optional[date], int] = (None, 0)
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            jobs = {name: st.stats.to_dict() for name, st in self._states.items()}
+            loop = {"wakeups": len(self._loop_lags), **_lag_summary(self._loop_lags)}
+        return {"loop": loop, "jobs": jobs}
+
+    def run(self, max_minutes: Optional[float] = None) -> None:
+        """Run until :meth:`stop` is called or ``max_minutes`` pass; waits for in-flight runs."""
+        start = self.now_fn()
+        deadline = None if max_minutes is None else start + timedelta(minutes=max_minutes)
+        midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._lock:
+            for job in self.jobs:
+                anchor = midnight if job.align else start
+                slot = self._market_slot(job, anchor, self._grid_slot(anchor, job.every_seconds, start))
+                self._states[job.name] = _JobState(job, anchor, slot, self._jittered(job, slot))
+        pool = ThreadPoolExecutor(max_workers=sum(j.max_concurrency for j in self.jobs) or 1, thread_name_prefix="job")
+        try:
+            target = start
+            while not self._stopped:
+                now = self.now_fn()
+                self._loop_lags.append(max(0.0, (now - target).total_seconds()))
+                if deadline is not None and now >= deadline:
+                    return
+                for st in list(self._states.values()):
+                    if st.fire_at <= now:
+                        self._fire(st, now, pool)
+                target = min(st.fire_at for st in self._states.values())
+                if deadline is not None:
+                    target = min(target, deadline)
+                self._wake.clear()
+                self._wait_fn(max(0.0, (target - self.now_fn()).total_seconds()))
+        finally:
+            pool.shutdown(wait=True)
+
+    # -- scheduling -----------------------------------------------------
+
+    @staticmethod
+    def _grid_slot(anchor: datetime, every: float, at: datetime) -> datetime:
+        """First slot ``anchor + k * every`` at or after ``at``."""
+        k = max(0, math.ceil((at - anchor).total_seconds() / every - 1e-9))
+        return anchor + timedelta(seconds=k * every)
+
+    def _market_slot(self, job: Job, anchor: datetime, slot: datetime) -> datetime:
+        """``slot`` if the market is open then, else the first grid slot of the next usable session."""
+        if not job.market_hours_only or self.calendar is None:
+            return slot
+        while True:
+            session = self.calendar.next_session(slot)
+            if session.date == self._skipped:
+                slot = self._grid_slot(anchor, job.every_seconds, session.close)
+                continue
+            if slot >= session.open:
+                return slot
+            slot = self._grid_slot(anchor, job.every_seconds, session.open)
+
+    def _jittered(self, job: Job, slot: datetime) -> datetime:
+        if job.jitter_seconds <= 0:
+            return slot
+        return slot + timedelta(seconds=self.rng.uniform(0.0, job.jitter_seconds))
+
+    def _interval(self, job: Job) -> float:
+        if job.cadence_fn is None:
+            return job.every_seconds
+        try:
+            return max(float(job.cadence_fn()), job.every_seconds)
+        except Exception:
+            return job.every_seconds
+
+    def _advance(self, st: _JobState, now: datetime) -> int:
+        """Move ``st`` to its next slot after ``now``; returns how many slots elapsed unrun."""
+        job = st.job
+        interval = self._interval(job)
+        nxt = st.slot + timedelta(seconds=interval)
+        missed = 0
+        if nxt <= now:
+            missed = int((now - nxt).total_seconds() // interval) + 1
+            nxt += timedelta(seconds=missed * interval)
+        nxt = self._market_slot(job, st.anchor, nxt)
+        st.slot = nxt
+        st.fire_at = self._jittered(job, nxt)
+        return missed
+
+    def _broker_confirms(self, now: datetime) -> bool:
+        if self.calendar is None or self.is_market_open_fn is None:
+            return True
+        today = self.calendar.next_session(now).date
+        if self._verified == today:
+            return True
+        if self.is_market_open_fn():
+            self._verified = today
+            return True
+        denials = self._denials[1] + 1 if self._denials[0] == today else 1
+        self._denials = (today, denials)
+        if denials < self.confirm_attempts:
+            retry = now + timedelta(seconds=self.confirm_retry_seconds)
+            log.info("Broker reports the market closed on %s; asking again at %s", today, retry.strftime("%H:%M:%S"))
+            with self._lock:
+                for other in self._states.values():
+                    if other.job.market_hours_only and other.fire_at < retry:
+                        other.fire_at = retry
+            return False
+        log.warning("Broker reported the market closed %d times on %s; skipping the session", denials, today)
+        self._skipped = today
+        with self._lock:
+            for other in self._states.values():
+                if other.job.market_hours_only:
+                    other.slot = self._market_slot(other.job, other.anchor, other.slot)
+                    other.fire_at = self._jittered(other.job, other.slot)
+        return False
+
+    def _fire(self, st: _JobState, now: datetime, pool: ThreadPoolExecutor) -> None:
+        job = st.job
+        if job.market_hours_only and not self._broker_confirms(now):
+            return
+        lag = max(0.0, (now - st.fire_at).total_seconds())
+        missed = self._advance(st, now)
+        with self._lock:
+            st.stats.missed += missed
+            st.stats.lags.append(lag)
+            if st.stats.running >= job.max_concurrency:
+                if job.overrun == "coalesce":
+                    st.stats.coalesced += 1
+                    st.pending = True
+                else:
+                    st.stats.skipped += 1
+                return
+            st.stats.running += 1
+        pool.submit(self._run, st)
+
+    def _run(self, st: _JobState) -> None:
+        while True:
+            t0 = time.perf_counter()
+            error = None
+            try:
+                st.job.fn()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                log.exception("Job %s failed", st.job.name)
+            duration = time.perf_counter() - t0
+            with self._lock:
+                s = st.stats
+                s.runs += 1
+                s.last_duration_s = duration
+                s.max_duration_s = max(s.max_duration_s, duration)
+                if error is not None:
+                    s.errors += 1
+                    s.last_error = error
+                if not st.pending or self._stopped:
+                    s.running -= 1
+                    return
+                # Every slot that overran while this run was busy collapses into this one rerun.
+                st.pending = False
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+
+MARKET_TZ = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# One-off closures that no rule can predict (national days of mourning etc.).
+SPECIAL_CLOSURES = {
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "National Day of Mourning (George H.W. Bush)",
+    date(2025, 1, 9): "National Day of Mourning (Jimmy Carter)",
+}
+
+
+@dataclass(frozen=True)
+class Session:
+    date: date
+    open: datetime
+    close: datetime
+
+    @property
+    def early_close(self) -> bool:
+        return self.close.time() != REGULAR_CLOSE
+
+
+def _easter(year: int) -> date:
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> dict[date, str]:
+    """Full-day NYSE closures for ``year`` derived from the exchange rules."""
+    out: dict[date, str] = {}
+    new_year = date(year, 1, 1)
+    # A Saturday New Year's Day is not observed on the preceding Friday.
+    if new_year.weekday() != 5:
+        out[_observed(new_year)] = "New Year's Day"
+    out[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    out[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    out[_easter(year) - timedelta(days=2)] = "Good Friday"
+    out[_last_weekday(year, 5, 0)] = "Memorial Day"
+    if year >= 2022:
+        out[_observed(date(year, 6, 19))] = "Juneteenth"
+    out[_observed(date(year, 7, 4))] = "Independence Day"
+    out[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    out[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    out[_observed(date(year, 12, 25))] = "Christmas Day"
+    for d, name in SPECIAL_CLOSURES.items():
+        if d.year == year:
+            out[d] = name
+    return out
+
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year: int) -> frozenset[date]:
+    """Trading days on which the NYSE closes at 13:00 ET."""
+    holidays = nyse_holidays(year)
+    candidates = [
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    ]
+    return frozenset(d for d in candidates if d.weekday() < 5 and d not in holidays)
+
+
+class MarketCalendar:
+    """Offline NYSE session calendar: holidays, early closes and session times.
+
+    All answers are computed locally, so callers can decide whether the
+    market is open, or how long to sleep until it opens, without touching the
+    broker. ``extra_closures`` adds ad-hoc closed dates on top of the rules.
+    """
+
+    def __init__(self, extra_closures: Iterable[date] = ()) -> None:
+        self.extra_closures = frozenset(extra_closures)
+
+    def is_trading_day(self, d: date) -> bool:
+        return d.weekday() < 5 and d not in nyse_holidays(d.year) and d not in self.extra_closures
+
+    def session(self, d: date) -> Optional[Session]:
+        if not self.is_trading_day(d):
+            return None
+        close = EARLY_CLOSE if d in nyse_early_closes(d.year) else REGULAR_CLOSE
+        return Session(
+            date=d,
+            open=datetime.combine(d, REGULAR_OPEN, tzinfo=MARKET_TZ),
+            close=datetime.combine(d, close, tzinfo=MARKET_TZ),
+        )
+
+    def is_open(self, at: Optional[datetime] = None) -> bool:
+        at = self._localize(at)
+        s = self.session(at.date())
+        return s is not None and s.open <= at < s.close
+
+    def next_session(self, at: Optional[datetime] = None) -> Session:
+        """The session in progress at ``at``, or else the next one to open."""
+        at = self._localize(at)
+        d = at.date()
+        while True:
+            s = self.session(d)
+            if s is not None and at < s.close:
+                return s
+            d += timedelta(days=1)
+
+    def next_open(self, at: Optional[datetime] = None) -> datetime:
+        """When the market next opens; ``at`` itself if it is open then."""
+        at = self._localize(at)
+        s = self.next_session(at)
+        return max(s.open, at)
+
+    def seconds_until_open(self, at: Optional[datetime] = None) -> float:
+        at = self._localize(at)
+        return (self.next_open(at) - at).total_seconds()
+
+    def last_session_on_or_before(self, d: date) -> Session:
+        while True:
+            s = self.session(d)
+            if s is not None:
+                return s
+            d -= timedelta(days=1)
+
+    def last_completed_session(self, at: Optional[datetime] = None) -> Session:
+        """The most recent session that had closed by ``at``."""
+        at = self._localize(at)
+        s = self.last_session_on_or_before(at.date())
+        if at < s.close:
+            s = self.last_session_on_or_before(s.date - timedelta(days=1))
+        return s
+
+    @staticmethod
+    def _localize(at: Optional[datetime]) -> datetime:
+        if at is None:
+            return datetime.now(MARKET_TZ)
+        if at.tzinfo is None:
+            return at.replace(tzinfo=MARKET_TZ)
+        return at.astimezone(MARKET_TZ)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+import trading_script as ts
+from analytics.metrics import METRICS_STATE_FILE, MetricsEngine
+from config import AppConfig, load_config
+from marketdata.benchmarks import SP500, default_benchmarks
+from observability.tracing import traced
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class MarketData:
+    """Prices fetched once in the parent and handed to every portfolio worker."""
+
+    bars: pd.DataFrame
+    benchmark: Optional[pd.Series] = None
+
+
+@dataclass
+class PortfolioRun:
+    data_dir: str
+    holdings: int = 0
+    cash: float = 0.0
+    equity: float = 0.0
+    stop_sells: list[str] = field(default_factory=list)
+    metrics: dict[str, Any] = field(default_factory=dict)
+    seconds: float = 0.0
+    error: Optional[str] = None
+    output: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class RunSummary:
+    runs: list[PortfolioRun]
+    tickers: int
+    fetch_seconds: float
+    seconds: float
+
+    def to_dict(self) -> dict[str, Any]:
+        ok = [r for r in self.runs if r.ok]
+        return {
+            "portfolios": len(self.runs),
+            "failed": len(self.runs) - len(ok),
+            "tickers": self.tickers,
+            "cash": round(sum(r.cash for r in ok), 2),
+            "equity": round(sum(r.equity for r in ok), 2),
+            "stop_sells": sum(len(r.stop_sells) for r in ok),
+            "fetch_seconds": round(self.fetch_seconds, 3),
+            "seconds": round(self.seconds, 3),
+            "runs": [{k: v for k, v in asdict(r).items() if k != "output"} for r in self.runs],
+        }
+
+    def table(self) -> str:
+        lines = [f"{'portfolio':<32} {'holdings':>8} {'cash':>12} {'equity':>12} {'sharpe':>8}  stop sells"]
+        for r in self.runs:
+            if not r.ok:
+                lines.append(f"{r.data_dir:<32} FAILED: {r.error}")
+                continue
+            sharpe = r.metrics.get("sharpe", float("nan"))
+            lines.append(
+                f"{r.data_dir:<32} {r.holdings:>8} {r.cash:>12,.2f} {r.equity:>12,.2f} {sharpe:>8.3f}  {', '.join(r.stop_sells) or '-'}"
+            )
+        d = self.to_dict()
+        lines.append(
+            f"{'TOTAL':<32} {'':>8} {d['cash']:>12,.2f} {d['equity']:>12,.2f} {'':>8}  {d['stop_sells']}"
+            f"  ({d['portfolios']} portfolios, {d['failed']} failed, {d['tickers']} tickers fetched in {d['fetch_seconds']:.2f}s, {d['seconds']:.2f}s total)"
+        )
+        return "\n".join(lines)
+
+
+def _held_tickers(data_dir: Path, backend: str) -> list[str]:
+    if not data_dir.is_dir():
+        return []
+    snapshot = ts.PortfolioContext.open(data_dir, backend).storage.latest_snapshot()
+    return [str(h["ticker"]) for h in snapshot.holdings]
+
+
+@traced("portfolios.market_data")
+def shared_market_data(data_dirs: Iterable[Path], backend: str) -> MarketData:
+    """Fetch the latest daily bar for every ticker held in any of ``data_dirs``, plus the S&P 500."""
+    tickers = list(dict.fromkeys(t for d in data_dirs for t in _held_tickers(Path(d), backend)))
+    bars = ts.fetch_daily_bars(tickers)
+    benchmark = None
+    try:
+        store = default_benchmarks()
+        store.refresh([SP500])
+        benchmark = store.series(SP500, refresh=False)["Close"]
+    except Exception:
+        log.warning("S&P 500 closes unavailable; metrics will have no beta", exc_info=True)
+    return MarketData(bars=bars, benchmark=benchmark)
+
+
+def run_portfolio(data_dir: Path | str, cfg: AppConfig, market: MarketData) -> PortfolioRun:
+    """Process one portfolio non-interactively against ``market``; never raises.
+
+    Stop-losses are applied as in :func:`trading_script.process_portfolio`,
+    today's snapshot is saved and the directory's metrics state is brought
+    up to date. Everything the script prints is captured in ``output``.
+    """
+    result = PortfolioRun(str(data_dir))
+    t0 = time.perf_counter()
+    out = io.StringIO()
+    try:
+        if not Path(data_dir).is_dir():
+            raise FileNotFoundError(f"no such portfolio directory: {data_dir}")
+        with contextlib.redirect_stdout(out):
+            ctx = ts.open_context(Path(data_dir), cfg)
+            snapshot = ctx.storage.latest_snapshot()
+            if snapshot.cash is None:
+                raise ValueError("no portfolio history to update")
+            before = [str(h["ticker"]) for h in snapshot.holdings]
+            holdings, cash = ts.process_portfolio(snapshot.holdings, snapshot.cash, interactive=False, bars=market.bars, ctx=ctx)
+            engine = MetricsEngine(ctx.data_dir / METRICS_STATE_FILE)
+            metrics = engine.sync(engine.pending_totals(ctx.storage), benchmark=market.benchmark)
+        after = set(holdings["ticker"].astype(str)) if "ticker" in holdings.columns else set()
+        result.holdings = len(after)
+        result.cash = round(float(cash), 2)
+        result.equity = float(ctx.storage.latest_snapshot().total_equity or cash)
+        result.stop_sells = [t for t in before if t not in after]
+        result.metrics = metrics.to_dict()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.output = out.getvalue()
+    result.seconds = time.perf_counter() - t0
+    return result
+
+
+@traced("portfolios.run")
+def run_portfolios(
+    data_dirs: Iterable[Path | str],
+    cfg: Optional[AppConfig] = None,
+    workers: Optional[int] = None,
+    market: Optional[MarketData] = None,
+) -> RunSummary:
+    """Update every portfolio in ``data_dirs`` from one shared market-data fetch.
+
+    Each directory gets its own :class:`trading_script.PortfolioContext`, so
+    nothing is shared between portfolios but the prices. With more than one
+    worker the portfolios run in a pool of ``workers`` processes (default
+    ``cfg.portfolio_workers``, where 0 means one per CPU). Workers are
+    spawned rather than forked so they never inherit the parent's SQLite
+    connections or trace file. Outside dry-run every worker opens its own
+    broker executor on the configured account.
+    """
+    cfg = cfg or load_config()
+    dirs = [Path(d) for d in data_dirs]
+    t0 = time.perf_counter()
+    if market is None:
+        market = shared_market_data(dirs, cfg.storage_backend)
+    fetched = time.perf_counter() - t0
+    if workers is None:
+        workers = cfg.portfolio_workers or os.cpu_count() or 1
+    workers = min(workers, len(dirs))
+    if workers <= 1:
+        runs = [run_portfolio(d, cfg, market) for d in dirs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            runs = list(pool.map(run_portfolio, dirs, repeat(cfg), repeat(market)))
+    return RunSummary(runs, tickers=len(market.bars.index), fetch_seconds=fetched, seconds=time.perf_counter() - t0)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
 import time
-from typing import Callable
+from datetime import date, datetime
+from typing import Callable, Optional
+
+from .market_calendar import MARKET_TZ, MarketCalendar
+
+
+def _now_et() -> datetime:
+    return datetime.now(MARKET_TZ)
 
 
 def run_market_hours_loop(
@@ -9,15 +16,101 @@ def run_market_hours_loop(
     step_fn: Callable[[], None],
     cadence_seconds: int,
     max_minutes: float | None = None,
+    calendar: Optional[MarketCalendar] = None,
+    sleep_fn: Callable[[float], None] = time.sleep,
+    now_fn: Callable[[], datetime] = _now_et,
+    cadence_fn: Optional[Callable[[], float]] = None,
+    confirm_attempts: int = 10,
+    confirm_retry_seconds: float = 15.0,
+) -> None:
+    """Call ``step_fn`` every ``cadence_seconds`` while the market is open.
+
+    ``cadence_fn``, if given, is asked after each step for the delay before
+    the next one (e.g. a spend governor stretching the interval); it never
+    returns less than ``cadence_seconds`` and falls back to it on error.
+
+    Without a ``calendar`` the loop polls ``is_market_open_fn`` while closed.
+    With one, closed periods are slept through in a single wait until the
+    next session opens (capped by ``max_minutes``), and ``is_market_open_fn``
+    is only consulted once per session to confirm the broker agrees. A
+    "closed" answer is asked again every ``confirm_retry_seconds``, since the
+    broker may flip a moment after the calendar's open; after
+    ``confirm_attempts`` such answers (an unscheduled closure) the rest of
+    that session is skipped.
+    """
+    def delay() -> float:
+        if cadence_fn is None:
+            return cadence_seconds
+        try:
+            return max(float(cadence_fn()), cadence_seconds)
+        except Exception:
+            return cadence_seconds
+
+    if calendar is None:
+        _poll_loop(is_market_open_fn, step_fn, cadence_seconds, max_minutes, delay, sleep_fn, now_fn)
+        return
+
+    start = now_fn()
+    deadline = None if max_minutes is None else max_minutes * 60.0
+    verified: Optional[date] = None
+    skipped: Optional[date] = None
+    denied: tuple[Optional[date], int] = (None, 0)
+
+    def remaining() -> float:
+        if deadline is None:
+            return float("inf")
+        return deadline - (now_fn() - start).total_seconds()
+
+    while True:
+        now = now_fn()
+        session = calendar.next_session(now)
+        if now < session.open or session.date == skipped:
+            wake = session.open if now < session.open else session.close
+            wait = min((wake - now).total_seconds(), remaining())
+            if wait <= 0:
+                return
+            sleep_fn(wait)
+            continue
+        if verified != session.date:
+            if not is_market_open_fn():
+                denied = (session.date, denied[1] + 1 if denied[0] == session.date else 1)
+                if denied[1] >= confirm_attempts:
+                    skipped = session.date
+                    continue
+                wait = min(confirm_retry_seconds, remaining())
+                if wait <= 0:
+                    return
+                sleep_fn(wait)
+                continue
+            verified = session.date
+        step_fn()
+        left = remaining()
+        if left <= 0:
+            return
+        sleep_fn(min(delay(), left))
+
+
+def _poll_loop(
+    is_market_open_fn: Callable[[], bool],
+    step_fn: Callable[[], None],
+    cadence_seconds: int,
+    max_minutes: float | None,
+    delay: Callable[[], float],
+    sleep_fn: Callable[[float], None] = time.sleep,
+    now_fn: Callable[[], datetime] = _now_et,
 ) -> None:
-    start = time.time()
+    start = now_fn()
+
+    def elapsed() -> float:
+        return (now_fn() - start).total_seconds()
+
     while True:
         if not is_market_open_fn():
-            time.sleep(min(30, cadence_seconds))
-            if max_minutes is not None and (time.time() - start) > max_minutes * 60.0:
+            sleep_fn(min(30, cadence_seconds))
+            if max_minutes is not None and elapsed() > max_minutes * 60.0:
                 return
             continue
         step_fn()
-        if max_minutes is not None and (time.time() - start) > max_minutes * 60.0:
+        if max_minutes is not None and elapsed() > max_minutes * 60.0:
             return
-        time.sleep(cadence_seconds)
+        sleep_fn(delay())
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Mapping, Optional, Union
+
+from research.llm_research import TradeIdea, parse_ideas
+
+
+Generator = Callable[[str], Union[str, Iterable[str]]]
+
+
+@dataclass
+class ModelOutcome:
+    status: str  # "ok" | "error" | "timeout"
+    latency_s: Optional[float] = None
+    ideas: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class ScoredIdea:
+    idea: TradeIdea
+    score: float
+    votes: int
+    models: list[str] = field(default_factory=list)
+
+
+@dataclass
+class EnsembleResult:
+    ideas: list[ScoredIdea]
+    outcomes: dict[str, ModelOutcome]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "ideas": [{**s.idea.__dict__, "score": s.score, "votes": s.votes, "models": s.models} for s in self.ideas],
+                "ensemble": {name: o.__dict__ for name, o in self.outcomes.items()},
+            }
+        )
+
+
+class LLMEnsemble:
+    """Send one prompt to several generators at once and merge what returns in time.
+
+    Every generator runs on its own thread. After ``deadline_seconds`` the
+    fan-out stops waiting: streaming generators are closed at their next
+    chunk, and the results of blocking ones are discarded when they finish.
+    Ideas are merged by ``(symbol, side)`` and scored as
+    ``agreement * mean confidence``, where agreement is the share of
+    responding models that proposed it.
+
+    An ensemble is itself a generator: calling it returns the merged ideas
+    as ``{"ideas": [...]}`` JSON, so it plugs into ``LLMResearch`` with
+    caching, budget and logging unchanged. ``last_result`` keeps the
+    structured outcome of the latest call.
+    """
+
+    def __init__(
+        self,
+        generators: Mapping[str, Generator],
+        deadline_seconds: float = 20.0,
+        min_votes: int = 1,
+        max_ideas: Optional[int] = None,
+    ) -> None:
+        if not generators:
+            raise ValueError("LLMEnsemble needs at least one generator")
+        self.generators = dict(generators)
+        self.deadline_seconds = deadline_seconds
+        self.min_votes = min_votes
+        self.max_ideas = max_ideas
+        self.last_result: Optional[EnsembleResult] = None
+
+    def __call__(self, prompt: str) -> str:
+        result = self.run(prompt)
+        if not any(o.status == "ok" for o in result.outcomes.values()):
+            detail = ", ".join(f"{n}: {o.error or o.status}" for n, o in result.outcomes.items())
+            raise RuntimeError(f"No model answered before the deadline ({detail})")
+        return result.to_json()
+
+    def run(self, prompt: str) -> EnsembleResult:
+        cancel = threading.Event()
+        started = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=len(self.generators), thread_name_prefix="llm-fanout")
+        futures = {name: pool.submit(self._call, gen, prompt, cancel, started) for name, gen in self.generators.items()}
+        done, pending = wait(futures.values(), timeout=self.deadline_seconds)
+        cancel.set()
+        for f in pending:
+            f.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        outcomes: dict[str, ModelOutcome] = {}
+        answers: dict[str, list[TradeIdea]] = {}
+        for name, f in futures.items():
+            if f not in done:
+                outcomes[name] = ModelOutcome("timeout")
+                continue
+            try:
+                raw, latency = f.result()
+                ideas = parse_ideas(raw)
+            except Exception as e:
+                outcomes[name] = ModelOutcome("error", error=f"{type(e).__name__}: {e}")
+                continue
+            answers[name] = ideas
+            outcomes[name] = ModelOutcome("ok", latency_s=round(latency, 3), ideas=len(ideas))
+        self.last_result = EnsembleResult(merge_ideas(answers, self.min_votes, self.max_ideas), outcomes)
+        return self.last_result
+
+    @staticmethod
+    def _call(gen: Generator, prompt: str, cancel: threading.Event, started: float) -> tuple[str, float]:
+        if cancel.is_set():
+            raise CancelledError()
+        out = gen(prompt)
+        if not isinstance(out, str):
+            parts: list[str] = []
+            try:
+                for chunk in out:
+                    if cancel.is_set():
+                        raise CancelledError()
+                    parts.append(chunk)
+            finally:
+                close = getattr(out, "close", None)
+                if close is not None:
+                    close()
+            out = "".join(parts)
+        return out, time.perf_counter() - started
+
+
+def merge_ideas(answers: Mapping[str, list[TradeIdea]], min_votes: int = 1, max_ideas: Optional[int] = None) -> list[ScoredIdea]:
+    """Deduplicate ideas by ``(symbol, side)`` across models and rank them.
+
+    Each model votes at most once per key. The merged idea takes its
+    levels from the most confident vote and the mean confidence of all
+    votes; ``score`` is that mean scaled by the share of models agreeing.
+    """
+    responders = max(len(answers), 1)
+    groups: dict[tuple[str, str], list[tuple[str, TradeIdea]]] = {}
+    for name, ideas in answers.items():
+        seen: set[tuple[str, str]] = set()
+        for idea in ideas:
+            key = (idea.symbol, idea.side)
+            if key in seen:
+                continue
+            seen.add(key)
+            groups.setdefault(key, []).append((name, idea))
+    merged: list[ScoredIdea] = []
+    for votes in groups.values():
+        if len(votes) < min_votes:
+            continue
+        confidence = sum(i.confidence for _, i in votes) / len(votes)
+        best = max(votes, key=lambda v: v[1].confidence)[1]
+        idea = TradeIdea(**{**best.__dict__, "confidence": confidence})
+        merged.append(ScoredIdea(idea, round(confidence * len(votes) / responders, 6), len(votes), [n for n, _ in votes]))
+    merged.sort(key=lambda s: (-s.score, -s.votes, s.idea.symbol))
+    return merged if max_ideas is None else merged[:max_ideas]
+
+
+def stub_generator(response: Union[str, list[dict[str, Any]]], delay: float = 0.0, error: Optional[Exception] = None, chunk_size: Optional[int] = None) -> Generator:
+    """Offline generator for tests and dry runs.
+
+    ``response`` is raw text or a list of idea dicts. The call waits
+    ``delay`` seconds (spread across chunks when ``chunk_size`` makes it
+    stream), then raises ``error`` if given.
+    """
+    text = response if isinstance(response, str) else json.dumps({"ideas": response})
+
+    def _gen(prompt: str) -> Union[str, Iterable[str]]:
+        if chunk_size is None:
+            time.sleep(delay)
+            if error is not None:
+                raise error
+            return text
+        return _stream()
+
+    def _stream() -> Iterable[str]:
+        chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield chunk
+        if error is not None:
+            raise error
+
+    return _gen
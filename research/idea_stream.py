@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+
+class IdeaStreamParser:
+    """Incrementally pull complete objects out of a streamed JSON array.
+
+    Chunks of a response like ``{"ideas": [{...}, {...}]}`` are passed to
+    :meth:`feed`, which returns every element object of the ``key`` array
+    that closed within them. Text before the array (code fences, prose) is
+    ignored, and consumed input is dropped so memory stays bounded by the
+    largest single object. Elements that are not valid JSON are skipped.
+    """
+
+    def __init__(self, key: str = "ideas") -> None:
+        self._start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._tail = len(key) + 64
+        self._buf = ""
+        self._pos = 0
+        self._in_array = False
+        self.done = False
+        self._depth = 0
+        self._obj_start = 0
+        self._in_str = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        out: list[dict[str, Any]] = []
+        if self.done or not chunk:
+            return out
+        self._buf += chunk
+        if not self._in_array:
+            m = self._start.search(self._buf)
+            if m is None:
+                # Keep enough of the tail to match a key split across chunks.
+                self._buf = self._buf[-self._tail :]
+                return out
+            self._in_array = True
+            self._pos = m.end()
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            ch = buf[i]
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads(buf[self._obj_start : i + 1])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        out.append(obj)
+            elif ch == "]" and self._depth == 0:
+                self.done = True
+                break
+            i += 1
+        # Drop everything before the object in progress (or all of it between objects).
+        keep = self._obj_start if self._depth > 0 else i
+        self._buf = buf[keep:]
+        self._pos = i - keep
+        self._obj_start = 0
+        return out
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections import deque
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from orchestration.market_calendar import MARKET_TZ
+
+
+# USD per 1M (prompt, completion) tokens.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "o3-mini": (1.10, 4.40),
+    "o4-mini": (1.10, 4.40),
+}
+# Unknown models are priced like the most expensive entry so the cap still holds.
+FALLBACK_PRICE = max(MODEL_PRICES.values())
+DEFAULT_COMPLETION_TOKENS = 800
+
+
+def _market_today() -> date:
+    return datetime.now(MARKET_TZ).date()
+
+
+def model_price(model: str, prices: Mapping[str, Tuple[float, float]] = MODEL_PRICES) -> Tuple[float, float]:
+    """Price for ``model``, matching dated snapshots (``gpt-4o-2024-08-06``) by prefix."""
+    if model in prices:
+        return prices[model]
+    for name in sorted(prices, key=len, reverse=True):
+        if model.startswith(name + "-"):
+            return prices[name]
+    return FALLBACK_PRICE
+
+
+class SpendGovernor:
+    """Daily LLM spend accounting and enforcement of ``llm_max_daily_usd``.
+
+    :meth:`record` books the token usage of one completion at the model's
+    price and persists the day's totals to ``path`` (a JSON map keyed by
+    market date). :meth:`allow_call` refuses a call that the remaining budget
+    cannot cover, and :meth:`cadence` stretches the scheduler interval so
+    the remaining budget lasts until the session close. ``fanout`` is the
+    number of generator calls one research tick makes (e.g. an ensemble).
+    """
+
+    def __init__(
+        self,
+        max_daily_usd: float,
+        path: Optional[Path] = None,
+        prices: Mapping[str, Tuple[float, float]] = MODEL_PRICES,
+        today: Callable[[], date] = _market_today,
+        fanout: int = 1,
+    ) -> None:
+        self.max_daily_usd = max_daily_usd
+        self.fanout = max(int(fanout), 1)
+        self.path = None if path is None else Path(path)
+        self.prices = dict(prices)
+        self.today = today
+        self._recent: Deque[float] = deque(maxlen=20)
+        self._days: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            try:
+                self._days = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._days = {}
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        p_in, p_out = model_price(model, self.prices)
+        return (prompt_tokens * p_in + completion_tokens * p_out) / 1_000_000
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        usd = self.cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            day = self._days.setdefault(self.today().isoformat(), {"usd": 0.0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            day["usd"] += usd
+            day["calls"] += 1
+            day["prompt_tokens"] += prompt_tokens
+            day["completion_tokens"] += completion_tokens
+            self._recent.append(usd)
+            self._save()
+        return usd
+
+    def spent_today(self) -> float:
+        with self._lock:
+            return float(self._days.get(self.today().isoformat(), {}).get("usd", 0.0))
+
+    def remaining_usd(self) -> float:
+        return max(self.max_daily_usd - self.spent_today(), 0.0)
+
+    def estimate_usd(self, model: str, prompt: Optional[str] = None) -> float:
+        """Expected cost of the next tick: recent average per call, else a size estimate."""
+        with self._lock:
+            if self._recent:
+                return self.fanout * sum(self._recent) / len(self._recent)
+        prompt_tokens = 1000 if prompt is None else max(len(prompt) // 4, 1)
+        return self.fanout * self.cost(model, prompt_tokens, DEFAULT_COMPLETION_TOKENS)
+
+    def allow_call(self, model: str, prompt: Optional[str] = None) -> bool:
+        return self.estimate_usd(model, prompt) <= self.remaining_usd()
+
+    def cadence(self, base_seconds: float, seconds_left: float, model: str) -> float:
+        """Seconds until the next call so spend stays within today's cap.
+
+        At ``base_seconds`` the loop would make ``seconds_left / base_seconds``
+        more calls today. If the remaining budget affords fewer, the interval
+        is stretched to spread them over ``seconds_left``; if it affords none,
+        the loop waits out the session.
+        """
+        est = self.estimate_usd(model)
+        if est <= 0 or seconds_left <= 0:
+            return base_seconds
+        affordable = math.floor(self.remaining_usd() / est)
+        if affordable <= 0:
+            return max(base_seconds, seconds_left)
+        return max(base_seconds, seconds_left / affordable)
+
+    def summary(self) -> Dict[str, float]:
+        return {"usd_today": round(self.spent_today(), 6), "remaining_usd": round(self.remaining_usd(), 6)}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._days, indent=2, sort_keys=True))
+        os.replace(tmp, self.path)
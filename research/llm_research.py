@@ -5,11 +5,19 @@ import os
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from execution.executor import TradePlanItem
+from observability.tracing import span, traced
 from risk.manager import RiskConfig
-from strategy.screeners import screen_universe
+from research.idea_stream import IdeaStreamParser
+from research.llm_budget import SpendGovernor
+from research.llm_cache import LLMResponseCache
+from strategy.screeners import screen_universe_detailed
+
+
+# Ideas the prompt asks for; an ensemble's merged answer is cut to the same.
+MAX_IDEAS = 2
 
 
 @dataclass
@@ -25,10 +33,21 @@ class TradeIdea:
 
 
 class LLMResearch:
-    def __init__(self, model: str, generator: Callable[[str], str], log_path: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        model: str,
+        generator: Callable[[str], str],
+        log_path: Optional[Path] = None,
+        cache: Optional[LLMResponseCache] = None,
+        governor: Optional[SpendGovernor] = None,
+        stream_generator: Optional[Callable[[str], Iterable[str]]] = None,
+    ) -> None:
         self.model = model
         self.generator = generator
         self.log_path = log_path
+        self.cache = cache
+        self.governor = governor
+        self.stream_generator = stream_generator
 
     def _log_jsonl(self, obj: dict[str, Any]) -> None:
         if not self.log_path:
@@ -40,7 +59,7 @@ class LLMResearch:
     def build_prompt(self, symbols: list[str], strategy_text: str, cfg: RiskConfig) -> str:
         return (
             "You are an equity trading assistant focused on US micro-cap momentum with strict risk controls.\n"
-            "Given a small candidate universe, output up to 2 high-conviction trade ideas in strict JSON only.\n"
+            f"Given a small candidate universe, output up to {MAX_IDEAS} high-conviction trade ideas in strict JSON only.\n"
             "Respect constraints: avoid illiquid names, prefer tight spreads, use hard stops at entry.\n"
             f"Universe: {', '.join(symbols)}\n"
             "Strategy summary: "
@@ -67,30 +86,7 @@ class LLMResearch:
         )
 
     def parse_ideas(self, content: str) -> list[TradeIdea]:
-        s = content.strip()
-        if s.startswith("```"):
-            s = s.strip("`")
-        if not s.startswith("{"):
-            l = s.find("{")
-            r = s.rfind("}")
-            if l != -1 and r != -1 and r > l:
-                s = s[l : r + 1]
-        data = json.loads(s)
-        out: list[TradeIdea] = []
-        for it in data.get("ideas", []):
-            out.append(
-                TradeIdea(
-                    symbol=str(it["symbol"]).upper(),
-                    side=str(it["side"]).lower(),
-                    entry_type=str(it.get("entry_type", "market")).lower(),
-                    entry=(None if it.get("entry") is None else float(it.get("entry"))),
-                    stop=(None if it.get("stop") is None else float(it.get("stop"))),
-                    take_profit=(None if it.get("take_profit") is None else float(it.get("take_profit"))),
-                    confidence=float(it.get("confidence", 0.0)),
-                    rationale=str(it.get("rationale", "")),
-                )
-            )
-        return out
+        return parse_ideas(content)
 
     def ideas_to_trade_plans(self, ideas: Iterable[TradeIdea]) -> list[TradePlanItem]:
         plans: list[TradePlanItem] = []
@@ -109,40 +105,218 @@ class LLMResearch:
             )
         return plans
 
+    @traced("llm_research.generate_trade_plans")
     def generate_trade_plans(
         self,
         universe: list[str],
         cfg: RiskConfig,
         strategy_text: str,
         max_candidates: int = 15,
+        replay_cached: bool = True,
     ) -> list[TradePlanItem]:
-        filtered = screen_universe(universe, cfg, max_candidates=max_candidates)
+        """Screen ``universe``, ask the model for ideas and turn them into plan items.
+
+        A cached response was already turned into plans when it was first
+        generated; with ``replay_cached=False`` a cache hit is logged but
+        yields no plans, so a caller that places orders does not place the
+        same plan twice.
+        """
+        screen = screen_universe_detailed(universe, cfg, max_candidates=max_candidates)
+        filtered = screen.symbols
         prompt = self.build_prompt(filtered, strategy_text, cfg)
         started = int(time.time())
+        key = None
+        cache_hit = False
+        if self.cache is not None:
+            key = self.cache.key(prompt, self.model)
         try:
-            raw = self.generator(prompt)
+            raw = self.cache.get(key) if self.cache is not None and key is not None else None
+            cache_hit = raw is not None
+            if raw is None:
+                if self.governor is not None and not self.governor.allow_call(self.model, prompt):
+                    self._log_jsonl(
+                        {
+                            "ts": started,
+                            "prompt_universe": filtered,
+                            "screen_timings": screen.timings,
+                            **self._cache_fields(cache_hit),
+                            **self._spend_fields(),
+                            "skipped": "daily LLM budget exhausted",
+                        }
+                    )
+                    return []
+                raw = self.generator(prompt)
             ideas = self.parse_ideas(raw)
+            if self.cache is not None and key is not None and not cache_hit:
+                self.cache.put(key, self.model, raw)
+            skip = cache_hit and not replay_cached
             self._log_jsonl(
                 {
                     "ts": started,
                     "prompt_universe": filtered,
+                    "screen_timings": screen.timings,
+                    **self._cache_fields(cache_hit),
+                    **self._spend_fields(),
                     "raw": raw,
                     "ideas": [idea.__dict__ for idea in ideas],
+                    **({"skipped": "cached plan already placed"} if skip else {}),
                 }
             )
-            return self.ideas_to_trade_plans(ideas)
+            return [] if skip else self.ideas_to_trade_plans(ideas)
         except Exception as e:
             self._log_jsonl(
                 {
                     "ts": started,
                     "prompt_universe": filtered,
+                    "screen_timings": screen.timings,
+                    **self._cache_fields(cache_hit),
+                    **self._spend_fields(),
                     "error": f"{type(e).__name__}: {e}",
                 }
             )
             return []
 
+    def stream_trade_plans(
+        self,
+        universe: list[str],
+        cfg: RiskConfig,
+        strategy_text: str,
+        max_candidates: int = 15,
+        replay_cached: bool = True,
+    ) -> Iterator[TradePlanItem]:
+        """Yield plan items as each idea's JSON object closes in the response stream.
+
+        Cache, budget, ``replay_cached`` and logging behave as in
+        :meth:`generate_trade_plans`; without a ``stream_generator`` this
+        simply yields its result.
+        """
+        if self.stream_generator is None:
+            yield from self.generate_trade_plans(universe, cfg, strategy_text, max_candidates, replay_cached=replay_cached)
+            return
+        screen = screen_universe_detailed(universe, cfg, max_candidates=max_candidates)
+        filtered = screen.symbols
+        prompt = self.build_prompt(filtered, strategy_text, cfg)
+        started = int(time.time())
+        key = None
+        cache_hit = False
+        ideas: list[TradeIdea] = []
+        t0 = time.perf_counter()
+        first_idea_s: Optional[float] = None
+        if self.cache is not None:
+            key = self.cache.key(prompt, self.model)
+        try:
+            raw = self.cache.get(key) if self.cache is not None and key is not None else None
+            cache_hit = raw is not None
+            if raw is not None:
+                ideas = self.parse_ideas(raw)
+                if replay_cached:
+                    yield from self.ideas_to_trade_plans(ideas)
+            else:
+                if self.governor is not None and not self.governor.allow_call(self.model, prompt):
+                    self._log_jsonl(
+                        {
+                            "ts": started,
+                            "prompt_universe": filtered,
+                            "screen_timings": screen.timings,
+                            **self._cache_fields(cache_hit),
+                            **self._spend_fields(),
+                            "skipped": "daily LLM budget exhausted",
+                        }
+                    )
+                    return
+                parser = IdeaStreamParser()
+                parts: list[str] = []
+                for chunk in self.stream_generator(prompt):
+                    parts.append(chunk)
+                    for obj in parser.feed(chunk):
+                        idea = _idea_from_dict(obj)
+                        ideas.append(idea)
+                        if first_idea_s is None:
+                            first_idea_s = round(time.perf_counter() - t0, 3)
+                        yield from self.ideas_to_trade_plans([idea])
+                raw = "".join(parts)
+                if not ideas:
+                    ideas = self.parse_ideas(raw)
+                    yield from self.ideas_to_trade_plans(ideas)
+                    cacheable = True
+                else:
+                    # Ideas already went out; only cache a response that also parses whole.
+                    try:
+                        self.parse_ideas(raw)
+                        cacheable = True
+                    except ValueError:
+                        cacheable = False
+                if cacheable and self.cache is not None and key is not None:
+                    self.cache.put(key, self.model, raw)
+            self._log_jsonl(
+                {
+                    "ts": started,
+                    "prompt_universe": filtered,
+                    "screen_timings": screen.timings,
+                    **self._cache_fields(cache_hit),
+                    **self._spend_fields(),
+                    "stream": {"first_idea_s": first_idea_s, "total_s": round(time.perf_counter() - t0, 3)},
+                    "raw": raw,
+                    "ideas": [idea.__dict__ for idea in ideas],
+                    **({"skipped": "cached plan already placed"} if cache_hit and not replay_cached else {}),
+                }
+            )
+        except Exception as e:
+            self._log_jsonl(
+                {
+                    "ts": started,
+                    "prompt_universe": filtered,
+                    "screen_timings": screen.timings,
+                    **self._cache_fields(cache_hit),
+                    **self._spend_fields(),
+                    "ideas": [idea.__dict__ for idea in ideas],
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            )
+
+    def _cache_fields(self, hit: bool) -> dict[str, Any]:
+        if self.cache is None:
+            return {}
+        return {"cache": {"hit": hit, **self.cache.stats()}}
 
-def openai_generator_factory(model: str) -> Callable[[str], str]:
+    def _spend_fields(self) -> dict[str, Any]:
+        if self.governor is None:
+            return {}
+        return {"spend": self.governor.summary()}
+
+
+def parse_ideas(content: str) -> list[TradeIdea]:
+    s = content.strip()
+    if s.startswith("```"):
+        s = s.strip("`")
+    if not s.startswith("{"):
+        l = s.find("{")
+        r = s.rfind("}")
+        if l != -1 and r != -1 and r > l:
+            s = s[l : r + 1]
+    data = json.loads(s)
+    return [_idea_from_dict(it) for it in data.get("ideas", [])]
+
+
+def _idea_from_dict(it: dict[str, Any]) -> TradeIdea:
+    return TradeIdea(
+        symbol=str(it["symbol"]).upper(),
+        side=str(it["side"]).lower(),
+        entry_type=str(it.get("entry_type", "market")).lower(),
+        entry=(None if it.get("entry") is None else float(it.get("entry"))),
+        stop=(None if it.get("stop") is None else float(it.get("stop"))),
+        take_profit=(None if it.get("take_profit") is None else float(it.get("take_profit"))),
+        confidence=float(it.get("confidence", 0.0)),
+        rationale=str(it.get("rationale", "")),
+    )
+
+
+def openai_generator_factory(
+    model: str,
+    on_usage: Optional[Callable[[str, int, int], Any]] = None,
+    timeout: Optional[float] = None,
+) -> Callable[[str], str]:
+    """Chat-completions generator; ``on_usage(model, prompt_tokens, completion_tokens)`` sees each response's usage."""
     try:
         from openai import OpenAI
         from openai import APIError, RateLimitError
@@ -155,15 +329,20 @@ def openai_generator_factory(model: str) -> Callable[[str], str]:
         last_err = None
         for _ in range(3):
             try:
-                resp = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": "You are a disciplined equities trading assistant."},
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=0.2,
-                    max_tokens=800,
-                )
+                with span("openai.chat.completions", model=model):
+                    resp = client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": "You are a disciplined equities trading assistant."},
+                            {"role": "user", "content": prompt},
+                        ],
+                        temperature=0.2,
+                        max_tokens=800,
+                        **({} if timeout is None else {"timeout": timeout}),
+                    )
+                usage = getattr(resp, "usage", None)
+                if on_usage is not None and usage is not None:
+                    on_usage(model, int(usage.prompt_tokens or 0), int(usage.completion_tokens or 0))
                 content = resp.choices[0].message.content or ""
                 c = content.strip()
                 if c.startswith("```"):
@@ -182,3 +361,68 @@ def openai_generator_factory(model: str) -> Callable[[str], str]:
         raise last_err if last_err else RuntimeError("OpenAI request failed")
 
     return _gen
+
+
+def openai_stream_generator_factory(
+    model: str,
+    on_usage: Optional[Callable[[str, int, int], Any]] = None,
+    timeout: Optional[float] = None,
+) -> Callable[[str], Iterator[str]]:
+    """Streaming variant of :func:`openai_generator_factory` yielding content deltas.
+
+    Only opening the stream is retried; usage arrives on the final chunk.
+    """
+    try:
+        from openai import OpenAI
+        from openai import APIError, RateLimitError
+    except Exception as e:
+        raise RuntimeError("openai library is not installed") from e
+    client = OpenAI()
+
+    def _open(prompt: str) -> Any:
+        delay = 1.0
+        last_err = None
+        for _ in range(3):
+            try:
+                with span("openai.chat.completions.open", model=model):
+                    return client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": "You are a disciplined equities trading assistant."},
+                            {"role": "user", "content": prompt},
+                        ],
+                        temperature=0.2,
+                        max_tokens=800,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        **({} if timeout is None else {"timeout": timeout}),
+                    )
+            except (RateLimitError, APIError) as e:
+                last_err = e
+                time.sleep(delay)
+                delay *= 2.0
+            except Exception as e:
+                last_err = e
+                break
+        raise last_err if last_err else RuntimeError("OpenAI request failed")
+
+    def _gen(prompt: str) -> Iterator[str]:
+        stream = _open(prompt)
+        try:
+            # Open to last chunk, so the span includes time the consumer spends between deltas.
+            with span("openai.chat.completions.stream", model=model):
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None)
+                    if on_usage is not None and usage is not None:
+                        on_usage(model, int(usage.prompt_tokens or 0), int(usage.completion_tokens or 0))
+                    if chunk.choices:
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            yield delta
+        finally:
+            # Closing the generator early (e.g. a cancelled fan-out) drops the HTTP stream.
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    return _gen
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence, Union
 
 from exchange.base import OrderRequest, Quote
 
@@ -97,3 +97,130 @@ class RiskManager:
                 return RiskDecision(False, f"Symbol exposure {next_exposure:.2%} exceeds cap {self.cfg.max_symbol_exposure_pct:.2%}", warn=warn)
  
         return RiskDecision(True, warn=warn)
+
+    def evaluate_exit(self, req: OrderRequest, quote: Quote, market_open: bool) -> RiskDecision:
+        """Checks for a sell that only reduces a held position, such as a stop-loss exit.
+
+        The entry limits (notional cap, daily-loss cap, minimum price, spread)
+        would shrink or block exactly the exits that stop losses mounting,
+        so only market hours and a usable reference price apply.
+        """
+        if not market_open and not self.cfg.allow_after_hours:
+            return RiskDecision(False, "Market is closed")
+        if quote.last is None and (quote.bid is None or quote.ask is None):
+            return RiskDecision(False, "No reference price available")
+        return RiskDecision(True)
+
+    def evaluate_batch(
+        self,
+        reqs: Sequence[OrderRequest],
+        quotes: Sequence[Quote],
+        ctx: Union[EquityContext, Sequence[EquityContext]],
+        market_open: Union[bool, Sequence[bool]],
+    ) -> list[RiskDecision]:
+        """Vectorised :meth:`evaluate` over many orders.
+
+        ``ctx`` and ``market_open`` may be shared or given per order. Every
+        check runs once over NumPy arrays and the first failing check decides
+        each order, so decisions, adjusted quantities and reasons are the
+        same as calling :meth:`evaluate` order by order.
+        """
+        n = len(reqs)
+        if len(quotes) != n:
+            raise ValueError("reqs and quotes must have the same length")
+        if n == 0:
+            return []
+        # Imported here so single-order paths (and CLI startup) do not pay for NumPy.
+        import numpy as np
+
+        ctxs = [ctx] * n if isinstance(ctx, EquityContext) else list(ctx)
+        cfg = self.cfg
+
+        def col(values: list) -> tuple[np.ndarray, np.ndarray]:
+            has = np.array([v is not None for v in values], dtype=bool)
+            return has, np.array([np.nan if v is None else v for v in values], dtype=float)
+
+        is_open = np.broadcast_to(np.asarray(market_open, dtype=bool), (n,))
+        buy = np.array([r.side == "buy" for r in reqs], dtype=bool)
+        qty = np.array([r.qty for r in reqs], dtype=float)
+        has_stop, stop = col([r.stop_price for r in reqs])
+        has_bid, bid = col([q.bid for q in quotes])
+        has_ask, ask = col([q.ask for q in quotes])
+        has_last, last = col([q.last for q in quotes])
+        equity = np.array([c.equity for c in ctxs], dtype=float)
+        exposure = np.array([c.symbol_exposure for c in ctxs], dtype=float)
+        pnl = np.array([c.day_realized_pnl_pct for c in ctxs], dtype=float)
+        positions = np.array([c.open_positions for c in ctxs], dtype=float)
+        heat = np.array([c.portfolio_heat_pct for c in ctxs], dtype=float)
+
+        # Python's max(a, b) keeps ``a`` unless ``b > a``; NaN handling must match.
+        def pymax(a, b):
+            return np.where(b > a, b, a)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            use_last = has_last & (last != 0)
+            has_ref = use_last | (has_bid & has_ask)
+            ref = np.where(use_last, last, (bid + ask) / 2.0)
+            spread_ok_inputs = has_bid & has_ask & (ask > 0)
+            spread = (ask - bid) / ask
+            warn = pnl <= -abs(cfg.daily_loss_tier_warn_pct)
+            eq = pymax(equity, 1e-9)
+            psr = np.abs(ref - stop)
+            risk_applies = has_stop & (psr > 0)
+            max_risk_amount = cfg.max_position_risk_pct * eq
+            max_qty = max_risk_amount / psr
+            est_added_heat = max_risk_amount / eq
+            notional = ref * pymax(qty, 0.0)
+            scaled_qty = pymax(0.0, cfg.max_notional_per_trade / ref)
+            next_exposure = exposure + notional / eq
+
+            checks = [
+                ("closed", np.full(n, not cfg.allow_after_hours) & ~is_open),
+                ("loss_cap", pnl <= -abs(cfg.daily_loss_cap_pct)),
+                ("loss_tier", (pnl <= -abs(cfg.daily_loss_tier_block_pct)) & buy),
+                ("no_ref", ~has_ref),
+                ("min_price", ref < cfg.min_price),
+                ("spread", spread_ok_inputs & (spread > cfg.max_spread_pct)),
+                ("max_positions", buy & (positions >= cfg.max_positions)),
+                ("risk_cap", risk_applies & (qty > max_qty)),
+                ("heat", risk_applies & buy & ((heat + est_added_heat) > cfg.max_portfolio_heat_pct)),
+                ("notional", notional > cfg.max_notional_per_trade),
+                ("exposure", buy & (next_exposure > cfg.max_symbol_exposure_pct)),
+            ]
+
+        code = np.full(n, len(checks), dtype=int)
+        undecided = np.ones(n, dtype=bool)
+        for i, (_, failed) in enumerate(checks):
+            hit = undecided & failed
+            code[hit] = i
+            undecided &= ~hit
+
+        out: list[RiskDecision] = []
+        for i in range(n):
+            name = checks[code[i]][0] if code[i] < len(checks) else "ok"
+            w = bool(warn[i])
+            if name == "ok":
+                out.append(RiskDecision(True, warn=w))
+            elif name == "closed":
+                out.append(RiskDecision(False, "Market is closed"))
+            elif name == "loss_cap":
+                out.append(RiskDecision(False, f"Daily loss cap reached ({float(pnl[i]):.2%})"))
+            elif name == "loss_tier":
+                out.append(RiskDecision(False, f"Daily loss tier 90% reached ({float(pnl[i]):.2%})", block_new_entries=True))
+            elif name == "no_ref":
+                out.append(RiskDecision(False, "No reference price available"))
+            elif name == "min_price":
+                out.append(RiskDecision(False, f"Price {float(ref[i]):.2f} below min {cfg.min_price:.2f}"))
+            elif name == "spread":
+                out.append(RiskDecision(False, f"Spread {float(spread[i]):.2%} exceeds max {cfg.max_spread_pct:.2%}"))
+            elif name == "max_positions":
+                out.append(RiskDecision(False, f"Max positions {cfg.max_positions} reached"))
+            elif name == "risk_cap":
+                out.append(RiskDecision(False, f"Qty exceeds risk cap; max {float(max_qty[i]):.6f}", adjusted_qty=float(max_qty[i]), warn=w))
+            elif name == "heat":
+                out.append(RiskDecision(False, f"Portfolio heat would exceed {cfg.max_portfolio_heat_pct:.2%}", warn=w))
+            elif name == "notional":
+                out.append(RiskDecision(False, f"Notional {float(notional[i]):.2f} exceeds per-trade cap {cfg.max_notional_per_trade:.2f}", adjusted_qty=float(scaled_qty[i]), warn=w))
+            else:
+                out.append(RiskDecision(False, f"Symbol exposure {float(next_exposure[i]):.2%} exceeds cap {cfg.max_symbol_exposure_pct:.2%}", warn=w))
+        return out
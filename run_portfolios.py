@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from config import load_config
+from observability.tracing import configure as configure_tracing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Update several portfolio directories in parallel from one market-data fetch.")
+    parser.add_argument("data_dirs", nargs="+", help="Directories holding chatgpt_portfolio_update.csv (or ledger.sqlite)")
+    parser.add_argument("--mode", default=None, help="dry-run | paper | live")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default PORTFOLIO_WORKERS; 1 runs in-process)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Also print each portfolio's script output")
+    args = parser.parse_args()
+
+    cfg = load_config()
+    configure_tracing(cfg)
+    if args.mode:
+        cfg.mode = args.mode  # type: ignore[assignment]
+
+    from orchestration.portfolios import run_portfolios
+
+    summary = run_portfolios([Path(d) for d in args.data_dirs], cfg, workers=args.workers)
+    if args.verbose:
+        for run in summary.runs:
+            print(f"==> {run.data_dir} <==")
+            print(run.output)
+    if args.json:
+        print(json.dumps(summary.to_dict(), indent=2, default=str))
+    else:
+        print(summary.table())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,26 @@ from __future__ import annotations
 import argparse
 import json
 import os
+from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
 from config import load_config, AppConfig
-from exchange.alpaca_client import AlpacaClient
-from risk.manager import RiskManager, RiskConfig, EquityContext
-from execution.executor import Executor, TradePlanItem
-from trading_script import set_data_dir
-from research.llm_research import LLMResearch, openai_generator_factory
-from orchestration.scheduler import run_market_hours_loop
+from execution.executor import TradePlanItem
+from observability.tracing import configure as configure_tracing
 
+# Everything else (pandas, NumPy, alpaca-py, OpenAI, the research stack) is
+# imported on the code path that needs it, so a dry-run of a plan file
+# starts without loading any of them.
+if TYPE_CHECKING:
+    from execution.executor import Executor
+    from risk.manager import RiskConfig
 
-def build_executor(cfg: AppConfig, data_dir: Path) -> Executor:
-    risk_cfg = RiskConfig(
+
+def build_risk_config(cfg: AppConfig) -> RiskConfig:
+    from risk.manager import RiskConfig
+
+    return RiskConfig(
         max_notional_per_trade=cfg.max_notional_per_trade,
         max_symbol_exposure_pct=cfg.max_symbol_exposure_pct,
         daily_loss_cap_pct=cfg.daily_loss_cap_pct,
@@ -31,13 +37,31 @@ def build_executor(cfg: AppConfig, data_dir: Path) -> Executor:
         require_bracket=cfg.require_bracket,
         default_stop_loss_pct=cfg.default_stop_loss_pct,
     )
-    risk = RiskManager(risk_cfg)
+
+
+def build_executor(cfg: AppConfig, data_dir: Path) -> Executor:
+    from exchange.quote_cache import QuoteCache
+    from execution.executor import Executor
+    from execution.ledger import PortfolioLedger
+    from risk.manager import RiskManager
+    from storage.backend import open_storage
+
+    risk = RiskManager(build_risk_config(cfg))
     if cfg.exchange == "alpaca":
+        from exchange.alpaca_client import AlpacaClient
+
         client = AlpacaClient(base_url=cfg.alpaca_base_url)
+    elif cfg.exchange == "sim":
+        from exchange.simulated import PriceFeed, SimulatedExchange
+        from marketdata.cache import default_cache
+
+        feed = PriceFeed(loader=lambda sym: default_cache().get_bars(sym, "1d", period="5d"))
+        client = SimulatedExchange(feed, cash=cfg.sim_starting_cash, slippage_bps=cfg.sim_slippage_bps)
     else:
         raise ValueError(f"Unsupported exchange: {cfg.exchange}")
-    audit = data_dir / "execution_log.csv"
-    return Executor(client, risk, audit_log_path=audit)
+    quotes = QuoteCache(client, ttl_seconds=cfg.quote_ttl_seconds, stale_seconds=cfg.quote_stale_seconds)
+    ledger = PortfolioLedger.from_account(client)
+    return Executor(client, risk, audit_backend=open_storage(cfg.storage_backend, data_dir), quote_cache=quotes, ledger=ledger)
 
 
 def _load_universe(path: str | None, default_dir: Path) -> List[str]:
@@ -64,11 +88,12 @@ def main() -> None:
     args = parser.parse_args()
 
     cfg = load_config()
+    configure_tracing(cfg)
     if args.mode:
         cfg.mode = args.mode  # type: ignore[assignment]
 
     data_dir = Path(args.data_dir)
-    set_data_dir(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
 
     if cfg.mode == "dry-run":
         print("Running in dry-run mode; no orders will be placed.")
@@ -100,44 +125,111 @@ def main() -> None:
             print("OPENAI_API_KEY not set; cannot run llm plan source.")
             return
         os.environ["OPENAI_API_KEY"] = cfg.openai_api_key
+        from research.ensemble import LLMEnsemble
+        from research.llm_budget import SpendGovernor
+        from research.llm_cache import LLMResponseCache
+        from research.llm_research import MAX_IDEAS, LLMResearch, openai_generator_factory, openai_stream_generator_factory
+        from risk.manager import RiskConfig, RiskManager
+
         universe = _load_universe(cfg.llm_universe_file, data_dir)
-        gen = openai_generator_factory(cfg.llm_model)
-        llm = LLMResearch(cfg.llm_model, gen, log_path=data_dir / "llm_research_log.jsonl")
+        ensemble_models = [m.strip() for m in cfg.llm_ensemble_models.split(",") if m.strip()]
+        governor = SpendGovernor(cfg.llm_max_daily_usd, path=Path(cfg.llm_spend_path), fanout=max(len(ensemble_models), 1))
+        model_name = cfg.llm_model
+        stream_gen = None
+        if ensemble_models:
+            # Stragglers past the deadline are abandoned; the HTTP timeout bounds their threads.
+            model_name = "ensemble:" + ",".join(ensemble_models)
+            gen = LLMEnsemble(
+                {
+                    m: openai_stream_generator_factory(m, on_usage=governor.record, timeout=cfg.llm_ensemble_deadline_seconds)
+                    for m in ensemble_models
+                },
+                deadline_seconds=cfg.llm_ensemble_deadline_seconds,
+                max_ideas=MAX_IDEAS,
+            )
+        else:
+            gen = openai_generator_factory(cfg.llm_model, on_usage=governor.record)
+            if cfg.llm_stream:
+                stream_gen = openai_stream_generator_factory(cfg.llm_model, on_usage=governor.record)
+        cache = None
+        if cfg.llm_cache_ttl_seconds > 0:
+            cache = LLMResponseCache(Path(cfg.llm_cache_path), ttl_seconds=cfg.llm_cache_ttl_seconds, max_entries=cfg.llm_cache_max_entries)
+        llm = LLMResearch(model_name, gen, log_path=data_dir / "llm_research_log.jsonl", cache=cache, governor=governor, stream_generator=stream_gen)
         ex = None if cfg.mode == "dry-run" else build_executor(cfg, data_dir)
-        equity_ctx = EquityContext(equity=100.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
 
         def step_once() -> None:
             nonlocal ex
-            items = llm.generate_trade_plans(universe, ex.risk.cfg if ex else RiskManager(RiskConfig()).cfg, cfg.llm_strategy_text)
+            risk_cfg = ex.risk.cfg if ex else RiskManager(RiskConfig()).cfg
             if cfg.mode == "dry-run":
-                for i in items:
+                for i in llm.stream_trade_plans(universe, risk_cfg, cfg.llm_strategy_text):
                     print(f"[DRY-RUN][LLM] Would place: {i.symbol} {i.side} {i.qty} {i.type} stop={i.stop_price} limit={i.limit_price}")
                 return
             if ex is None:
                 ex = build_executor(cfg, data_dir)
-            for i in items:
-                try:
-                    resp = ex.place_and_reconcile(i, equity_ctx)
-                    print(f"[LLM] Order: {resp.symbol} {resp.side} status={resp.status} filled={resp.filled_qty} avg={resp.avg_fill_price}")
-                except Exception as e:
-                    print(f"[LLM] Failed to place order for {i.symbol}: {e}")
+            # A cached response was placed when it was generated; placing it again would double the position.
+            if stream_gen is not None:
+                # Quote, risk-check and submit each idea while the rest is still generating.
+                plans = llm.stream_trade_plans(universe, risk_cfg, cfg.llm_strategy_text, replay_cached=False)
+                results = ex.place_stream(plans, max_concurrency=cfg.max_concurrent_orders)
+            else:
+                plans = llm.generate_trade_plans(universe, risk_cfg, cfg.llm_strategy_text, replay_cached=False)
+                results = ex.place_batch(plans, max_concurrency=cfg.max_concurrent_orders)
+            for r in results:
+                if r.response is None:
+                    print(f"[LLM] Failed to place order for {r.item.symbol}: {r.error}")
+                    continue
+                resp = r.response
+                print(f"[LLM] Order: {resp.symbol} {resp.side} status={resp.status} filled={resp.filled_qty} avg={resp.avg_fill_price}")
 
         if args.llm_once or args.minutes is None:
             step_once()
             return
+        from exchange.alpaca_client import AlpacaClient
+        from execution.ledger import PortfolioLedger
+        from orchestration.jobs import Job, JobScheduler
+        from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+
         cadence = args.cadence or cfg.llm_cadence_seconds
-        ex_client = None if ex is None else ex.client
+        calendar = MarketCalendar()
+        broker: AlpacaClient | None = None
+
+        def paced_cadence() -> float:
+            # Spread what is left of today's LLM budget over the rest of the session.
+            now = datetime.now(MARKET_TZ)
+            left = (calendar.next_session(now).close - now).total_seconds()
+            return governor.cadence(cadence, left, model_name)
 
         def is_open() -> bool:
-            if ex_client is None and cfg.exchange == "alpaca":
-                tmp = AlpacaClient(base_url=cfg.alpaca_base_url)
-                return tmp.is_market_open()
+            # Only called once per session to cross-check the offline calendar.
+            nonlocal broker
             if ex is not None:
                 return ex.client.is_market_open()
-            tmp2 = AlpacaClient(base_url=cfg.alpaca_base_url)
-            return tmp2.is_market_open()
+            if broker is None:
+                broker = AlpacaClient(base_url=cfg.alpaca_base_url)
+            return broker.is_market_open()
 
-        run_market_hours_loop(is_open, step_once, cadence_seconds=cadence, max_minutes=args.minutes)
+        def reconcile() -> None:
+            # Pick up fills made elsewhere; the day's realized PnL (loss caps) and booked order fills carry on.
+            assert ex is not None
+            if ex.ledger is None:
+                ex.ledger = PortfolioLedger.from_account(ex.client)
+            else:
+                ex.ledger.resync(ex.client)
+
+        jobs = [Job("research", step_once, every_seconds=cadence, align=False, cadence_fn=paced_cadence)]
+        if ex is not None:
+            import trading_script
+
+            # Intraday stop-losses on the tracked holdings, sold through the same executor.
+            portfolio = trading_script.PortfolioContext.open(data_dir, cfg.storage_backend, executor=ex, cfg=cfg)
+            monitor, feed = trading_script.stop_monitor(ctx=portfolio)
+            jobs.append(Job("stops", lambda: monitor.poll(feed), every_seconds=cfg.stop_monitor_seconds))
+            jobs.append(Job("reconcile", reconcile, every_seconds=cfg.reconcile_seconds, jitter_seconds=5))
+        scheduler = JobScheduler(jobs, calendar=calendar, is_market_open_fn=is_open)
+        try:
+            scheduler.run(max_minutes=args.minutes)
+        finally:
+            print(json.dumps(scheduler.stats(), indent=2, default=str))
         return
     else:
         print(f"Unknown plan-source: {args.plan_source}")
@@ -155,14 +247,13 @@ def main() -> None:
         return
 
     ex = build_executor(cfg, data_dir)
-    equity_ctx = EquityContext(equity=100.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
 
-    for i in plan_items:
-        try:
-            resp = ex.place_and_reconcile(i, equity_ctx)
-            print(f"Order: {resp.symbol} {resp.side} status={resp.status} filled={resp.filled_qty} avg={resp.avg_fill_price}")
-        except Exception as e:
-            print(f"Failed to place order for {i.symbol}: {e}")
+    for r in ex.place_batch(plan_items, max_concurrency=cfg.max_concurrent_orders):
+        if r.response is None:
+            print(f"Failed to place order for {r.item.symbol}: {r.error}")
+            continue
+        resp = r.response
+        print(f"Order: {resp.symbol} {resp.side} status={resp.status} filled={resp.filled_qty} avg={resp.avg_fill_price}")
 
 if __name__ == "__main__":
     main()
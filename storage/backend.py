@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Optional, Protocol
+
+import pandas as pd
+
+from exchange.base import AUDIT_COLUMNS
+from observability.tracing import span
+from storage.trade_log import TRADE_LOG_COLUMNS, TradeLogWriter
+
+
+PORTFOLIO_COLUMNS = [
+    "Date",
+    "Ticker",
+    "Shares",
+    "Buy Price",
+    "Cost Basis",
+    "Stop Loss",
+    "Current Price",
+    "Total Value",
+    "PnL",
+    "Action",
+    "Cash Balance",
+    "Total Equity",
+]
+
+PORTFOLIO_FILE = "chatgpt_portfolio_update.csv"
+TRADE_LOG_FILE = "chatgpt_trade_log.csv"
+EXECUTION_LOG_FILE = "execution_log.csv"
+LEDGER_FILE = "ledger.sqlite"
+
+# Bytes read per step when scanning the portfolio CSV backwards.
+_TAIL_CHUNK = 64 * 1024
+
+_HOLDING_FIELDS = {
+    "Ticker": "ticker",
+    "Shares": "shares",
+    "Buy Price": "buy_price",
+    "Cost Basis": "cost_basis",
+    "Stop Loss": "stop_loss",
+}
+
+
+@dataclass
+class PortfolioSnapshot:
+    date: Optional[str]
+    holdings: list[dict[str, Any]] = field(default_factory=list)
+    cash: Optional[float] = None
+    total_equity: Optional[float] = None
+
+
+class StorageBackend(Protocol):
+    def save_portfolio_snapshot(self, date: str, rows: pd.DataFrame) -> None: ...
+    def portfolio_history(self) -> pd.DataFrame: ...
+    def latest_snapshot(self) -> PortfolioSnapshot: ...
+    def total_equity_series(self, since: Optional[str] = None) -> pd.DataFrame: ...
+    def append_trade(self, row: Mapping[str, Any]) -> None: ...
+    def batch(self) -> Any: ...
+    def trades(self, ticker: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame: ...
+    def append_execution(self, row: Mapping[str, Any]) -> None: ...
+
+
+def snapshot_from_history(df: pd.DataFrame) -> PortfolioSnapshot:
+    """Extract the latest holdings and cash from a ``PORTFOLIO_CSV`` frame."""
+    if df.empty:
+        return PortfolioSnapshot(date=None)
+    non_total = df[df["Ticker"] != "TOTAL"].copy()
+    non_total["Date"] = pd.to_datetime(non_total["Date"])
+    latest_date = non_total["Date"].max()
+    latest = non_total[non_total["Date"] == latest_date]
+    holdings = latest[[c for c in _HOLDING_FIELDS if c in latest.columns]].rename(columns=_HOLDING_FIELDS)
+    totals = df[df["Ticker"] == "TOTAL"].copy()
+    totals["Date"] = pd.to_datetime(totals["Date"])
+    last_total = totals.sort_values("Date").iloc[-1]
+    return PortfolioSnapshot(
+        date=None if pd.isna(latest_date) else latest_date.strftime("%Y-%m-%d"),
+        holdings=holdings.reset_index(drop=True).to_dict(orient="records"),
+        cash=float(last_total["Cash Balance"]),
+        total_equity=float(last_total["Total Equity"]),
+    )
+
+
+def _totals_frame(totals: pd.DataFrame) -> pd.DataFrame:
+    out = totals[["Date", "Total Equity", "Cash Balance"]].copy()
+    out["Date"] = pd.to_datetime(out["Date"])
+    out["Total Equity"] = out["Total Equity"].astype(float)
+    out["Cash Balance"] = pd.to_numeric(out["Cash Balance"], errors="coerce")
+    return out.sort_values("Date", kind="stable").reset_index(drop=True)
+
+
+def _filter_trades(df: pd.DataFrame, ticker: Optional[str], start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+    if ticker is not None:
+        df = df[df["Ticker"] == ticker]
+    if start is not None:
+        df = df[df["Date"] >= start]
+    if end is not None:
+        df = df[df["Date"] <= end]
+    return df.reset_index(drop=True)
+
+
+class CsvStorage:
+    """The original CSV layout: one file per record type in ``data_dir``."""
+
+    def __init__(self, data_dir: Path) -> None:
+        self.data_dir = Path(data_dir)
+        self.portfolio_csv = self.data_dir / PORTFOLIO_FILE
+        self.trade_log_csv = self.data_dir / TRADE_LOG_FILE
+        self.execution_log_csv = self.data_dir / EXECUTION_LOG_FILE
+        self._trade_log = TradeLogWriter(self.trade_log_csv)
+
+    def save_portfolio_snapshot(self, date: str, rows: pd.DataFrame) -> None:
+        """Replace ``date``'s rows, keeping the file in date order for tail reads."""
+        df = rows
+        if self.portfolio_csv.exists():
+            with span("csv.portfolio.read", path=str(self.portfolio_csv)):
+                existing = pd.read_csv(self.portfolio_csv)
+            existing = existing[existing["Date"] != date]
+            print("Saving results to CSV...")
+            df = pd.concat([existing, rows], ignore_index=True)
+            if not existing.empty and pd.Timestamp(date) < pd.to_datetime(existing["Date"]).max():
+                df = df.sort_values("Date", key=pd.to_datetime, kind="stable")
+        with span("csv.portfolio.write", path=str(self.portfolio_csv), rows=len(df)):
+            df.to_csv(self.portfolio_csv, index=False)
+
+    def portfolio_history(self) -> pd.DataFrame:
+        if not self.portfolio_csv.exists():
+            return pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+        with span("csv.portfolio.read", path=str(self.portfolio_csv)):
+            return pd.read_csv(self.portfolio_csv)
+
+    def latest_snapshot(self) -> PortfolioSnapshot:
+        return snapshot_from_history(self.portfolio_history())
+
+    def total_equity_series(self, since: Optional[str] = None) -> pd.DataFrame:
+        """TOTAL rows, oldest first; with ``since`` only the file's tail is read."""
+        df = self.portfolio_history() if since is None or not self.portfolio_csv.exists() else self._history_since(since)
+        totals = df[df["Ticker"] == "TOTAL"]
+        if since is not None:
+            totals = totals[pd.to_datetime(totals["Date"]) >= pd.Timestamp(since)]
+        return _totals_frame(totals)
+
+    def _history_since(self, since: str) -> pd.DataFrame:
+        """Rows from the end of the file back to the first one dated before ``since``.
+
+        Relies on the file being in date order, which
+        ``save_portfolio_snapshot`` maintains; the result may start with a few
+        earlier rows.
+        """
+        cutoff = pd.Timestamp(since)
+        with span("csv.portfolio.read_tail", path=str(self.portfolio_csv)), self.portfolio_csv.open("rb") as f:
+            header = f.readline()
+            body_start = f.tell()
+            pos = f.seek(0, os.SEEK_END)
+            tail = b""
+            while pos > body_start:
+                step = min(_TAIL_CHUNK, pos - body_start)
+                pos -= step
+                f.seek(pos)
+                tail = f.read(step) + tail
+                # Everything before the first newline may be a partial line.
+                nl = tail.find(b"\n")
+                if pos > body_start and nl < 0:
+                    continue
+                first = tail if pos == body_start else tail[nl + 1 :]
+                day = first.split(b",", 1)[0].strip()
+                if day and pd.Timestamp(day.decode()) < cutoff:
+                    tail = first
+                    break
+        return pd.read_csv(io.BytesIO(header + tail))
+
+    def append_trade(self, row: Mapping[str, Any]) -> None:
+        self._trade_log.append(row)
+
+    def batch(self) -> Any:
+        return self._trade_log.batch()
+
+    def trades(self, ticker: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        if not self.trade_log_csv.exists():
+            return pd.DataFrame(columns=TRADE_LOG_COLUMNS)
+        with span("csv.trade_log.read", path=str(self.trade_log_csv)):
+            df = pd.read_csv(self.trade_log_csv)
+        return _filter_trades(df, ticker, start, end)
+
+    def append_execution(self, row: Mapping[str, Any]) -> None:
+        self.execution_log_csv.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not self.execution_log_csv.exists()
+        with span("csv.execution_log.append", path=str(self.execution_log_csv)), self.execution_log_csv.open("a", newline="") as f:
+            w = csv.writer(f)
+            if write_header:
+                w.writerow(AUDIT_COLUMNS)
+            w.writerow([row.get(c, "") for c in AUDIT_COLUMNS])
+
+
+def _sql_name(column: str) -> str:
+    return column.lower().replace(" ", "_")
+
+
+def _sql_value(value: Any) -> Any:
+    if value is None or (isinstance(value, str) and value == ""):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _parse_cell(text: str) -> Any:
+    """Turn a CSV cell back into the int, float or text it was written from."""
+    if text == "":
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+_TABLES = {
+    "portfolio": PORTFOLIO_COLUMNS,
+    "trades": TRADE_LOG_COLUMNS,
+    "executions": AUDIT_COLUMNS,
+}
+
+_SQLITE_SCHEMA = "\n".join(
+    f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    + ", ".join(_sql_name(c) for c in cols)
+    + ");"
+    for table, cols in _TABLES.items()
+) + """
+CREATE INDEX IF NOT EXISTS portfolio_date ON portfolio(date);
+CREATE INDEX IF NOT EXISTS portfolio_ticker_date ON portfolio(ticker, date);
+CREATE INDEX IF NOT EXISTS trades_ticker_date ON trades(ticker, date);
+CREATE INDEX IF NOT EXISTS trades_date ON trades(date);
+CREATE INDEX IF NOT EXISTS executions_symbol_ts ON executions(symbol, timestamp);
+"""
+
+
+class SqliteStorage:
+    """Portfolio history, trade log and execution audit in one SQLite file.
+
+    The database runs in WAL mode with indexes on date and ticker, so the
+    latest snapshot and the TOTAL equity series are index lookups rather than
+    full scans. Column names mirror the CSV layout, and :meth:`import_csv` /
+    :meth:`export_csv` convert to and from it. Columns carry no type affinity,
+    so ints, floats and text round-trip as written; blanks are stored as NULL.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SQLITE_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, table: str, rows: list[Mapping[str, Any]]) -> None:
+        cols = _TABLES[table]
+        sql = f"INSERT INTO {table} ({', '.join(_sql_name(c) for c in cols)}) VALUES ({', '.join('?' for _ in cols)})"
+        self._conn.executemany(sql, [[_sql_value(r.get(c)) for c in cols] for r in rows])
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self._conn.commit()
+
+    def _query(self, table: str, where: str = "", params: tuple[Any, ...] = (), order: str = "id") -> pd.DataFrame:
+        cols = _TABLES[table]
+        sql = f"SELECT {', '.join(_sql_name(c) for c in cols)} FROM {table} {where} ORDER BY {order}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=cols)
+
+    @contextmanager
+    def batch(self) -> Iterator["SqliteStorage"]:
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.commit()
+
+    def save_portfolio_snapshot(self, date: str, rows: pd.DataFrame) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM portfolio WHERE date = ?", (date,))
+            self._insert("portfolio", rows.to_dict(orient="records"))
+            self._commit()
+
+    def portfolio_history(self) -> pd.DataFrame:
+        return self._query("portfolio")
+
+    def latest_snapshot(self) -> PortfolioSnapshot:
+        with self._lock:
+            latest = self._conn.execute(
+                "SELECT date FROM portfolio WHERE ticker <> 'TOTAL' ORDER BY date DESC LIMIT 1"
+            ).fetchone()
+            total = self._conn.execute(
+                "SELECT cash_balance, total_equity FROM portfolio WHERE ticker = 'TOTAL' ORDER BY date DESC, id DESC LIMIT 1"
+            ).fetchone()
+        if total is None:
+            return PortfolioSnapshot(date=None)
+        holdings: list[dict[str, Any]] = []
+        if latest is not None:
+            frame = self._query("portfolio", "WHERE date = ? AND ticker <> 'TOTAL'", (latest[0],))
+            holdings = frame[list(_HOLDING_FIELDS)].rename(columns=_HOLDING_FIELDS).to_dict(orient="records")
+        return PortfolioSnapshot(
+            date=None if latest is None else str(latest[0]),
+            holdings=holdings,
+            cash=float(total[0]),
+            total_equity=float(total[1]),
+        )
+
+    def total_equity_series(self, since: Optional[str] = None) -> pd.DataFrame:
+        if since is None:
+            return _totals_frame(self._query("portfolio", "WHERE ticker = 'TOTAL'", order="date, id"))
+        return _totals_frame(self._query("portfolio", "WHERE ticker = 'TOTAL' AND date >= ?", (since,), order="date, id"))
+
+    def append_trade(self, row: Mapping[str, Any]) -> None:
+        with self._lock:
+            self._insert("trades", [row])
+            self._commit()
+
+    def trades(self, ticker: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        clauses, params = [], []
+        if ticker is not None:
+            clauses.append("ticker = ?")
+            params.append(ticker)
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(end)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        return self._query("trades", where, tuple(params))
+
+    def append_execution(self, row: Mapping[str, Any]) -> None:
+        with self._lock:
+            self._insert("executions", [row])
+            self._commit()
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return all(
+                self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None for table in _TABLES
+            )
+
+    def import_csv(self, data_dir: Path) -> None:
+        """Load the three CSV files from ``data_dir``, replacing current rows."""
+        data_dir = Path(data_dir)
+        files = {"portfolio": PORTFOLIO_FILE, "trades": TRADE_LOG_FILE, "executions": EXECUTION_LOG_FILE}
+        with self.batch():
+            for table, name in files.items():
+                path = data_dir / name
+                if not path.exists():
+                    continue
+                with path.open(newline="") as f:
+                    rows = [{k: _parse_cell(v or "") for k, v in r.items()} for r in csv.DictReader(f)]
+                self._conn.execute(f"DELETE FROM {table}")
+                self._insert(table, rows)
+
+    def export_csv(self, data_dir: Path) -> None:
+        """Write the three CSV files to ``data_dir`` in the original layout."""
+        data_dir = Path(data_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        files = {"portfolio": PORTFOLIO_FILE, "trades": TRADE_LOG_FILE, "executions": EXECUTION_LOG_FILE}
+        for table, name in files.items():
+            cols = _TABLES[table]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(_sql_name(c) for c in cols)} FROM {table} ORDER BY id"
+                ).fetchall()
+            if table == "executions" and not rows:
+                continue
+            with (data_dir / name).open("w", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(cols)
+                w.writerows([["" if v is None else v for v in row] for row in rows])
+
+
+def open_storage(kind: str, data_dir: Path) -> StorageBackend:
+    """Build the storage backend named by ``kind`` (``csv`` or ``sqlite``).
+
+    A fresh SQLite ledger is seeded from any CSV files already in ``data_dir``.
+    """
+    data_dir = Path(data_dir)
+    if kind == "csv":
+        return CsvStorage(data_dir)
+    if kind == "sqlite":
+        store = SqliteStorage(data_dir / LEDGER_FILE)
+        if store.is_empty():
+            store.import_csv(data_dir)
+        return store
+    raise ValueError(f"Unsupported storage backend: {kind}")
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import csv
+import io
+import math
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Sequence
+
+from observability.tracing import span
+
+
+TRADE_LOG_COLUMNS = [
+    "Date",
+    "Ticker",
+    "Shares Bought",
+    "Buy Price",
+    "Cost Basis",
+    "PnL",
+    "Reason",
+    "Shares Sold",
+    "Sell Price",
+]
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    return value
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", newline="") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class TradeLogWriter:
+    """Append-only writer for ``chatgpt_trade_log.csv``.
+
+    Rows are aligned to the header already on disk, so buy rows and sell rows
+    share one column set. Appends never rewrite the file; the only rewrite is
+    a one-off atomic header migration when a row carries a column the file
+    does not have yet. Before the next write, a last line without a newline
+    is dropped if it does not parse to the header's field count (torn by a
+    crash mid-append) and otherwise terminated. Inside :meth:`batch`, rows
+    are buffered and written with a single ``write`` on exit.
+    """
+
+    def __init__(self, path: Path, columns: Sequence[str] = TRADE_LOG_COLUMNS, fsync: bool = True) -> None:
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.fsync = fsync
+        self._pending: list[Mapping[str, Any]] = []
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        with self._lock:
+            self._pending.append(dict(row))
+            if self._batch_depth == 0:
+                self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator["TradeLogWriter"]:
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            with span("csv.trade_log.append", path=str(self.path), rows=len(rows)):
+                header = self._prepare(rows)
+                buf = io.StringIO()
+                w = csv.writer(buf)
+                for row in rows:
+                    w.writerow([_cell(row.get(col)) for col in header])
+                with self.path.open("a", newline="") as f:
+                    f.write(buf.getvalue())
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+
+    def _prepare(self, rows: list[Mapping[str, Any]]) -> list[str]:
+        """Return the on-disk header, creating or migrating the file if needed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = self._read_header()
+        if header is None:
+            header = list(self.columns)
+        extra = [k for row in rows for k in row if k not in header]
+        extra = list(dict.fromkeys(extra))
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            _atomic_write(self.path, self._format([header + extra]))
+            return header + extra
+        self._repair_tail(header)
+        if extra:
+            self._migrate(header, header + extra)
+            header = header + extra
+        return header
+
+    def _read_header(self) -> list[str] | None:
+        if not self.path.exists():
+            return None
+        with self.path.open(newline="") as f:
+            first = f.readline()
+        if not first.strip():
+            return None
+        return next(csv.reader([first]))
+
+    def _repair_tail(self, header: list[str]) -> None:
+        with self.path.open("rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            chunk = min(size, 1 << 16)
+            f.seek(size - chunk)
+            tail = f.read(chunk)
+            cut = tail.rfind(b"\n")
+            last = tail[cut + 1 :].decode("utf-8", errors="replace")
+            # The header line itself, or a complete row someone saved without a newline.
+            if cut == -1 or len(next(csv.reader([last]), [])) == len(header):
+                f.write(b"\n")
+                return
+            f.truncate(size - chunk + cut + 1)
+
+    def _migrate(self, old: list[str], new: list[str]) -> None:
+        with self.path.open(newline="") as f:
+            records = list(csv.DictReader(f, fieldnames=old))[1:]
+        _atomic_write(self.path, self._format([new], [[r.get(c) or "" for c in new] for r in records]))
+
+    @staticmethod
+    def _format(*blocks: list[list[Any]]) -> str:
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        for block in blocks:
+            w.writerows(block)
+        return buf.getvalue()
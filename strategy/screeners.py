@@ -1,29 +1,111 @@
 from __future__ import annotations
 
-from typing import List
-import yfinance as yf
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
 
+import numpy as np
+import pandas as pd
+
+from marketdata.cache import BarCache, default_cache
+from observability.tracing import traced
 from risk.manager import RiskConfig
 
 
-def screen_universe(universe: List[str], cfg: RiskConfig, max_candidates: int = 15) -> List[str]:
-    out: list[tuple[str, float, float]] = []
-    for sym in universe:
+@dataclass
+class ScreenResult:
+    symbols: list[str]
+    scanned: int = 0
+    batches: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def _latest_bars(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Last minute bar of every symbol as one frame indexed by symbol."""
+    frames = {sym: f for sym, f in frames.items() if not f.empty}
+    if not frames:
+        return pd.DataFrame(columns=["Close", "High", "Low"], dtype=float)
+    combined = pd.concat(frames, names=["Symbol"])
+    return combined.groupby(level="Symbol", sort=False).tail(1).droplevel(-1)[["Close", "High", "Low"]]
+
+
+def _filter(latest: pd.DataFrame, cfg: RiskConfig) -> pd.DataFrame:
+    close = latest["Close"].to_numpy(dtype=float)
+    high = latest["High"].to_numpy(dtype=float)
+    low = latest["Low"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = np.where(high > 0, (high - low) / high, 1.0)
+    keep = (close >= cfg.min_price) & (spread <= max(0.10, cfg.max_spread_pct * 2.0))
+    return pd.DataFrame({"close": close[keep], "spread": spread[keep]}, index=latest.index[keep])
+
+
+@traced("screeners.screen_universe")
+def screen_universe_detailed(
+    universe: List[str],
+    cfg: RiskConfig,
+    max_candidates: int = 15,
+    batch_size: int = 50,
+    max_workers: int = 4,
+    early_stop: bool = True,
+    cache: Optional[BarCache] = None,
+) -> ScreenResult:
+    """Screen ``universe`` on its latest minute bars.
+
+    Symbols are fetched in batches of ``batch_size`` by at most
+    ``max_workers`` threads, and each batch is filtered in one vectorised pass
+    as soon as it arrives. Batches are consumed in universe order; with
+    ``early_stop`` no further batches are started once ``max_candidates``
+    symbols have passed. Candidates are ranked by tightest spread, then
+    highest price. ``timings`` reports seconds spent per stage.
+    """
+    started = time.perf_counter()
+    cache = cache or default_cache()
+    symbols = list(dict.fromkeys(s.upper() for s in universe))
+    batches = [symbols[i : i + batch_size] for i in range(0, len(symbols), max(1, batch_size))]
+
+    def fetch(batch: list[str]) -> dict[str, pd.DataFrame]:
         try:
-            data = yf.Ticker(sym).history(period="1d", interval="1m")
-            if data.empty:
-                continue
-            last_row = data.iloc[-1]
-            close = float(last_row["Close"])
-            high = float(last_row["High"])
-            low = float(last_row["Low"])
-            if close < cfg.min_price:
-                continue
-            spread_proxy = (high - low) / high if high > 0 else 1.0
-            if spread_proxy > max(0.10, cfg.max_spread_pct * 2.0):
-                continue
-            out.append((sym, close, spread_proxy))
+            return cache.get_bars_batch(batch, "1m", period="1d")
         except Exception:
-            continue
-    out.sort(key=lambda x: (x[2], -x[1]))
-    return [s for s, _, _ in out[:max_candidates]]
+            return {}
+
+    timings = {"fetch": 0.0, "filter": 0.0, "rank": 0.0}
+    passed: list[pd.DataFrame] = []
+    n_passed = 0
+    scanned = 0
+    used = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        pending = [pool.submit(fetch, b) for b in batches[:max_workers]]
+        next_batch = len(pending)
+        while pending:
+            t0 = time.perf_counter()
+            frames = pending.pop(0).result()
+            timings["fetch"] += time.perf_counter() - t0
+            used += 1
+            t0 = time.perf_counter()
+            latest = _latest_bars(frames)
+            scanned += len(latest)
+            kept = _filter(latest, cfg)
+            passed.append(kept)
+            n_passed += len(kept)
+            timings["filter"] += time.perf_counter() - t0
+            if early_stop and n_passed >= max_candidates:
+                for f in pending:
+                    f.cancel()
+                break
+            if next_batch < len(batches):
+                pending.append(pool.submit(fetch, batches[next_batch]))
+                next_batch += 1
+
+    t0 = time.perf_counter()
+    ranked = pd.concat(passed) if passed else pd.DataFrame(columns=["close", "spread"])
+    ranked = ranked.sort_values(["spread", "close"], ascending=[True, False], kind="mergesort")
+    out = [str(s) for s in ranked.index[:max_candidates]]
+    timings["rank"] = time.perf_counter() - t0
+    timings["total"] = time.perf_counter() - started
+    return ScreenResult(symbols=out, scanned=scanned, batches=used, timings=timings)
+
+
+def screen_universe(universe: List[str], cfg: RiskConfig, max_candidates: int = 15) -> List[str]:
+    return screen_universe_detailed(universe, cfg, max_candidates=max_candidates).symbols
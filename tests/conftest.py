@@ -4,3 +4,22 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _offline_market_data(tmp_path):
+    """Keep every test off the network with an empty offline bar cache."""
+    from marketdata.benchmarks import BenchmarkStore, set_default_benchmarks
+    from marketdata.cache import BarCache, set_default_cache
+
+    cache = BarCache(tmp_path / "ohlcv.sqlite", offline=True)
+    set_default_cache(cache)
+    benchmarks = BenchmarkStore(tmp_path / "benchmarks.sqlite")
+    set_default_benchmarks(benchmarks)
+    yield cache
+    set_default_cache(None)
+    set_default_benchmarks(None)
+    benchmarks.close()
+    cache.close()
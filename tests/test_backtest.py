@@ -0,0 +1,103 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.engine import Backtester, PlanEvent, load_bars_dir, load_plan_stream
+from execution.executor import TradePlanItem
+from risk.manager import RiskConfig, RiskManager
+from storage.backend import PORTFOLIO_COLUMNS
+from storage.trade_log import TRADE_LOG_COLUMNS
+
+
+def _bars(rows):
+    idx = pd.to_datetime([r[0] for r in rows])
+    return pd.DataFrame([r[1:] for r in rows], index=idx, columns=["Open", "High", "Low", "Close"])
+
+
+def _risk(**kw):
+    base = dict(max_notional_per_trade=1000.0, max_position_risk_pct=1.0, max_portfolio_heat_pct=10.0, max_symbol_exposure_pct=1.0)
+    base.update(kw)
+    return RiskManager(RiskConfig(**base))
+
+
+def test_buy_then_stop_out_matches_live_schema(tmp_path):
+    bars = {
+        "AAA": _bars([
+            ("2025-01-02", 10.0, 10.5, 9.8, 10.2),
+            ("2025-01-03", 10.2, 10.4, 9.6, 9.7),
+            ("2025-01-06", 9.7, 9.9, 8.9, 9.0),
+            ("2025-01-07", 9.0, 9.2, 8.8, 9.1),
+        ]),
+        "BBB": _bars([("2025-01-02", 5.0, 5.1, 4.9, 5.0), ("2025-01-07", 5.0, 5.1, 4.9, 5.05)]),
+    }
+    plans = [PlanEvent(pd.Timestamp("2025-01-02"), [TradePlanItem("AAA", "buy", 5, stop_price=9.0), TradePlanItem("BBB", "buy", 2, stop_price=4.0)])]
+    result = Backtester(_risk(), starting_cash=100.0).run(bars, plans)
+
+    assert list(result.trades.columns) == TRADE_LOG_COLUMNS
+    assert list(result.portfolio.columns) == PORTFOLIO_COLUMNS
+    stop = result.trades[result.trades["Reason"] == "AUTOMATED SELL - STOPLOSS TRIGGERED"].iloc[0]
+    assert stop["Date"] == "2025-01-06" and stop["Sell Price"] == 9.0 and stop["PnL"] == -5.0
+    day3 = result.portfolio[result.portfolio["Date"] == "2025-01-06"]
+    assert day3["Action"].tolist() == ["HOLD", "SELL - Stop Loss Triggered", ""]
+    total = day3[day3["Ticker"] == "TOTAL"].iloc[0]
+    assert total["Cash Balance"] == 100 - 50 - 10 + 45
+    # BBB has no bar on 01-06, so it is marked at its last close.
+    assert total["Total Equity"] == pytest.approx(85 + 10.0)
+    assert result.equity_curve["Total Equity"].iloc[-1] == pytest.approx(85 + 10.1)
+    result.save(tmp_path)
+    assert pd.read_csv(tmp_path / "chatgpt_trade_log.csv").shape[0] == 3
+
+
+def test_risk_rules_and_limits_apply():
+    bars = {s: _bars([("2025-01-02", 10.0, 10.2, 9.5, 10.0), ("2025-01-03", 10.0, 10.2, 9.9, 10.1)]) for s in ("AAA", "BBB", "CCC")}
+    plans = [
+        PlanEvent(pd.Timestamp("2025-01-02"), [
+            TradePlanItem("AAA", "buy", 1, stop_price=9.0),
+            TradePlanItem("BBB", "buy", 1, stop_price=9.0),
+            TradePlanItem("CCC", "buy", 1, stop_price=9.0),
+        ]),
+        PlanEvent(pd.Timestamp("2025-01-03"), [TradePlanItem("AAA", "sell", 1, type="limit", limit_price=11.0)]),
+    ]
+    result = Backtester(_risk(max_positions=2)).run(bars, plans)
+    reasons = [r["Reason"] for r in result.rejected]
+    assert any("Max positions" in r for r in reasons)
+    assert "Limit not reached" in reasons
+    assert (result.trades["Shares Bought"] > 0).sum() == 2
+
+
+def test_plan_stream_and_bar_files(tmp_path):
+    log = tmp_path / "llm_research_log.jsonl"
+    records = [
+        {"ts": pd.Timestamp("2025-01-02 15:00", tz="UTC").timestamp(), "ideas": [{"symbol": "aaa", "side": "buy", "entry_type": "market", "entry": None, "stop": 9.0, "take_profit": None, "confidence": 0.5, "rationale": ""}]},
+        {"ts": 1, "error": "RateLimitError"},
+        {"date": "2025-01-01", "orders": [{"symbol": "AAA", "side": "buy", "qty": 2}]},
+    ]
+    log.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    events = load_plan_stream(log)
+    assert [len(e.items) for e in events] == [1, 1]
+    assert events[1].items[0].symbol == "AAA" and events[1].items[0].stop_price == 9.0
+    bars_dir = tmp_path / "bars"
+    bars_dir.mkdir()
+    _bars([("2025-01-02", 10, 10, 10, 10)]).to_csv(bars_dir / "AAA.csv")
+    assert list(load_bars_dir(bars_dir)) == ["AAA"]
+
+
+def test_years_of_bars_across_hundreds_of_symbols_is_fast():
+    rng = np.random.default_rng(0)
+    idx = pd.bdate_range("2015-01-01", periods=252 * 5)
+    symbols = [f"S{i:03d}" for i in range(300)]
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(idx), len(symbols))), axis=0))
+    bars = {
+        s: pd.DataFrame({"Open": close[:, j], "High": close[:, j] * 1.01, "Low": close[:, j] * 0.98, "Close": close[:, j]}, index=idx)
+        for j, s in enumerate(symbols)
+    }
+    plans = [PlanEvent(idx[d], [TradePlanItem(symbols[(d * 7 + k) % 300], "buy", 1) for k in range(3)]) for d in range(0, len(idx), 5)]
+    bt = Backtester(_risk(max_positions=1000, max_notional_per_trade=1e9), starting_cash=1e7)
+    t0 = time.perf_counter()
+    result = bt.run(bars, plans)
+    assert time.perf_counter() - t0 < 10.0
+    assert len(result.equity_curve) == len(idx)
+    assert (result.trades["Reason"] == "AUTOMATED SELL - STOPLOSS TRIGGERED").any()
@@ -0,0 +1,99 @@
+import pandas as pd
+
+from marketdata.cache import BarCache
+
+DAY = 86400.0
+
+
+def _daily(dates, start_price=10.0):
+    idx = pd.to_datetime(dates)
+    close = [start_price + i for i in range(len(idx))]
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 100.0}, index=idx)
+
+
+class FakeFetcher:
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def __call__(self, symbols, interval, start, end):
+        self.calls.append((tuple(symbols), start, end))
+        out = {}
+        for s in symbols:
+            frame = self.bars[s]
+            frame = frame[frame.index >= pd.Timestamp(start)]
+            if end is not None:
+                frame = frame[frame.index < pd.Timestamp(end)]
+            out[s] = frame
+        return out
+
+
+def test_same_day_rerun_is_served_from_disk(tmp_path):
+    now = [pd.Timestamp("2025-08-05 17:00").timestamp()]
+    fetch = FakeFetcher({"AAA": _daily(["2025-08-01", "2025-08-04", "2025-08-05"]), "BBB": _daily(["2025-08-04", "2025-08-05"], 5.0)})
+    cache = BarCache(tmp_path / "c.sqlite", fetcher=fetch, clock=lambda: now[0])
+
+    bars = cache.get_bars_batch(["AAA", "BBB"], "1d", period="2d")
+    assert len(fetch.calls) == 1
+    assert list(bars["AAA"]["Close"]) == [11.0, 12.0]
+    assert list(bars["BBB"]["Close"]) == [5.0, 6.0]
+
+    reopened = BarCache(tmp_path / "c.sqlite", fetcher=fetch, clock=lambda: now[0])
+    again = reopened.get_bars("AAA", "1d", period="1d")
+    assert len(fetch.calls) == 1
+    assert list(again["Close"]) == [12.0]
+
+
+def test_next_day_fetches_only_the_tail(tmp_path):
+    now = [pd.Timestamp("2025-08-04 17:00").timestamp()]
+    fetch = FakeFetcher({"AAA": _daily(["2025-08-01", "2025-08-04"])})
+    cache = BarCache(tmp_path / "c.sqlite", fetcher=fetch, clock=lambda: now[0])
+    cache.get_bars("AAA", "1d", start="2025-08-01")
+
+    fetch.bars["AAA"] = _daily(["2025-08-01", "2025-08-04", "2025-08-05"])
+    now[0] += DAY
+    bars = cache.get_bars("AAA", "1d", start="2025-08-01")
+    assert fetch.calls[-1] == (("AAA",), "2025-08-04", None)
+    assert list(bars.index.strftime("%Y-%m-%d")) == ["2025-08-01", "2025-08-04", "2025-08-05"]
+
+
+def test_todays_daily_bar_is_refetched_while_the_session_is_open(tmp_path):
+    at = lambda t: pd.Timestamp(f"2025-08-05 {t}", tz="America/New_York").timestamp()
+    now = [at("10:00")]
+    fetch = FakeFetcher({"AAA": _daily(["2025-08-04", "2025-08-05"])})
+    cache = BarCache(tmp_path / "c.sqlite", fetcher=fetch, intraday_ttl_seconds=60, clock=lambda: now[0])
+    cache.get_bars("AAA", "1d", period="2d")
+    now[0] += 30
+    cache.get_bars("AAA", "1d", period="2d")
+    assert len(fetch.calls) == 1
+
+    now[0] = at("15:00")
+    fetch.bars["AAA"] = _daily(["2025-08-04", "2025-08-05"], 20.0)
+    assert cache.get_bars("AAA", "1d", period="1d")["Close"].iloc[-1] == 21.0
+    assert len(fetch.calls) == 2
+
+    # After the close, one more fetch picks up the final bar and then holds for the evening.
+    now[0] = at("16:30")
+    cache.get_bars("AAA", "1d", period="1d")
+    now[0] = at("18:00")
+    cache.get_bars("AAA", "1d", period="1d")
+    assert len(fetch.calls) == 3
+
+
+def test_offline_mode_never_fetches(tmp_path):
+    fetch = FakeFetcher({"AAA": _daily(["2025-08-01"])})
+    cache = BarCache(tmp_path / "c.sqlite", fetcher=fetch, offline=True)
+    assert cache.get_bars("AAA", "1d", period="1d").empty
+    assert fetch.calls == []
+
+
+def test_eviction_drops_least_recently_used_series(tmp_path):
+    now = [pd.Timestamp("2025-08-05 17:00").timestamp()]
+    fetch = FakeFetcher({s: _daily(["2025-08-05"]) for s in ("AAA", "BBB", "CCC")})
+    cache = BarCache(tmp_path / "c.sqlite", fetcher=fetch, max_series=2, clock=lambda: now[0])
+    for sym in ("AAA", "BBB", "CCC"):
+        now[0] += 1
+        cache.get_bars(sym, "1d", period="1d")
+    cache.offline = True
+    assert cache.get_bars("AAA", "1d", period="1d").empty
+    assert not cache.get_bars("CCC", "1d", period="1d").empty
@@ -0,0 +1,9 @@
+from benchmarks.suite import CASES, compare, run_suite
+
+
+def test_suite_runs_every_case_and_compares():
+    report = run_suite(sizes=[5], repeat=1)
+    assert {r["case"] for r in report["results"]} == {c.name for c in CASES}
+    assert all(r["min_s"] > 0 for r in report["results"])
+    rows = compare(report, report)
+    assert rows and all(row["ratio"] == 1.0 for row in rows)
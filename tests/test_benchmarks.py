@@ -0,0 +1,77 @@
+import pandas as pd
+
+from marketdata.benchmarks import BenchmarkStore
+from marketdata.cache import BarCache
+
+DAY = 86400.0
+
+
+class FakeFetcher:
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def __call__(self, symbols, interval, start, end):
+        self.calls.append((tuple(symbols), start, end))
+        out = {}
+        for s in symbols:
+            frame = self.bars[s]
+            frame = frame[frame.index >= pd.Timestamp(start)]
+            if end is not None:
+                frame = frame[frame.index < pd.Timestamp(end)]
+            out[s] = frame
+        return out
+
+
+def _daily(closes, start="2025-06-27"):
+    idx = pd.bdate_range(start, periods=len(closes))
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1e6}, index=idx)
+
+
+def test_series_is_normalised_from_the_stored_baseline_and_extended_incrementally(tmp_path):
+    now = [pd.Timestamp("2025-07-01 17:00").timestamp()]
+    fetch = FakeFetcher({"^SPX": _daily([6000.0, 6030.0, 6060.0])})
+    bars = BarCache(tmp_path / "ohlcv.sqlite", fetcher=fetch, clock=lambda: now[0])
+    store = BenchmarkStore(tmp_path / "bench.sqlite", bars=bars, clock=lambda: now[0])
+
+    s = store.series("^SPX")
+    assert store.baseline("^SPX") == 6000.0
+    assert list(s["Value"].round(2)) == [100.0, 100.5, 101.0]
+    store.series("^SPX")
+    assert len(fetch.calls) == 1
+
+    # Next day: only the tail is requested, and a revised history does not move the baseline.
+    now[0] += DAY
+    fetch.bars["^SPX"] = _daily([5000.0, 6030.0, 6060.0, 6120.0])
+    reopened = BenchmarkStore(tmp_path / "bench.sqlite", bars=bars, clock=lambda: now[0])
+    s = reopened.series("^SPX", end="2025-07-02")
+    assert fetch.calls[-1] == (("^SPX",), "2025-07-01", None)
+    assert list(s.index.strftime("%Y-%m-%d")) == ["2025-06-27", "2025-06-30", "2025-07-01", "2025-07-02"]
+    assert s["Value"].iloc[-1] == 102.0
+    assert reopened.value_invested("^SPX", end="2025-06-30") == 100.5
+
+
+def test_pinned_baseline_wins(tmp_path):
+    fetch = FakeFetcher({"^SPX": _daily([6000.0, 6173.07 * 1.1])})
+    bars = BarCache(tmp_path / "ohlcv.sqlite", fetcher=fetch)
+    store = BenchmarkStore(tmp_path / "bench.sqlite", bars=bars, baselines={"^SPX": 6173.07})
+    assert round(store.value_invested("^SPX"), 6) == 110.0
+
+
+def test_a_long_running_store_picks_up_the_close_after_the_session(tmp_path):
+    at = lambda t: pd.Timestamp(f"2025-07-01 {t}", tz="America/New_York").timestamp()
+    now = [at("10:00")]
+    fetch = FakeFetcher({"^SPX": _daily([6000.0, 6030.0])})
+    bars = BarCache(tmp_path / "ohlcv.sqlite", fetcher=fetch, clock=lambda: now[0])
+    store = BenchmarkStore(tmp_path / "bench.sqlite", bars=bars, clock=lambda: now[0])
+    assert len(store.series("^SPX")) == 2
+    now[0] = at("15:00")
+    store.series("^SPX")
+    assert len(fetch.calls) == 1
+
+    now[0] = at("16:30")
+    fetch.bars["^SPX"] = _daily([6000.0, 6030.0, 6090.0])
+    s = store.series("^SPX")
+    assert len(fetch.calls) == 2 and s["Close"].iloc[-1] == 6090.0
+    store.series("^SPX")
+    assert len(fetch.calls) == 2
@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Dict, Any, List
@@ -53,3 +54,124 @@ def test_executor_audits(tmp_path: Path):
     assert audit.exists()
     text = audit.read_text()
     assert "AAPL" in text and "filled" in text
+
+
+def test_place_batch_prefetches_once_and_threads_context():
+    class CountingClient(FakeClient):
+        def __init__(self) -> None:
+            super().__init__()
+            self.quote_calls = 0
+            self.clock_calls = 0
+            self.placed: List[OrderRequest] = []
+
+        def get_quotes(self, symbols):
+            self.quote_calls += 1
+            return {s: self.get_quote(s) for s in symbols}
+
+        def is_market_open(self) -> bool:
+            self.clock_calls += 1
+            return True
+
+        def place_order(self, req: OrderRequest) -> OrderResponse:
+            self.placed.append(req)
+            return super().place_order(req)
+
+    client = CountingClient()
+    risk = RiskManager(RiskConfig(max_notional_per_trade=1000.0, max_positions=2, require_bracket=False))
+    ex = Executor(client, risk)
+    ex.poll_interval = 0.0
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
+    items = [
+        TradePlanItem(symbol="AAA", side="buy", qty=1.0),
+        TradePlanItem(symbol="BBB", side="buy", qty=1.0),
+        TradePlanItem(symbol="CCC", side="buy", qty=1.0),
+        TradePlanItem(symbol="AAA", side="sell", qty=1.0),
+    ]
+    results = ex.place_batch(items, ctx)
+    assert client.quote_calls == 1 and client.clock_calls == 1
+    assert [r.item.symbol for r in results] == ["AAA", "BBB", "CCC", "AAA"]
+    # The third buy sees the two accepted before it and hits max_positions.
+    assert results[2].response is None and "Max positions" in (results[2].error or "")
+    assert all(r.response is not None and r.response.status == "filled" for r in results if r is not results[2])
+    assert len(client.placed) == 3
+    assert ctx.open_positions == 0
+
+
+def test_place_batch_caps_symbol_exposure_across_legs():
+    client = FakeClient()
+    risk = RiskManager(RiskConfig(max_notional_per_trade=1000.0, max_symbol_exposure_pct=0.15, require_bracket=False))
+    ex = Executor(client, risk)
+    ex.poll_interval = 0.0
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0)
+    items = [TradePlanItem(symbol="AAA", side="buy", qty=10.0), TradePlanItem(symbol="AAA", side="buy", qty=10.0)]
+    first, second = ex.place_batch(items, ctx)
+    assert first.response is not None
+    assert second.response is None and "Symbol exposure" in (second.error or "")
+
+
+def test_reconcile_waits_on_stream_events_without_polling():
+    import threading
+
+    from exchange.order_stream import LocalOrderStream
+
+    class StreamingClient(FakeClient):
+        def __init__(self) -> None:
+            super().__init__()
+            self.stream = LocalOrderStream()
+            self.polls = 0
+
+        def subscribe_order_updates(self, callback):
+            return self.stream.subscribe(callback)
+
+        def place_order(self, req: OrderRequest) -> OrderResponse:
+            resp = super().place_order(req)
+            filled = OrderResponse(id=resp.id, symbol=req.symbol, side=req.side, qty=req.qty, filled_qty=req.qty, status="filled", avg_fill_price=10.1)
+            threading.Timer(0.05, self.stream.publish, args=(filled,)).start()
+            return resp
+
+        def get_order(self, order_id: str) -> OrderResponse:
+            self.polls += 1
+            return super().get_order(order_id)
+
+    client = StreamingClient()
+    ex = Executor(client, RiskManager(RiskConfig(max_notional_per_trade=1000.0, require_bracket=False)))
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0)
+    items = [TradePlanItem(symbol=s, side="buy", qty=1.0) for s in ("AAA", "BBB", "CCC")]
+    results = ex.place_batch(items, ctx)
+    assert [r.response.status for r in results if r.response] == ["filled"] * 3
+    assert client.polls == 0
+
+
+def test_reconcile_falls_back_to_adaptive_polling():
+    import time
+
+    client = FakeClient()
+    ex = Executor(client, RiskManager(RiskConfig(max_notional_per_trade=1000.0, require_bracket=False)))
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0)
+    t0 = time.monotonic()
+    resp = ex.place_and_reconcile(TradePlanItem(symbol="AAPL", side="buy", qty=1.0), ctx)
+    assert resp.status == "filled"
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_place_stream_submits_each_leg_before_the_plan_finishes():
+    client = FakeClient()
+    risk = RiskManager(RiskConfig(max_notional_per_trade=1000.0, max_positions=2, require_bracket=False))
+    ex = Executor(client, risk)
+    ex.poll_interval = 0.0
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
+    submitted_before = []
+
+    def plan():
+        for sym, expected in (("AAA", 1), ("BBB", 2), ("CCC", 2)):
+            yield TradePlanItem(symbol=sym, side="buy", qty=1.0)
+            # Give the submit thread a moment, as token generation would.
+            deadline = time.monotonic() + 2.0
+            while client.last_id < expected and time.monotonic() < deadline:
+                time.sleep(0.001)
+            submitted_before.append(client.last_id)
+
+    results = ex.place_stream(plan(), ctx)
+    assert submitted_before == [1, 2, 2]
+    assert results[2].response is None and "Max positions" in (results[2].error or "")
+    assert all(r.response is not None and r.response.status == "filled" for r in results[:2])
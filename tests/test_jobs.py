@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from orchestration.jobs import Job, JobScheduler
+from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+
+
+class FakeClock:
+    """Advances on wait; optionally lets in-flight runs finish first so they read a stable clock."""
+
+    def __init__(self, start, overshoot=0.0):
+        self.now = start
+        self.overshoot = overshoot
+        self.scheduler = None
+        self.settle = True
+        self.on_wait = None
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, seconds):
+        if self.settle:
+            self.idle()
+        self.now += timedelta(seconds=seconds + self.overshoot)
+        if self.on_wait is not None:
+            self.on_wait(self)
+
+    def idle(self, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while any(j["running"] for j in self.scheduler.stats()["jobs"].values()):
+            assert time.monotonic() < deadline, "job did not finish"
+            time.sleep(0.001)
+
+
+def _scheduler(clock, jobs, **kwargs):
+    sched = JobScheduler(jobs, now_fn=clock, wait_fn=clock.wait, **kwargs)
+    clock.scheduler = sched
+    return sched
+
+
+def test_slots_stay_on_the_grid_when_wakeups_are_late():
+    clock = FakeClock(datetime(2025, 1, 2, 10, 0, tzinfo=MARKET_TZ), overshoot=2.0)
+    seen = []
+    sched = _scheduler(clock, [Job("fast", lambda: seen.append(clock()), every_seconds=5, align=False, market_hours_only=False)])
+    sched.run(max_minutes=1)
+    # A sleep-after-step loop would slip 2s per run and fit only 9 runs in the minute.
+    assert len(seen) == 12
+    assert [(t - seen[0]).total_seconds() for t in seen] == [0] + [5.0 * k + 2.0 for k in range(1, 12)]
+    stats = sched.stats()
+    assert stats["jobs"]["fast"]["runs"] == 12 and stats["jobs"]["fast"]["lag_max_s"] == 2.0
+    assert stats["loop"]["lag_max_s"] == 2.0
+
+
+def test_overrun_policies_and_concurrency_limits():
+    release = threading.Event()
+    clock = FakeClock(datetime(2025, 1, 2, 10, 0, tzinfo=MARKET_TZ))
+    clock.settle = False
+
+    def slow():
+        release.wait(2.0)
+
+    def on_wait(c):
+        if not release.is_set() and c.now >= datetime(2025, 1, 2, 10, 0, 35, tzinfo=MARKET_TZ):
+            release.set()
+            c.settle = True
+            c.idle()
+
+    clock.on_wait = on_wait
+    jobs = [
+        Job("skip", slow, every_seconds=10, align=False, market_hours_only=False),
+        Job("coalesce", slow, every_seconds=10, align=False, market_hours_only=False, overrun="coalesce"),
+        Job("pair", slow, every_seconds=10, align=False, market_hours_only=False, max_concurrency=2),
+    ]
+    sched = _scheduler(clock, jobs)
+    sched.run(max_minutes=1)  # slots at 0..50s; the first runs block until t=35s
+    stats = sched.stats()["jobs"]
+    assert (stats["skip"]["runs"], stats["skip"]["skipped"]) == (3, 3)
+    assert (stats["coalesce"]["runs"], stats["coalesce"]["coalesced"]) == (4, 3)
+    assert (stats["pair"]["runs"], stats["pair"]["skipped"]) == (4, 2)
+
+
+def test_market_hours_jobs_sleep_through_the_close_and_jitter_stays_in_its_slot():
+    clock = FakeClock(datetime(2025, 1, 17, 15, 50, tzinfo=MARKET_TZ))  # Friday, before MLK day
+    monitor, housekeeping = [], []
+    jobs = [
+        Job("monitor", lambda: monitor.append(clock()), every_seconds=300),
+        Job("housekeeping", lambda: housekeeping.append(clock()), every_seconds=6 * 3600, jitter_seconds=60, market_hours_only=False),
+    ]
+    sched = _scheduler(clock, jobs, calendar=MarketCalendar(), rng=random.Random(7))
+    sched.run(max_minutes=(4 * 24 * 60) - 6 * 60 + 5)  # until Tuesday 09:55
+    assert [t.strftime("%a %H:%M") for t in monitor] == [
+        "Fri 15:50", "Fri 15:55", "Tue 09:30", "Tue 09:35", "Tue 09:40", "Tue 09:45", "Tue 09:50",
+    ]
+    assert len(housekeeping) == 15  # every 6h from Friday 18:00 through Tuesday 06:00
+    for t in housekeeping:
+        assert t.hour % 6 == 0 and t.minute == 0 and 0 <= t.second < 60
+    assert len({t.second for t in housekeeping}) > 1
+    assert sched.stats()["jobs"]["monitor"]["missed"] == 0
+
+
+def test_broker_closure_skips_the_session():
+    clock = FakeClock(datetime(2025, 3, 13, 9, 0, tzinfo=MARKET_TZ))  # Thursday
+    runs = []
+    sched = _scheduler(
+        clock,
+        [Job("research", lambda: runs.append(clock()), every_seconds=3600)],
+        calendar=MarketCalendar(),
+        is_market_open_fn=lambda: clock().date() != datetime(2025, 3, 13).date(),
+    )
+    sched.run(max_minutes=2 * 24 * 60)
+    assert runs and {t.date().isoformat() for t in runs} == {"2025-03-14"}
+
+
+def test_a_late_broker_open_delays_the_session_instead_of_skipping_it():
+    clock = FakeClock(datetime(2025, 3, 13, 9, 0, tzinfo=MARKET_TZ))
+    opens = datetime(2025, 3, 13, 9, 30, 0, 400000, tzinfo=MARKET_TZ)  # broker flips 400 ms late
+    runs = []
+    sched = _scheduler(
+        clock,
+        [Job("stops", lambda: runs.append(clock()), every_seconds=300)],
+        calendar=MarketCalendar(),
+        is_market_open_fn=lambda: clock() >= opens,
+        confirm_retry_seconds=5,
+    )
+    sched.run(max_minutes=41)
+    assert [t.strftime("%H:%M:%S") for t in runs] == ["09:30:05", "09:35:00", "09:40:00"]
@@ -0,0 +1,109 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from exchange.base import OrderRequest, OrderResponse
+from exchange.simulated import ManualClock, PriceFeed, SimulatedExchange
+from execution.executor import Executor, TradePlanItem
+from execution.ledger import PortfolioLedger
+from risk.manager import RiskConfig, RiskManager
+
+
+def test_fills_marks_and_context():
+    day = {"d": date(2025, 1, 2)}
+    ledger = PortfolioLedger(1000.0, today=lambda: day["d"])
+    ledger.apply_fill("AAA", "buy", 10, 10.0, stop_price=9.0)
+    ledger.apply_fill("BBB", "buy", 5, 20.0)
+    ctx = ledger.context("AAA")
+    assert ctx.equity == pytest.approx(1000.0)
+    assert ctx.symbol_exposure == pytest.approx(0.1)
+    assert ctx.open_positions == 2
+    assert ctx.portfolio_heat_pct == pytest.approx(10 / 1000)
+
+    ledger.mark("AAA", 12.0)
+    assert ledger.context().equity == pytest.approx(1020.0)
+    assert ledger.context().portfolio_heat_pct == pytest.approx(30 / 1020)
+
+    assert ledger.apply_fill("AAA", "sell", 10, 11.0) == pytest.approx(10.0)
+    ctx = ledger.context("AAA")
+    assert ctx.open_positions == 1 and ctx.symbol_exposure == 0.0 and ctx.portfolio_heat_pct == 0.0
+    assert ctx.day_realized_pnl_pct == pytest.approx(10 / 1000)
+
+    day["d"] = date(2025, 1, 3)
+    assert ledger.context().day_realized_pnl_pct == 0.0
+
+
+def test_on_order_books_only_new_fill_quantity():
+    ledger = PortfolioLedger(1000.0)
+    req = OrderRequest(symbol="AAA", side="buy", qty=10, stop_price=9.0, order_class="bracket")
+    partial = OrderResponse(id="1", symbol="AAA", side="buy", qty=10, filled_qty=4, status="partially_filled", avg_fill_price=10.0)
+    full = OrderResponse(id="1", symbol="AAA", side="buy", qty=10, filled_qty=10, status="filled", avg_fill_price=10.6)
+    ledger.on_order(req, partial)
+    ledger.on_order(req, partial)
+    ledger.on_order(req, full)
+    pos = ledger.positions["AAA"]
+    assert pos.qty == 10 and pos.avg_price == pytest.approx(10.6) and pos.stop_price == 9.0
+    assert ledger.cash == pytest.approx(1000 - 106)
+
+
+def test_seed_from_portfolio_and_account():
+    portfolio = pd.DataFrame([{"ticker": "abc", "shares": 3, "buy_price": 5.0, "cost_basis": 15.0, "stop_loss": 4.0}])
+    ledger = PortfolioLedger.from_portfolio(portfolio, 50.0, prices={"ABC": 6.0})
+    assert ledger.context("ABC").equity == pytest.approx(68.0)
+
+    # A NO DATA holding (NaN price) is valued at cost instead of poisoning the context.
+    two = pd.concat([portfolio, pd.DataFrame([{"ticker": "XYZ", "shares": 2, "buy_price": 4.0, "cost_basis": 8.0, "stop_loss": 3.0}])])
+    ctx = PortfolioLedger.from_portfolio(two, 50.0, prices={"ABC": 6.0, "XYZ": float("nan")}).context("XYZ")
+    assert ctx.equity == pytest.approx(76.0)
+    assert ctx.symbol_exposure == pytest.approx(8 / 76) and ctx.day_realized_pnl_pct == 0.0
+
+    feed = PriceFeed(spread_pct=0.0)
+    feed.set_price("AAA", 10.0)
+    sim = SimulatedExchange(feed, cash=1000.0, clock=ManualClock())
+    sim.place_order(OrderRequest(symbol="AAA", side="buy", qty=5, stop_price=8.0, order_class="bracket"))
+    ledger = PortfolioLedger.from_account(sim)
+    assert ledger.positions["AAA"].qty == 5 and ledger.positions["AAA"].stop_price == 8.0
+    assert ledger.context().equity == pytest.approx(1000.0)
+
+
+def test_resync_keeps_the_days_realized_pnl_and_booked_orders():
+    clock = ManualClock(0.0)
+    feed = PriceFeed(spread_pct=0.0)
+    feed.set_price("AAA", 10.0)
+    feed.set_price("BBB", 20.0)
+    ex = SimulatedExchange(feed, cash=1000.0, clock=clock)
+    ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=10))
+    ledger = PortfolioLedger.from_account(ex)
+    feed.set_price("AAA", 5.0)
+    req = OrderRequest(symbol="AAA", side="sell", qty=10)
+    resp = ex.place_order(req)
+    ledger.on_order(req, resp)
+    loss = ledger.context().day_realized_pnl_pct
+    assert loss == pytest.approx(-50 / 1000)
+
+    ex.place_order(OrderRequest(symbol="BBB", side="buy", qty=2))  # filled outside the ledger
+    ledger.resync(ex)
+    ctx = ledger.context("BBB")
+    assert ctx.day_realized_pnl_pct == pytest.approx(loss)
+    assert ctx.open_positions == 1 and ledger.cash == pytest.approx(910.0)
+    assert ctx.symbol_exposure == pytest.approx(40 / 950)
+    assert ledger.on_order(req, resp) == 0.0  # a late duplicate update is still ignored
+
+
+def test_executor_uses_and_updates_ledger():
+    feed = PriceFeed(spread_pct=0.0)
+    for s in ("AAA", "BBB"):
+        feed.set_price(s, 10.0)
+    sim = SimulatedExchange(feed, cash=1000.0, clock=ManualClock())
+    ledger = PortfolioLedger.from_account(sim)
+    risk = RiskManager(RiskConfig(max_notional_per_trade=1000.0, max_symbol_exposure_pct=0.15, max_position_risk_pct=0.2, max_portfolio_heat_pct=1.0))
+    ex = Executor(sim, risk, ledger=ledger)
+    ex._log = lambda msg: None
+    results = ex.place_batch([TradePlanItem("AAA", "buy", 10), TradePlanItem("BBB", "buy", 10)])
+    assert all(r.response is not None and r.response.status == "filled" for r in results)
+    assert ledger.context("AAA").symbol_exposure == pytest.approx(0.1)
+    assert ledger.context().open_positions == 2
+    # A further 10 shares would lift AAA to 20% of equity.
+    with pytest.raises(RuntimeError, match="Symbol exposure"):
+        ex.place_and_reconcile(TradePlanItem("AAA", "buy", 10))
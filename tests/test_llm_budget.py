@@ -0,0 +1,96 @@
+import json
+from datetime import date
+
+from research.llm_budget import FALLBACK_PRICE, SpendGovernor, model_price
+from research.llm_research import LLMResearch
+from risk.manager import RiskConfig
+
+IDEAS = '{"ideas":[{"symbol":"AAPL","side":"buy","entry_type":"market","entry":null,"stop":170.0,"take_profit":null,"confidence":0.8,"rationale":"x"}]}'
+
+
+def test_price_table_matches_dated_snapshots_and_falls_back():
+    assert model_price("gpt-4o-mini-2024-07-18") == model_price("gpt-4o-mini")
+    assert model_price("gpt-4o-2024-08-06") == model_price("gpt-4o")
+    assert model_price("some-new-model") == FALLBACK_PRICE
+
+
+def test_spend_persists_per_market_day(tmp_path):
+    day = {"d": date(2025, 1, 2)}
+    path = tmp_path / "spend.json"
+    gov = SpendGovernor(1.0, path=path, today=lambda: day["d"])
+    usd = gov.record("gpt-4o-mini", 1_000_000, 1_000_000)
+    assert usd == 0.75
+
+    reloaded = SpendGovernor(1.0, path=path, today=lambda: day["d"])
+    assert reloaded.spent_today() == 0.75
+    assert json.loads(path.read_text())["2025-01-02"]["calls"] == 1
+
+    day["d"] = date(2025, 1, 3)
+    assert reloaded.spent_today() == 0.0
+    assert reloaded.remaining_usd() == 1.0
+
+
+def test_cadence_stretches_as_budget_runs_out():
+    gov = SpendGovernor(1.0, today=lambda: date(2025, 1, 2))
+    gov.record("gpt-4o-mini", 1_000_000, 0)  # $0.15 per call
+    # 0.85 left affords 5 calls; 12 would fit at the base cadence over an hour.
+    assert gov.cadence(300, 3600, "gpt-4o-mini") == 720
+    assert gov.cadence(300, 600, "gpt-4o-mini") == 300
+    for _ in range(5):
+        gov.record("gpt-4o-mini", 1_000_000, 0)
+    assert not gov.allow_call("gpt-4o-mini")
+    assert gov.cadence(300, 3600, "gpt-4o-mini") == 3600
+
+
+def test_research_skips_generator_when_budget_exhausted(tmp_path):
+    gov = SpendGovernor(0.1, today=lambda: date(2025, 1, 2))
+    calls = []
+
+    def gen(prompt: str) -> str:
+        calls.append(prompt)
+        gov.record("gpt-4o-mini", 400_000, 50_000)  # $0.09
+        return IDEAS
+
+    log = tmp_path / "log.jsonl"
+    llm = LLMResearch("gpt-4o-mini", gen, log_path=log, governor=gov)
+    assert len(llm.generate_trade_plans(["AAPL"], RiskConfig(), "s", max_candidates=1)) == 1
+    assert llm.generate_trade_plans(["AAPL"], RiskConfig(), "s", max_candidates=1) == []
+    assert len(calls) == 1
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert records[0]["spend"]["usd_today"] == 0.09
+    assert "budget" in records[1]["skipped"]
+
+
+def test_scheduler_uses_cadence_fn_and_survives_its_errors():
+    from datetime import datetime, timedelta
+
+    from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+    from orchestration.scheduler import run_market_hours_loop
+
+    clock = {"now": datetime(2025, 1, 2, 9, 30, tzinfo=MARKET_TZ)}
+    sleeps = []
+    delays = iter([1800, 60, None])
+
+    def cadence_fn():
+        d = next(delays)
+        if d is None:
+            raise RuntimeError("boom")
+        return d
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += timedelta(seconds=seconds)
+
+    run_market_hours_loop(
+        lambda: True,
+        lambda: None,
+        cadence_seconds=300,
+        max_minutes=40,
+        calendar=MarketCalendar(),
+        sleep_fn=sleep,
+        now_fn=lambda: clock["now"],
+        cadence_fn=cadence_fn,
+    )
+    # Stretched, floored at the base cadence, then the base cadence on error,
+    # with the last sleep capped by the run deadline.
+    assert sleeps == [1800, 300, 300]
@@ -0,0 +1,64 @@
+import json
+import time
+
+from research.ensemble import LLMEnsemble, merge_ideas, stub_generator
+from research.llm_research import LLMResearch, TradeIdea
+from risk.manager import RiskConfig
+
+
+def idea(symbol, side="buy", confidence=0.5, stop=1.0):
+    return {"symbol": symbol, "side": side, "entry_type": "market", "entry": None, "stop": stop, "take_profit": None, "confidence": confidence, "rationale": ""}
+
+
+def test_merge_dedupes_by_symbol_side_and_scores_agreement():
+    def ideas(*items):
+        return [TradeIdea(**{**i, "symbol": i["symbol"].upper()}) for i in items]
+
+    merged = merge_ideas(
+        {
+            "a": ideas(idea("AAA", confidence=0.6, stop=9.0), idea("BBB", confidence=0.9), idea("AAA", confidence=0.1)),
+            "b": ideas(idea("AAA", confidence=0.8, stop=9.5), idea("AAA", side="sell", confidence=0.9)),
+        }
+    )
+    top = merged[0]
+    assert (top.idea.symbol, top.idea.side, top.votes, top.models) == ("AAA", "buy", 2, ["a", "b"])
+    assert abs(top.score - 0.7) < 1e-9 and top.idea.stop == 9.5
+    assert [(m.idea.symbol, m.idea.side) for m in merged[1:]] == [("AAA", "sell"), ("BBB", "buy")]
+    assert merged[1].score == 0.45
+    assert [m.idea.symbol for m in merge_ideas({"a": ideas(idea("AAA")), "b": ideas(idea("AAA"), idea("BBB"))}, min_votes=2)] == ["AAA"]
+
+
+def test_deadline_drops_stragglers_and_failures():
+    ens = LLMEnsemble(
+        {
+            "fast": stub_generator([idea("AAA", confidence=0.8)]),
+            "also_fast": stub_generator([idea("AAA", confidence=0.6), idea("BBB")], delay=0.01),
+            "slow": stub_generator([idea("CCC")], delay=5.0, chunk_size=8),
+            "broken": stub_generator("", error=RuntimeError("rate limited")),
+        },
+        deadline_seconds=0.3,
+    )
+    t0 = time.perf_counter()
+    result = ens.run("prompt")
+    assert time.perf_counter() - t0 < 1.0
+    statuses = {name: o.status for name, o in result.outcomes.items()}
+    assert statuses == {"fast": "ok", "also_fast": "ok", "slow": "timeout", "broken": "error"}
+    assert [(s.idea.symbol, s.votes) for s in result.ideas] == [("AAA", 2), ("BBB", 1)]
+
+
+def test_ensemble_plugs_into_llm_research(tmp_path):
+    ens = LLMEnsemble({"a": stub_generator([idea("AAPL", stop=170.0)]), "b": stub_generator([idea("AAPL", stop=171.0)])}, deadline_seconds=1.0)
+    log = tmp_path / "log.jsonl"
+    llm = LLMResearch("ensemble:a,b", ens, log_path=log)
+    plans = llm.generate_trade_plans(["AAPL"], RiskConfig(), "s", max_candidates=1)
+    assert [(p.symbol, p.side) for p in plans] == [("AAPL", "buy")]
+    raw = json.loads(json.loads(log.read_text().splitlines()[-1])["raw"])
+    assert raw["ideas"][0]["votes"] == 2 and set(raw["ensemble"]) == {"a", "b"}
+
+
+def test_ensemble_with_no_answers_yields_no_plans(tmp_path):
+    ens = LLMEnsemble({"slow": stub_generator([idea("AAPL")], delay=2.0, chunk_size=4)}, deadline_seconds=0.05)
+    log = tmp_path / "log.jsonl"
+    llm = LLMResearch("ensemble:slow", ens, log_path=log)
+    assert llm.generate_trade_plans(["AAPL"], RiskConfig(), "s", max_candidates=1) == []
+    assert "No model answered" in json.loads(log.read_text())["error"]
@@ -22,3 +22,125 @@ def test_parse_ideas_handles_code_fences():
     assert len(ideas) == 1
     assert ideas[0].symbol == "ABCD"
     assert ideas[0].side == "buy"
+
+
+def test_response_cache_skips_generator_and_logs_counters(tmp_path):
+    import json
+
+    from research.llm_cache import LLMResponseCache
+
+    calls = []
+
+    def gen(prompt: str) -> str:
+        calls.append(prompt)
+        return fake_gen_ok(prompt)
+
+    log = tmp_path / "log.jsonl"
+    cache = LLMResponseCache(tmp_path / "llm.sqlite", ttl_seconds=60)
+    llm = LLMResearch(model="test", generator=gen, log_path=log, cache=cache)
+    for _ in range(3):
+        assert len(llm.generate_trade_plans(["AAPL", "MSFT"], RiskConfig(), "s", max_candidates=2)) == 1
+    assert len(calls) == 1
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [r["cache"]["hit"] for r in records] == [False, True, True]
+    assert records[-1]["cache"] == {"hit": True, "hits": 2, "misses": 1}
+    llm.generate_trade_plans(["AAPL", "MSFT"], RiskConfig(), "other strategy", max_candidates=2)
+    assert len(calls) == 2
+
+
+def test_response_cache_ttl_and_lru(tmp_path):
+    from research.llm_cache import LLMResponseCache
+
+    now = {"t": 0.0}
+    cache = LLMResponseCache(tmp_path / "llm.sqlite", ttl_seconds=100, max_entries=2, clock=lambda: now["t"])
+    assert cache.key("p", "m") != cache.key("p", "other")
+    keys = [cache.key(f"p{i}", "m") for i in range(3)]
+    cache.put(keys[0], "m", "r0")
+    now["t"] = 1
+    cache.put(keys[1], "m", "r1")
+    now["t"] = 2
+    assert cache.get(keys[0]) == "r0"
+    now["t"] = 3
+    cache.put(keys[2], "m", "r2")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "r0"
+    now["t"] = 200
+    assert cache.get(keys[2]) is None
+
+
+def test_cache_hits_are_not_replayed_for_placement(tmp_path):
+    import json
+
+    from research.llm_cache import LLMResponseCache
+
+    body = fake_gen_ok("")
+    log = tmp_path / "log.jsonl"
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+    llm = LLMResearch("test", fake_gen_ok, log_path=log, cache=cache, stream_generator=lambda prompt: iter([body]))
+    args = (["AAPL"], RiskConfig(), "s", 1)
+    assert [p.symbol for p in llm.generate_trade_plans(*args, replay_cached=False)] == ["AAPL"]
+    assert llm.generate_trade_plans(*args, replay_cached=False) == []
+    assert list(llm.stream_trade_plans(*args, replay_cached=False)) == []
+    assert [p.symbol for p in llm.stream_trade_plans(*args)] == ["AAPL"]
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [r.get("skipped") for r in records] == [None, "cached plan already placed", "cached plan already placed", None]
+    assert [r["cache"]["hit"] for r in records] == [False, True, True, True]
+
+
+def test_unparseable_response_is_not_cached(tmp_path):
+    from research.llm_cache import LLMResponseCache
+
+    calls = []
+
+    def bad(prompt: str) -> str:
+        calls.append(prompt)
+        return "not json"
+
+    llm = LLMResearch(model="test", generator=bad, cache=LLMResponseCache(tmp_path / "llm.sqlite"))
+    llm.generate_trade_plans(["AAPL"], RiskConfig(), "s", max_candidates=1)
+    llm.generate_trade_plans(["AAPL"], RiskConfig(), "s", max_candidates=1)
+    assert len(calls) == 2
+
+
+def test_stream_parser_emits_ideas_as_objects_close():
+    from research.idea_stream import IdeaStreamParser
+
+    text = '```json\n{"ideas": [{"symbol": "A}{\\"", "nested": {"x": [1]}}, {"symbol": "B"}]}\n```'
+    for size in (1, 3, 7, len(text)):
+        parser = IdeaStreamParser()
+        out = []
+        for i in range(0, len(text), size):
+            out += parser.feed(text[i : i + size])
+        assert [o["symbol"] for o in out] == ['A}{"', "B"]
+        assert parser.done
+
+
+def test_stream_trade_plans_yields_before_generation_finishes(tmp_path):
+    import json
+
+    from research.llm_cache import LLMResponseCache
+
+    progress = []
+    body = fake_gen_ok("").replace("]}", ',{"symbol":"MSFT","side":"buy","stop":300}]}')
+
+    def stream(prompt: str):
+        for i in range(0, len(body), 16):
+            progress.append(i)
+            yield body[i : i + 16]
+
+    log = tmp_path / "log.jsonl"
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+    llm = LLMResearch("test", fake_gen_ok, log_path=log, cache=cache, stream_generator=stream)
+    seen = []
+    for plan in llm.stream_trade_plans(["AAPL", "MSFT"], RiskConfig(), "s", max_candidates=2):
+        seen.append((plan.symbol, len(progress)))
+    assert [s for s, _ in seen] == ["AAPL", "MSFT"]
+    # The first plan arrived while chunks were still outstanding.
+    assert seen[0][1] < len(progress)
+    record = json.loads(log.read_text().splitlines()[-1])
+    assert record["stream"]["first_idea_s"] is not None and len(record["ideas"]) == 2
+
+    # The whole response was cached, so a repeat is served without streaming.
+    progress.clear()
+    assert [p.symbol for p in llm.stream_trade_plans(["AAPL", "MSFT"], RiskConfig(), "s", max_candidates=2)] == ["AAPL", "MSFT"]
+    assert progress == []
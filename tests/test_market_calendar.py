@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from orchestration.market_calendar import MARKET_TZ, MarketCalendar, nyse_early_closes, nyse_holidays
+
+
+def _et(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+def test_holidays_match_published_nyse_schedule():
+    assert set(nyse_holidays(2025)) == {
+        date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+        date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+        date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+    }
+    h26 = nyse_holidays(2026)
+    assert date(2026, 4, 3) in h26  # Good Friday
+    assert date(2026, 7, 3) in h26  # Independence Day observed on Friday
+    # Saturday New Year's Day is not observed on the Friday before
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+    assert date(2022, 1, 1) not in nyse_holidays(2022)
+    assert date(2022, 12, 26) in nyse_holidays(2022)
+
+
+def test_early_closes():
+    assert nyse_early_closes(2025) == {date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)}
+    assert nyse_early_closes(2026) == {date(2026, 11, 27), date(2026, 12, 24)}
+    cal = MarketCalendar()
+    s = cal.session(date(2025, 11, 28))
+    assert s is not None and s.early_close and s.close == _et(2025, 11, 28, 13, 0)
+    assert not cal.is_open(_et(2025, 11, 28, 13, 30))
+
+
+def test_is_open_and_next_open():
+    cal = MarketCalendar()
+    assert cal.is_open(_et(2025, 7, 2, 9, 30))
+    assert not cal.is_open(_et(2025, 7, 2, 16, 0))
+    # Friday evening before the MLK weekend opens on Tuesday
+    assert cal.next_open(_et(2025, 1, 17, 17, 0)) == _et(2025, 1, 21, 9, 30)
+    assert cal.next_open(_et(2025, 1, 21, 10, 0)) == _et(2025, 1, 21, 10, 0)
+    assert cal.seconds_until_open(_et(2025, 1, 21, 9, 0)) == 1800
+    assert cal.last_session_on_or_before(date(2025, 4, 20)).date == date(2025, 4, 17)
+    assert not MarketCalendar(extra_closures=[date(2025, 7, 2)]).is_trading_day(date(2025, 7, 2))
+
+
+def test_last_completed_session():
+    cal = MarketCalendar()
+    assert cal.last_completed_session(_et(2025, 7, 7, 15, 59)).date == date(2025, 7, 3)  # Jul 4 closed
+    assert cal.last_completed_session(_et(2025, 7, 7, 16, 0)).date == date(2025, 7, 7)
+    assert cal.last_completed_session(_et(2025, 7, 3, 13, 30)).date == date(2025, 7, 3)  # early close
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from analytics.metrics import MetricsEngine
+from storage.backend import CsvStorage
+
+
+def totals_frame(values, start="2025-06-27"):
+    dates = pd.bdate_range(start, periods=len(values))
+    return pd.DataFrame({"Date": dates, "Total Equity": values})
+
+
+def reference(values, bench):
+    equity = pd.Series(values, dtype=float)
+    daily = equity.pct_change().dropna()
+    n_days = len(equity)
+    total_return = (equity.iloc[-1] - equity.iloc[0]) / equity.iloc[0]
+    rf_period = (1 + 0.045) ** (n_days / 252) - 1
+    sharpe = (total_return - rf_period) / (daily.std() * np.sqrt(n_days))
+    sortino = (total_return - rf_period) / (daily[daily < 0].std() * np.sqrt(n_days))
+    bench_daily = pd.Series(bench, dtype=float).pct_change().dropna()
+    beta = np.cov(daily, bench_daily)[0, 1] / bench_daily.var()
+    drawdown = (1 - equity / equity.cummax()).max()
+    return sharpe, sortino, beta, drawdown
+
+
+def test_incremental_metrics_match_full_recompute(tmp_path):
+    rng = np.random.default_rng(7)
+    values = list(100 * np.cumprod(1 + rng.normal(0.001, 0.02, 60)))
+    bench = list(6000 * np.cumprod(1 + rng.normal(0.0005, 0.01, 60)))
+    frame = totals_frame(values)
+    closes = pd.Series(bench, index=frame["Date"])
+
+    path = tmp_path / "state.json"
+    MetricsEngine(path).sync(frame.iloc[:30], closes)
+    # A later run resumes from the persisted state with only the new rows.
+    m = MetricsEngine(path).sync(frame.iloc[29:], closes)
+
+    sharpe, sortino, beta, drawdown = reference(values, bench)
+    assert m.n_days == 60 and m.final_equity == values[-1]
+    assert np.isclose(m.sharpe, sharpe) and np.isclose(m.sortino, sortino)
+    assert np.isclose(m.beta, beta) and np.isclose(m.max_drawdown, drawdown)
+    assert np.isclose(m.cagr, (values[-1] / values[0]) ** (252 / 59) - 1)
+
+
+def test_rerun_on_same_day_replaces_latest_equity():
+    engine = MetricsEngine()
+    engine.sync(totals_frame([100.0, 90.0, 85.0, 95.0]))
+    engine.update(pd.Timestamp("2025-07-02"), 120.0)  # last business day, restated
+    fresh = MetricsEngine()
+    fresh.sync(totals_frame([100.0, 90.0, 85.0, 120.0]))
+    assert engine.metrics() == fresh.metrics()
+    assert abs(engine.metrics().max_drawdown - 0.15) < 1e-12
+
+
+def test_pending_totals_reads_only_new_rows(tmp_path):
+    storage = CsvStorage(tmp_path)
+    rows = []
+    for date, eq in zip(["2025-07-01", "2025-07-02", "2025-07-03"], [100.0, 101.0, 99.0]):
+        rows.append({"Date": date, "Ticker": "TOTAL", "Total Equity": eq, "Cash Balance": eq})
+        storage.save_portfolio_snapshot(date, pd.DataFrame(rows[-1:]))
+        if date == "2025-07-02":
+            engine = MetricsEngine(tmp_path / "state.json")
+            engine.sync(engine.pending_totals(storage))
+    engine = MetricsEngine(tmp_path / "state.json")
+    pending = engine.pending_totals(storage)
+    assert list(pending["Date"].dt.strftime("%Y-%m-%d")) == ["2025-07-02", "2025-07-03"]
+    assert engine.sync(pending).n_days == 3
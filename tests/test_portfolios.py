@@ -0,0 +1,80 @@
+from dataclasses import replace
+
+import pandas as pd
+
+import trading_script as ts
+from config import load_config
+from marketdata.benchmarks import BenchmarkStore, set_default_benchmarks
+from marketdata.cache import BarCache, set_default_cache
+from orchestration.portfolios import MarketData, run_portfolios
+
+
+def _bar(low: float, close: float, day: str = "2025-08-01") -> pd.DataFrame:
+    return pd.DataFrame(
+        {"Open": [close], "High": [close + 0.5], "Low": [low], "Close": [close], "Volume": [1000]},
+        index=pd.to_datetime([day]),
+    )
+
+
+def _seed(data_dir, holdings, cash):
+    rows = [{"Date": "2025-07-31", "Ticker": t, "Shares": n, "Buy Price": p, "Cost Basis": n * p, "Stop Loss": s} for t, n, p, s in holdings]
+    rows.append({"Date": "2025-07-31", "Ticker": "TOTAL", "Cash Balance": cash, "Total Equity": cash + sum(n * p for _, n, p, _ in holdings)})
+    ts.PortfolioContext.open(data_dir, "csv").storage.save_portfolio_snapshot("2025-07-31", pd.DataFrame(rows))
+    return data_dir
+
+
+def _portfolios(tmp_path):
+    (tmp_path / "empty").mkdir()
+    return [
+        _seed(tmp_path / "alpha", [("AAA", 3, 8.0, 7.0), ("BBB", 10, 5.0, 4.2)], 100.0),
+        _seed(tmp_path / "beta", [("BBB", 4, 5.0, 3.0), ("CCC", 2, 1.0, 0.5)], 50.0),
+        tmp_path / "empty",
+    ]
+
+
+BARS = {"AAA": _bar(9.5, 10.0), "BBB": _bar(4.0, 4.4), "CCC": _bar(1.1, 1.2)}
+
+
+def _cfg():
+    return replace(load_config(), mode="dry-run", storage_backend="csv")
+
+
+def _check(summary):
+    alpha, beta, empty = summary.runs
+    assert (alpha.holdings, alpha.cash, alpha.equity, alpha.stop_sells) == (1, 142.0, 172.0, ["BBB"])
+    assert (beta.holdings, beta.cash, beta.equity, beta.stop_sells) == (2, 50.0, 70.0, [])
+    assert alpha.metrics["n_days"] == 2 and "Saving results to CSV" in alpha.output
+    assert empty.error == "ValueError: no portfolio history to update"
+    totals = summary.to_dict()
+    assert (totals["portfolios"], totals["failed"], totals["equity"], totals["stop_sells"]) == (3, 1, 242.0, 1)
+    assert "FAILED" in summary.table()
+    trades = pd.read_csv(alpha.data_dir + "/chatgpt_trade_log.csv")
+    assert trades["Ticker"].tolist() == ["BBB"]
+
+
+def test_portfolios_share_one_market_data_fetch(tmp_path):
+    calls = []
+
+    def fake_fetch(symbols, interval, start, end):
+        calls.append(sorted(symbols))
+        bars = {**BARS, "^SPX": _bar(5000.0, 5000.0)}
+        return {s: bars[s] for s in symbols if s in bars}
+
+    cache = BarCache(tmp_path / "ohlcv.sqlite", fetcher=fake_fetch)
+    set_default_cache(cache)
+    set_default_benchmarks(BenchmarkStore(tmp_path / "benchmarks.sqlite", bars=cache))
+    try:
+        summary = run_portfolios(_portfolios(tmp_path), _cfg(), workers=1)
+    finally:
+        set_default_cache(None)
+        set_default_benchmarks(None)
+    assert calls == [["AAA", "BBB", "CCC"], ["^SPX"]]
+    assert summary.tickers == 3
+    _check(summary)
+
+
+def test_portfolios_run_in_worker_processes(tmp_path):
+    bars = pd.concat(BARS, names=["Ticker"]).groupby(level="Ticker").last()[["Low", "Close"]]
+    summary = run_portfolios(_portfolios(tmp_path), _cfg(), workers=3, market=MarketData(bars=bars))
+    _check(summary)
+    assert summary.runs[0].metrics["beta"] is None
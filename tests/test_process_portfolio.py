@@ -0,0 +1,70 @@
+import pandas as pd
+
+import trading_script as ts
+from marketdata.cache import BarCache, set_default_cache
+
+
+def _bar(low: float, close: float) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"Open": [close], "High": [close + 0.5], "Low": [low], "Close": [close], "Volume": [1000]},
+        index=pd.to_datetime(["2025-08-01"]),
+    )
+
+
+def test_process_portfolio_batches_download_and_applies_stops(tmp_path):
+    bars = {"AAA": _bar(9.5, 10.0), "BBB": _bar(4.0, 4.4)}
+    calls = []
+
+    def fake_fetch(symbols, interval, start, end):
+        calls.append(list(symbols))
+        return {s: bars[s] for s in symbols if s in bars}
+
+    set_default_cache(BarCache(tmp_path / "ohlcv.sqlite", fetcher=fake_fetch))
+    ctx = ts.PortfolioContext.open(tmp_path, "csv")
+    portfolio = [
+        {"ticker": "AAA", "shares": 3, "buy_price": 8.0, "cost_basis": 24.0, "stop_loss": 7.0},
+        {"ticker": "BBB", "shares": 10, "buy_price": 5.0, "cost_basis": 50.0, "stop_loss": 4.2},
+        {"ticker": "CCC", "shares": 1, "buy_price": 1.0, "cost_basis": 1.0, "stop_loss": 0.5},
+    ]
+    holdings, cash = ts.process_portfolio(portfolio, 100.0, interactive=False, ctx=ctx)
+
+    assert calls == [["AAA", "BBB", "CCC"]]
+    assert list(holdings["ticker"]) == ["AAA", "CCC"]
+    assert cash == 142.0
+
+    out = pd.read_csv(tmp_path / "chatgpt_portfolio_update.csv")
+    assert list(out["Action"].fillna("")) == ["HOLD", "SELL - Stop Loss Triggered", "NO DATA", ""]
+    total = out[out["Ticker"] == "TOTAL"].iloc[0]
+    assert total["Total Value"] == 30.0
+    assert total["PnL"] == 6.0
+    assert total["Total Equity"] == 172.0
+
+    trades = pd.read_csv(tmp_path / "chatgpt_trade_log.csv")
+    assert trades["Ticker"].tolist() == ["BBB"]
+    assert trades["Sell Price"].tolist() == [4.2]
+
+
+def test_stop_sells_get_a_finite_risk_context_next_to_no_data_holdings(tmp_path):
+    import math
+
+    from exchange.simulated import ManualClock, PriceFeed, SimulatedExchange
+    from execution.executor import Executor
+    from risk.manager import RiskConfig, RiskManager
+
+    set_default_cache(BarCache(tmp_path / "ohlcv.sqlite", fetcher=lambda symbols, interval, start, end: {"BBB": _bar(4.0, 4.4)}))
+    feed = PriceFeed(spread_pct=0.0)
+    feed.set_price("BBB", 4.2)
+    executor = Executor(SimulatedExchange(feed, cash=1000.0, clock=ManualClock()), RiskManager(RiskConfig()))
+    executor._log = lambda msg: None
+    seen = []
+    place = executor.place_and_reconcile
+    executor.place_and_reconcile = lambda item, ctx=None: seen.append(ctx) or place(item, ctx)
+    ctx = ts.PortfolioContext.open(tmp_path, "csv", executor=executor)
+    portfolio = [
+        {"ticker": "BBB", "shares": 10, "buy_price": 5.0, "cost_basis": 50.0, "stop_loss": 4.2},
+        {"ticker": "CCC", "shares": 1, "buy_price": 1.0, "cost_basis": 1.0, "stop_loss": 0.5},
+    ]
+    ts.process_portfolio(portfolio, 100.0, interactive=False, ctx=ctx)
+    (equity,) = seen
+    assert all(math.isfinite(v) for v in (equity.equity, equity.symbol_exposure, equity.day_realized_pnl_pct))
+    assert equity.equity == 100.0 + 10 * 4.2 + 1 * 1.0
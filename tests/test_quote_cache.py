@@ -0,0 +1,52 @@
+import threading
+
+from exchange.base import Quote
+from exchange.quote_cache import QuoteCache
+
+
+class BatchClient:
+    def __init__(self):
+        self.calls = []
+        self.price = 10.0
+        self.refreshed = threading.Event()
+
+    def get_quote(self, symbol):
+        raise AssertionError("per-symbol quote requested")
+
+    def get_quotes(self, symbols):
+        self.calls.append(list(symbols))
+        self.refreshed.set()
+        return {s: Quote(symbol=s, bid=self.price - 0.01, ask=self.price + 0.01, last=self.price, timestamp=None) for s in symbols}
+
+
+def test_misses_are_fetched_in_one_request_and_shared():
+    now = [0.0]
+    client = BatchClient()
+    cache = QuoteCache(client, ttl_seconds=2.0, stale_seconds=5.0, clock=lambda: now[0])
+    first = cache.get_quotes(["AAA", "BBB", "CCC"])
+    assert client.calls == [["AAA", "BBB", "CCC"]]
+    now[0] = 1.0
+    assert cache.get_quote("BBB") is first["BBB"]
+    cache.get_quotes(["AAA", "DDD"])
+    assert client.calls[-1] == ["DDD"]
+
+
+def test_stale_quotes_are_served_while_revalidating():
+    now = [0.0]
+    client = BatchClient()
+    cache = QuoteCache(client, ttl_seconds=2.0, stale_seconds=5.0, clock=lambda: now[0])
+    cache.get_quote("AAA")
+    client.refreshed.clear()
+    client.price = 11.0
+    now[0] = 3.0
+    assert cache.get_quote("AAA").last == 10.0
+    assert client.refreshed.wait(2.0)
+    for _ in range(100):
+        if cache.get_quote("AAA").last == 11.0:
+            break
+        threading.Event().wait(0.01)
+    assert cache.get_quote("AAA").last == 11.0
+
+    now[0] = 20.0
+    client.price = 12.0
+    assert cache.get_quote("AAA").last == 12.0
@@ -0,0 +1,102 @@
+import math
+import random
+
+import pytest
+
+from exchange.base import OrderRequest, Quote
+from risk.manager import EquityContext, RiskConfig, RiskManager
+
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is b
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+def _assert_parity(rm, reqs, quotes, ctxs, opens):
+    batch = rm.evaluate_batch(reqs, quotes, ctxs, opens)
+    for i, (r, q, c, o) in enumerate(zip(reqs, quotes, ctxs, opens)):
+        want = rm.evaluate(r, q, c, o)
+        got = batch[i]
+        assert (got.approved, got.reason, got.warn, got.block_new_entries) == (want.approved, want.reason, want.warn, want.block_new_entries), i
+        assert _same(got.adjusted_qty, want.adjusted_qty), i
+
+
+def _maybe(rng, values):
+    return rng.choice(values)
+
+
+def _random_case(rng):
+    price = rng.choice([0.0, 0.5, 1.0, 3.0, 10.0, 250.0, float("nan")])
+    bid = _maybe(rng, [None, price * 0.99, price * 0.9, 0.0, float("nan")])
+    ask = _maybe(rng, [None, price * 1.01, price, 0.0, -1.0])
+    last = _maybe(rng, [None, price, 0.0])
+    stop = _maybe(rng, [None, price * 0.9, price, price * 1.2, float("nan")])
+    req = OrderRequest(
+        symbol="X",
+        side=rng.choice(["buy", "sell"]),
+        qty=rng.choice([0.0, 1.0, 2.5, 10.0, 1000.0, -3.0]),
+        stop_price=stop,
+    )
+    quote = Quote(symbol="X", bid=bid, ask=ask, last=last, timestamp=None)
+    ctx = EquityContext(
+        equity=rng.choice([0.0, -5.0, 100.0, 10_000.0, float("nan")]),
+        symbol_exposure=rng.choice([0.0, 0.2, 0.39, 0.5]),
+        day_realized_pnl_pct=rng.choice([0.0, -0.01, -0.045, -0.05, -0.054, -0.06, -0.2, float("nan")]),
+        open_positions=rng.choice([0, 3, 5, 8]),
+        portfolio_heat_pct=rng.choice([0.0, 0.05, 0.09, 0.2]),
+    )
+    return req, quote, ctx, rng.random() < 0.9
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize(
+    "cfg",
+    [
+        RiskConfig(),
+        RiskConfig(allow_after_hours=True, max_notional_per_trade=1e6, min_price=0.0, max_spread_pct=1.0),
+        RiskConfig(max_position_risk_pct=0.5, max_portfolio_heat_pct=1.0, max_symbol_exposure_pct=0.05),
+    ],
+)
+def test_batch_matches_scalar_on_random_orders(cfg, seed):
+    rng = random.Random(seed)
+    rm = RiskManager(cfg)
+    cases = [_random_case(rng) for _ in range(400)]
+    reqs, quotes, ctxs, opens = (list(x) for x in zip(*cases))
+    _assert_parity(rm, reqs, quotes, ctxs, opens)
+
+
+def test_every_rejection_reason_is_covered():
+    rm = RiskManager(RiskConfig())
+    ok_quote = Quote("X", bid=9.99, ask=10.01, last=10.0, timestamp=None)
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0)
+    buy = OrderRequest(symbol="X", side="buy", qty=1.0)
+    cases = [
+        (buy, ok_quote, ctx, False),
+        (buy, ok_quote, EquityContext(1000.0, 0.0, -0.07), True),
+        (buy, ok_quote, EquityContext(1000.0, 0.0, -0.055), True),
+        (buy, Quote("X", None, None, None, None), ctx, True),
+        (buy, Quote("X", 0.4, 0.6, 0.5, None), ctx, True),
+        (buy, Quote("X", 9.0, 10.0, 10.0, None), ctx, True),
+        (buy, ok_quote, EquityContext(1000.0, 0.0, 0.0, open_positions=5), True),
+        (OrderRequest(symbol="X", side="buy", qty=100.0, stop_price=5.0), ok_quote, ctx, True),
+        (OrderRequest(symbol="X", side="buy", qty=1.0, stop_price=9.0), ok_quote, EquityContext(1000.0, 0.0, 0.0, portfolio_heat_pct=0.09), True),
+        (OrderRequest(symbol="X", side="buy", qty=3.0), ok_quote, ctx, True),
+        (buy, ok_quote, EquityContext(20.0, 0.0, 0.0), True),
+        (buy, ok_quote, EquityContext(1000.0, 0.0, -0.046), True),
+    ]
+    reqs, quotes, ctxs, opens = (list(x) for x in zip(*cases))
+    reasons = [d.reason.split(" ")[0] for d in rm.evaluate_batch(reqs, quotes, ctxs, opens)]
+    assert reasons == ["Market", "Daily", "Daily", "No", "Price", "Spread", "Max", "Qty", "Portfolio", "Notional", "Symbol", ""]
+    _assert_parity(rm, reqs, quotes, ctxs, opens)
+
+
+def test_shared_context_and_market_flag():
+    rm = RiskManager(RiskConfig())
+    reqs = [OrderRequest(symbol=s, side="buy", qty=1.0) for s in "ABC"]
+    quotes = [Quote(s, 9.99, 10.01, 10.0, None) for s in "ABC"]
+    ctx = EquityContext(equity=1000.0, symbol_exposure=0.0, day_realized_pnl_pct=0.0)
+    assert [d.approved for d in rm.evaluate_batch(reqs, quotes, ctx, True)] == [True] * 3
+    assert rm.evaluate_batch([], [], ctx, True) == []
+    with pytest.raises(ValueError):
+        rm.evaluate_batch(reqs, quotes[:2], ctx, True)
@@ -26,6 +26,17 @@ def test_daily_loss_tier_block_buy_only():
     assert not dec_buy.approved
     assert dec_sell.approved
 
+def test_exits_skip_entry_limits():
+    cfg = RiskConfig(max_notional_per_trade=25.0, min_price=1.0, max_spread_pct=0.03, daily_loss_cap_pct=0.06)
+    rm = RiskManager(cfg)
+    ctx = EquityContext(equity=100.0, symbol_exposure=0.0, day_realized_pnl_pct=-0.08, open_positions=1, portfolio_heat_pct=0.0)
+    wide = Quote(symbol="AAPL", bid=0.5, ask=0.8, last=0.6, timestamp=None)
+    sell = OrderRequest(symbol="AAPL", side="sell", qty=100.0)
+    assert not rm.evaluate(sell, wide, ctx, market_open=True).approved
+    dec = rm.evaluate_exit(sell, wide, market_open=True)
+    assert dec.approved and dec.adjusted_qty is None
+    assert not rm.evaluate_exit(sell, wide, market_open=False).approved
+
 def test_percent_of_equity_sizing_adjusts_qty():
     cfg = RiskConfig(max_position_risk_pct=0.02)
     rm = RiskManager(cfg)
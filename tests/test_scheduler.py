@@ -1,10 +1,95 @@
 from orchestration.scheduler import run_market_hours_loop
 
 def test_scheduler_runs_steps_until_time(monkeypatch):
+    from datetime import datetime, timedelta
+
     calls = {"n": 0}
+    clock = {"now": datetime(2025, 1, 2, 10, 0)}
     def is_open():
         return True
     def step():
         calls["n"] += 1
-    run_market_hours_loop(is_open, step, cadence_seconds=1, max_minutes=0.01)
-    assert calls["n"] >= 1
+    def sleep(seconds):
+        clock["now"] += timedelta(seconds=seconds)
+    run_market_hours_loop(is_open, step, cadence_seconds=1, max_minutes=0.01, sleep_fn=sleep, now_fn=lambda: clock["now"])
+    assert calls["n"] == 2  # steps at t=0s and t=1s, then past the 0.6s budget
+
+
+def test_scheduler_sleeps_through_closed_market_without_polling():
+    from datetime import datetime, timedelta
+
+    from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+
+    clock = {"now": datetime(2025, 1, 17, 17, 0, tzinfo=MARKET_TZ)}  # Friday after close
+    sleeps, checks, steps = [], [], []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += timedelta(seconds=seconds)
+
+    def is_open():
+        checks.append(clock["now"])
+        return True
+
+    run_market_hours_loop(
+        is_open,
+        lambda: steps.append(clock["now"]),
+        cadence_seconds=600,
+        max_minutes=4 * 24 * 60,
+        calendar=MarketCalendar(),
+        sleep_fn=sleep,
+        now_fn=lambda: clock["now"],
+    )
+    # MLK Monday is skipped; the first step runs at Tuesday's open.
+    assert steps[0] == datetime(2025, 1, 21, 9, 30, tzinfo=MARKET_TZ)
+    assert all(s.hour < 16 for s in steps)
+    # The broker is consulted once per session, not on every closed tick.
+    assert len(checks) == len({c.date() for c in checks})
+
+
+def test_scheduler_skips_session_when_broker_reports_closed():
+    from datetime import date, datetime, timedelta
+
+    from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+
+    clock = {"now": datetime(2025, 3, 13, 9, 0, tzinfo=MARKET_TZ)}  # Thursday
+    steps = []
+
+    def sleep(seconds):
+        clock["now"] += timedelta(seconds=seconds)
+
+    run_market_hours_loop(
+        lambda: clock["now"].date() != date(2025, 3, 13),  # unscheduled closure
+        lambda: steps.append(clock["now"]),
+        cadence_seconds=3600,
+        max_minutes=2 * 24 * 60,
+        calendar=MarketCalendar(),
+        sleep_fn=sleep,
+        now_fn=lambda: clock["now"],
+    )
+    assert steps and {s.date() for s in steps} == {date(2025, 3, 14)}
+
+
+def test_scheduler_retries_a_broker_that_opens_late():
+    from datetime import datetime, timedelta
+
+    from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+
+    clock = {"now": datetime(2025, 3, 13, 9, 0, tzinfo=MARKET_TZ)}
+    opens = datetime(2025, 3, 13, 9, 30, 0, 300000, tzinfo=MARKET_TZ)  # 300 ms behind the calendar
+    steps = []
+
+    def sleep(seconds):
+        clock["now"] += timedelta(seconds=seconds)
+
+    run_market_hours_loop(
+        lambda: clock["now"] >= opens,
+        lambda: steps.append(clock["now"]),
+        cadence_seconds=600,
+        max_minutes=50,
+        calendar=MarketCalendar(),
+        sleep_fn=sleep,
+        now_fn=lambda: clock["now"],
+        confirm_retry_seconds=5,
+    )
+    assert [s.strftime("%H:%M:%S") for s in steps][:2] == ["09:30:05", "09:40:05"]
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from marketdata.cache import BarCache
+from risk.manager import RiskConfig
+from strategy.screeners import screen_universe_detailed
+
+
+def _minute(close: float, high: float, low: float) -> pd.DataFrame:
+    idx = pd.date_range("2025-08-05 09:30", periods=2, freq="1min", tz="America/New_York")
+    return pd.DataFrame({"Open": close, "High": [high, high], "Low": [low, low], "Close": [close, close], "Volume": 100.0}, index=idx)
+
+
+BARS = {
+    "AAA": _minute(10.0, 10.1, 9.9),
+    "BBB": _minute(0.5, 0.51, 0.49),
+    "CCC": _minute(20.0, 20.1, 19.9),
+    "DDD": _minute(5.0, 6.0, 4.0),
+    "EEE": _minute(8.0, 8.02, 7.99),
+}
+
+
+def _cache(tmp_path, calls):
+    def fetch(symbols, interval, start, end):
+        calls.append(tuple(symbols))
+        return {s: BARS[s] for s in symbols if s in BARS}
+
+    now = pd.Timestamp("2025-08-05 10:00").timestamp()
+    return BarCache(tmp_path / "c.sqlite", fetcher=fetch, clock=lambda: now)
+
+
+def test_filters_and_ranks_across_batches(tmp_path):
+    calls = []
+    cfg = RiskConfig(min_price=1.0, max_spread_pct=0.03)
+    res = screen_universe_detailed(list(BARS) + ["ZZZ"], cfg, max_candidates=10, batch_size=2, max_workers=2, cache=_cache(tmp_path, calls))
+    assert res.symbols == ["EEE", "CCC", "AAA"]
+    assert sorted(calls) == [("AAA", "BBB"), ("CCC", "DDD"), ("EEE", "ZZZ")]
+    assert res.batches == 3 and res.scanned == 5
+    assert set(res.timings) == {"fetch", "filter", "rank", "total"}
+
+
+def test_early_stop_skips_remaining_batches(tmp_path):
+    calls = []
+    cfg = RiskConfig(min_price=1.0, max_spread_pct=0.03)
+    res = screen_universe_detailed(list(BARS), cfg, max_candidates=1, batch_size=1, max_workers=1, cache=_cache(tmp_path, calls))
+    assert res.symbols == ["AAA"]
+    assert calls == [("AAA",)]
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from exchange.base import OrderRequest
+from exchange.simulated import ManualClock, PriceFeed, SimulatedExchange
+from execution.executor import Executor, TradePlanItem
+from risk.manager import EquityContext, RiskConfig, RiskManager
+
+
+def _exchange(prices, **kwargs):
+    clock = ManualClock(0.0)
+    feed = PriceFeed(spread_pct=0.0)
+    for sym, series in prices.items():
+        feed.add(sym, [t for t, _ in series], [p for _, p in series])
+    return SimulatedExchange(feed, cash=10_000.0, clock=clock, **kwargs), clock
+
+
+def test_market_limit_and_stop_orders_follow_the_feed():
+    ex, clock = _exchange({"AAA": [(0, 10.0), (60, 9.0), (120, 12.0)]})
+    m = ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=5))
+    assert m.status == "filled" and m.avg_fill_price == 10.0
+    lim = ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=1, type="limit", limit_price=9.5))
+    stop = ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=1, type="stop", stop_price=11.0))
+    stop_lim = ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=1, type="stop_limit", stop_price=11.0, limit_price=11.5))
+    assert {o.id for o in ex.list_open_orders()} == {lim.id, stop.id, stop_lim.id}
+    clock.advance(60)
+    assert ex.get_order(lim.id).status == "filled"
+    assert ex.get_order(stop.id).status == "new"
+    clock.advance(60)
+    assert ex.get_order(stop.id).avg_fill_price == 12.0
+    # Triggered, but 12.0 is above the 11.5 limit, so it keeps resting.
+    assert ex.get_order(stop_lim.id).status == "new"
+    ex.cancel_order(stop_lim.id)
+    assert ex.list_open_orders() == []
+    pos = {p["symbol"]: p for p in ex.get_positions()}
+    assert pos["AAA"]["qty"] == 7
+    assert ex.cash == pytest.approx(10_000 - 50 - 9 - 12)
+
+
+def test_bracket_legs_and_partial_fills():
+    ex, clock = _exchange({"AAA": [(0, 10.0), (60, 8.5)]}, max_fill_qty=2)
+    parent = ex.place_order(
+        OrderRequest(symbol="AAA", side="buy", qty=3, stop_price=9.0, take_profit_price=12.0, order_class="bracket", client_order_id="p1")
+    )
+    assert parent.status == "partially_filled" and parent.filled_qty == 2
+    legs = {o.raw["client_order_id"]: o for o in ex.list_open_orders() if o.id != parent.id}
+    assert set(legs) == {"p1-stop", "p1-tp"} and legs["p1-stop"].qty == 2
+    ex.match()
+    assert ex.get_order(parent.id).status == "filled"
+    assert ex.get_order(legs["p1-stop"].id).qty == 3
+    clock.advance(60)
+    stop = ex.get_order(legs["p1-stop"].id)
+    assert stop.status == "partially_filled" and stop.avg_fill_price == 8.5
+    ex.match()
+    assert ex.get_order(legs["p1-stop"].id).status == "filled"
+    assert ex.get_order(legs["p1-tp"].id).status == "canceled"
+    assert ex.get_positions() == []
+
+
+def test_rejects_unknown_symbol_and_insufficient_cash():
+    ex, _ = _exchange({"AAA": [(0, 10.0)]})
+    assert ex.place_order(OrderRequest(symbol="ZZZ", side="buy", qty=1)).status == "rejected"
+    assert ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=10_000)).status == "rejected"
+    with pytest.raises(ValueError):
+        ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=1, type="limit"))
+
+
+def test_executor_runs_against_simulator_at_volume():
+    symbols = [f"S{i:03d}" for i in range(200)]
+    ex, _ = _exchange({s: [(0, 10.0)] for s in symbols})
+    ex.cash = 1e9
+    executor = Executor(ex, RiskManager(RiskConfig(max_notional_per_trade=1e6, max_positions=10_000, max_portfolio_heat_pct=1e6, max_symbol_exposure_pct=1.0, max_spread_pct=1.0)))
+    executor._log = lambda msg: None
+    ctx = EquityContext(equity=1e9, symbol_exposure=0.0, day_realized_pnl_pct=0.0)
+    items = [TradePlanItem(symbol=symbols[i % 200], side="buy", qty=1.0) for i in range(2000)]
+    t0 = time.perf_counter()
+    results = executor.place_batch(items, ctx)
+    elapsed = time.perf_counter() - t0
+    assert all(r.response is not None and r.response.status == "filled" for r in results)
+    assert sum(p["qty"] for p in ex.get_positions()) == 2000
+    assert elapsed < 5.0
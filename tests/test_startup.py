@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("pandas", "numpy", "alpaca", "openai", "yfinance", "dotenv", "trading_script", "research.llm_research")
+# Importing pandas alone costs more than this. Slow CI machines can raise it
+# through START_IMPORT_BUDGET_S, or set it to 0 to skip the timing check.
+IMPORT_BUDGET_S = float(os.environ.get("START_IMPORT_BUDGET_S", "0.35"))
+
+
+def _import_profile(module: str) -> tuple[set[str], float]:
+    code = f"import sys; import {module}; print('\\n'.join(sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            total_us = int(parts[1])
+    return set(proc.stdout.split()), total_us / 1e6
+
+
+def test_start_trading_imports_no_heavy_dependencies():
+    modules, seconds = _import_profile("start_trading")
+    loaded = sorted(m for m in modules if m.split(".")[0] in HEAVY or m in HEAVY)
+    assert loaded == []
+    assert not IMPORT_BUDGET_S or seconds < IMPORT_BUDGET_S
+
+
+def test_config_defaults_follow_the_environment(monkeypatch):
+    from config import load_config
+
+    monkeypatch.setenv("RISK_MAX_POSITIONS", "7")
+    monkeypatch.setenv("LLM_STREAM", "true")
+    cfg = load_config()
+    assert cfg.max_positions == 7
+    assert cfg.llm_stream is True
+    monkeypatch.delenv("RISK_MAX_POSITIONS")
+    assert load_config().max_positions == 5
@@ -0,0 +1,181 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+import trading_script as ts
+from exchange.base import OrderRequest
+from exchange.simulated import ManualClock, PriceFeed, SimulatedExchange
+from execution.executor import Executor
+from execution.ledger import PortfolioLedger
+from execution.stop_monitor import PriceBatch, QuoteFeed, ReplayFeed, StopBook, StopMonitor
+from risk.manager import RiskConfig, RiskManager
+
+
+def _ny(stamp):
+    return pd.Timestamp(stamp, tz="America/New_York").timestamp()
+
+
+def _bars(opens, lows, start="2025-08-01 13:30"):
+    idx = pd.date_range(start, periods=len(lows), freq="min", tz="UTC")
+    return pd.DataFrame({"Open": opens, "High": opens, "Low": lows, "Close": opens, "Volume": 100}, index=idx)
+
+
+def test_replayed_minute_bars_fire_each_stop_once():
+    book = StopBook.from_portfolio(
+        [
+            {"ticker": "AAA", "shares": 3, "buy_price": 10.0, "stop_loss": 9.0},
+            {"ticker": "BBB", "shares": 5, "buy_price": 5.0, "stop_loss": 4.0},
+            {"ticker": "CCC", "shares": 1, "buy_price": 2.0, "stop_loss": ""},
+        ]
+    )
+    feed = ReplayFeed.from_bars(
+        {
+            "AAA": _bars([10.0, 9.5, 9.2, 8.0], [9.8, 9.1, 8.9, 7.5]),  # crosses intrabar at minute 3
+            "BBB": _bars([5.0, 3.5], [4.9, 3.4], start="2025-08-01 13:31"),  # gaps below the stop
+            "CCC": _bars([2.0, 0.1], [2.0, 0.1]),  # no stop, never sold
+        }
+    )
+    monitor = StopMonitor(book)
+    fills = monitor.run(feed)
+    assert [(f.symbol, f.shares, f.fill_price) for f in fills] == [("AAA", 3.0, 9.0), ("BBB", 5.0, 3.5)]
+    assert fills[0].pnl == -3.0 and fills[1].trigger_price == 3.4
+    assert monitor.ticks == 4 and book.symbols() == ()
+    assert book.last_price("AAA") == 7.5
+
+
+def test_crossed_stops_sell_through_the_executor():
+    clock = ManualClock(0.0)
+    prices = PriceFeed(spread_pct=0.0)
+    prices.add("AAA", [0, 60], [10.0, 8.5])
+    prices.add("BBB", [0, 60], [20.0, 21.0])
+    ex = SimulatedExchange(prices, cash=1_000.0, clock=clock)
+    ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=4))
+    ex.place_order(OrderRequest(symbol="BBB", side="buy", qty=2))
+    # Default entry limits: the 34-dollar exit is over the notional cap but must not be resized.
+    executor = Executor(ex, RiskManager(RiskConfig()), ledger=PortfolioLedger.from_account(ex))
+    executor._log = lambda msg: None
+    book = StopBook()
+    book.set("AAA", 4, 9.0, cost=10.0)
+    book.set("BBB", 2, 18.0, cost=20.0)
+    monitor = StopMonitor(book, executor=executor)
+    feed = QuoteFeed(ex.get_quotes, book.symbols, clock=clock)
+
+    assert monitor.poll(feed) == []
+    clock.advance(60)
+    (fill,) = monitor.poll(feed)
+    assert (fill.symbol, fill.shares, fill.fill_price, fill.error) == ("AAA", 4.0, 8.5, None)
+    assert fill.response is not None and fill.response.status == "filled"
+    assert {p["symbol"]: p["qty"] for p in ex.get_positions()} == {"BBB": 2}
+    assert monitor.poll(feed) == [] and book.symbols() == ("BBB",)
+
+
+def test_trading_script_monitor_logs_the_sale_and_rewrites_today(tmp_path):
+    ctx = ts.PortfolioContext.open(tmp_path, "csv")
+    ctx.storage.save_portfolio_snapshot(
+        "2025-07-31",
+        pd.DataFrame(
+            [
+                {"Date": "2025-07-31", "Ticker": "AAA", "Shares": 3, "Buy Price": 10.0, "Cost Basis": 30.0, "Stop Loss": 9.0},
+                {"Date": "2025-07-31", "Ticker": "BBB", "Shares": 5, "Buy Price": 5.0, "Cost Basis": 25.0, "Stop Loss": 4.0},
+                {"Date": "2025-07-31", "Ticker": "TOTAL", "Cash Balance": 100.0, "Total Equity": 155.0},
+            ]
+        ),
+    )
+    t0 = _ny("2025-08-01 10:00")
+    feed = ReplayFeed([t0, t0 + 60], ["AAA", "BBB"], [[9.5, 4.5], [8.8, 4.6]])
+    fills = ts.monitor_stops(feed, interval=0, ctx=ctx)
+    assert [f.symbol for f in fills] == ["AAA"]
+
+    trades = ctx.storage.trades()
+    assert list(trades["Ticker"]) == ["AAA"] and trades["Sell Price"].iloc[0] == 9.0
+    assert trades["Date"].iloc[0] == "2025-08-01"
+    snap = ctx.storage.latest_snapshot()
+    assert snap.date == "2025-08-01"
+    assert [h["ticker"] for h in snap.holdings] == ["BBB"]
+    assert snap.cash == 127.0
+    assert snap.total_equity == 127.0 + 5 * 4.6
+
+
+def test_a_long_running_monitor_books_each_day_on_the_latest_snapshot(tmp_path):
+    ctx = ts.PortfolioContext.open(tmp_path, "csv")
+    aaa = {"Ticker": "AAA", "Shares": 3, "Buy Price": 10.0, "Cost Basis": 30.0, "Stop Loss": 9.0}
+    ctx.storage.save_portfolio_snapshot(
+        "2025-07-31",
+        pd.DataFrame([{"Date": "2025-07-31", **aaa}, {"Date": "2025-07-31", "Ticker": "TOTAL", "Cash Balance": 100.0, "Total Equity": 130.0}]),
+    )
+    monitor, _ = ts.stop_monitor(ReplayFeed([], [], []), ctx=ctx)
+    # A later run buys CCC and spends cash after the monitor was built.
+    ctx.storage.save_portfolio_snapshot(
+        "2025-08-01",
+        pd.DataFrame(
+            [
+                {"Date": "2025-08-01", **aaa},
+                {"Date": "2025-08-01", "Ticker": "CCC", "Shares": 2, "Buy Price": 5.0, "Cost Basis": 10.0, "Stop Loss": 4.0},
+                {"Date": "2025-08-01", "Ticker": "TOTAL", "Cash Balance": 90.0, "Total Equity": 130.0},
+            ]
+        ),
+    )
+    t = _ny("2025-08-04 11:00")
+    (fill,) = monitor.run(ReplayFeed([t], ["AAA"], [[8.5]]), interval=0)
+    assert fill.shares == 3.0
+    assert ctx.storage.trades()["Date"].tolist() == ["2025-08-04"]
+    snap = ctx.storage.latest_snapshot()
+    assert snap.date == "2025-08-04"
+    assert [h["ticker"] for h in snap.holdings] == ["CCC"]
+    assert snap.cash == 90.0 + 3 * 9.0  # simulated fills are capped at the stop
+
+
+def test_failed_stop_sells_are_not_booked_and_retry(tmp_path, monkeypatch):
+    monkeypatch.setattr("execution.executor.time.sleep", lambda s: None)
+    clock = ManualClock(_ny("2025-08-01 10:00"))
+    prices = PriceFeed(spread_pct=0.0)
+    prices.add("AAA", [clock()], [6.0])
+    ex = SimulatedExchange(prices, cash=1_000.0, clock=clock)
+    ex.place_order(OrderRequest(symbol="AAA", side="buy", qty=3))
+    executor = Executor(ex, RiskManager(RiskConfig()), ledger=PortfolioLedger.from_account(ex))
+    executor._log = lambda msg: None
+    ctx = ts.PortfolioContext.open(tmp_path, "csv", executor=executor)
+    ctx.storage.save_portfolio_snapshot(
+        "2025-07-31",
+        pd.DataFrame(
+            [
+                {"Date": "2025-07-31", "Ticker": "AAA", "Shares": 3, "Buy Price": 10.0, "Cost Basis": 30.0, "Stop Loss": 9.0},
+                {"Date": "2025-07-31", "Ticker": "TOTAL", "Cash Balance": 50.0, "Total Equity": 80.0},
+            ]
+        ),
+    )
+    place_order = ex.place_order
+
+    def broken(req):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(ex, "place_order", broken)
+    monitor, feed = ts.stop_monitor(QuoteFeed(ex.get_quotes, lambda: ("AAA",), clock=clock), ctx=ctx)
+    (failed,) = monitor.poll(feed)
+    assert failed.shares == 0 and "broker unavailable" in failed.error
+    assert ctx.storage.trades().empty
+    assert ctx.storage.latest_snapshot().date == "2025-07-31"
+    assert monitor.book.symbols() == ("AAA",)
+
+    monkeypatch.setattr(ex, "place_order", place_order)
+    (fill,) = monitor.poll(feed)
+    assert (fill.shares, fill.fill_price, fill.error) == (3.0, 6.0, None)
+    assert list(ctx.storage.trades()["Ticker"]) == ["AAA"]
+    assert ctx.storage.latest_snapshot().cash == 68.0
+
+
+def test_checking_thousands_of_stops_per_tick_is_fast():
+    n = 5_000
+    book = StopBook()
+    symbols = tuple(f"S{i:05d}" for i in range(n))
+    for s in symbols:
+        book.set(s, 10, 5.0)
+    monitor = StopMonitor(book)
+    batch = PriceBatch(0.0, symbols, np.full(n, 6.0))
+    monitor.process(batch)  # resolves the symbol slots once
+    t0 = time.perf_counter()
+    for _ in range(200):
+        monitor.process(batch)
+    per_tick = (time.perf_counter() - t0) / 200
+    assert per_tick < 1e-3
@@ -0,0 +1,95 @@
+import pandas as pd
+
+from storage.backend import CsvStorage, SqliteStorage, open_storage
+
+HISTORY = """Date,Ticker,Shares,Buy Price,Cost Basis,Stop Loss,Current Price,Total Value,PnL,Action,Cash Balance,Total Equity
+2025-08-01,AAA,3,8.0,24.0,7.0,9.0,27.0,3.0,HOLD,,
+2025-08-01,TOTAL,,,,,,27.0,3.0,,73.0,100.0
+2025-08-04,AAA,3,8.0,24.0,7.0,10.0,30.0,6.0,HOLD,,
+2025-08-04,BBB,2,5.0,10.0,4.5,5.5,11.0,1.0,HOLD,,
+2025-08-04,TOTAL,,,,,,41.0,7.0,,63.0,104.0
+"""
+TRADES = """Date,Ticker,Shares Bought,Buy Price,Cost Basis,PnL,Reason,Shares Sold,Sell Price
+2025-08-01,AAA,3,8.0,24.0,0.0,MANUAL BUY - New position,,
+2025-08-04,BBB,2,5.0,10.0,0.0,MANUAL BUY - New position,,
+"""
+
+
+def _seed(data_dir):
+    (data_dir / "chatgpt_portfolio_update.csv").write_text(HISTORY)
+    (data_dir / "chatgpt_trade_log.csv").write_text(TRADES)
+
+
+def test_sqlite_matches_csv_queries(tmp_path):
+    _seed(tmp_path)
+    csv_store = CsvStorage(tmp_path)
+    sql_store = open_storage("sqlite", tmp_path)
+    assert isinstance(sql_store, SqliteStorage)
+
+    a, b = csv_store.latest_snapshot(), sql_store.latest_snapshot()
+    assert a == b
+    assert b.date == "2025-08-04" and b.cash == 63.0 and [h["ticker"] for h in b.holdings] == ["AAA", "BBB"]
+
+    pd.testing.assert_frame_equal(csv_store.total_equity_series(), sql_store.total_equity_series(), check_dtype=False)
+    assert sql_store.trades(ticker="BBB")["Date"].tolist() == ["2025-08-04"]
+    assert len(sql_store.trades(start="2025-08-02")) == 1
+
+
+def test_csv_equity_since_reads_only_the_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr("storage.backend._TAIL_CHUNK", 40)
+    store = CsvStorage(tmp_path)
+    days = pd.bdate_range("2025-08-01", periods=12).strftime("%Y-%m-%d")
+    for i, day in reversed(list(enumerate(days))):  # newest first: every save is a backfill
+        store.save_portfolio_snapshot(
+            day,
+            pd.DataFrame(
+                [
+                    {"Date": day, "Ticker": "AAA", "Shares": 1, "Buy Price": 1.0},
+                    {"Date": day, "Ticker": "TOTAL", "Cash Balance": 10.0, "Total Equity": 100.0 + i},
+                ]
+            ),
+        )
+    assert list(pd.read_csv(tmp_path / "chatgpt_portfolio_update.csv")["Date"].unique()) == list(days)
+    since = store.total_equity_series(since=days[9])
+    assert since["Total Equity"].tolist() == [109.0, 110.0, 111.0]
+    assert len(store._history_since(days[9])) < 10  # stopped a chunk or so before days[9]
+    full = store.total_equity_series()
+    pd.testing.assert_frame_equal(store.total_equity_series(since=days[0]), full)
+
+
+def test_sqlite_snapshot_replaces_day_and_exports_csv_layout(tmp_path):
+    _seed(tmp_path)
+    store = open_storage("sqlite", tmp_path)
+    rows = pd.DataFrame(
+        [
+            {"Date": "2025-08-04", "Ticker": "AAA", "Shares": 3, "Buy Price": 8.0, "Cost Basis": 24.0, "Stop Loss": 7.0, "Current Price": 10.5, "Total Value": 31.5, "PnL": 7.5, "Action": "HOLD", "Cash Balance": "", "Total Equity": ""},
+            {"Date": "2025-08-04", "Ticker": "TOTAL", "Shares": "", "Buy Price": "", "Cost Basis": "", "Stop Loss": "", "Current Price": "", "Total Value": 31.5, "PnL": 7.5, "Action": "", "Cash Balance": 74.0, "Total Equity": 105.5},
+        ]
+    )
+    store.save_portfolio_snapshot("2025-08-04", rows)
+    store.append_execution({"timestamp": "1", "symbol": "AAA", "side": "sell", "qty": 2, "status": "filled"})
+
+    out = tmp_path / "export"
+    store.export_csv(out)
+    exported = (out / "chatgpt_portfolio_update.csv").read_text().splitlines()
+    assert exported[:3] == HISTORY.splitlines()[:3]
+    assert exported[3] == "2025-08-04,AAA,3,8.0,24.0,7.0,10.5,31.5,7.5,HOLD,,"
+    assert exported[4] == "2025-08-04,TOTAL,,,,,,31.5,7.5,,74.0,105.5"
+    assert (out / "chatgpt_trade_log.csv").read_text() == TRADES
+    assert "AAA,sell,2" in (out / "execution_log.csv").read_text()
+
+
+def test_default_context_opens_the_configured_backend(tmp_path, monkeypatch):
+    from dataclasses import replace
+
+    import trading_script as ts
+    from config import load_config
+
+    _seed(tmp_path)
+    monkeypatch.setattr(ts, "_DEFAULT_CONTEXT", ts.PortfolioContext.open(tmp_path, "csv"))
+    cfg = replace(load_config(), mode="dry-run", storage_backend="sqlite")
+    ctx = ts.open_context(None, cfg)
+    assert isinstance(ctx.storage, SqliteStorage) and ctx.data_dir == tmp_path
+    assert ctx.storage.latest_snapshot().cash == 63.0
+    csv = ts.open_context(None, replace(cfg, storage_backend="csv"))
+    assert csv.storage is ts.default_context().storage
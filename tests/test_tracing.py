@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from observability import tracing
+from observability.tracing import span, summarize_files, traced
+from storage.trade_log import TradeLogWriter
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    t = tracing.enable(tmp_path / "spans.jsonl")
+    yield t
+    tracing.disable()
+
+
+def test_spans_are_noops_while_disabled():
+    tracing.disable()
+
+    @traced("noop.fn")
+    def fn(x):
+        return x + 1
+
+    with span("noop.block", a=1) as s:
+        s.set(b=2)
+    assert fn(1) == 2
+    assert span("other") is span("noop.block")
+    assert tracing.active() is None
+
+
+def test_spans_write_jsonl_and_percentile_summary(tracer, tmp_path):
+    @traced("demo.fn")
+    def fn():
+        return "ok"
+
+    for _ in range(10):
+        assert fn() == "ok"
+    with span("demo.block", rows=3) as s:
+        s.set(extra="x")
+    with pytest.raises(ValueError):
+        with span("demo.block"):
+            raise ValueError("boom")
+
+    lines = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    assert [r["name"] for r in lines].count("demo.fn") == 10
+    block = [r for r in lines if r["name"] == "demo.block"]
+    assert block[0]["rows"] == 3 and block[0]["extra"] == "x" and block[0]["error"] is None
+    assert block[1]["error"] == "ValueError: boom"
+
+    summary = tracer.summary()
+    assert summary["demo.fn"]["count"] == 10
+    assert summary["demo.block"]["errors"] == 1
+    assert summary["demo.fn"]["p50_ms"] <= summary["demo.fn"]["p99_ms"] <= summary["demo.fn"]["max_ms"]
+
+    tracing.disable()
+    written = json.loads((tmp_path / "spans.summary.json").read_text())
+    assert written["demo.fn"]["count"] == 10
+    assert summarize_files([tmp_path / "spans.jsonl"])["demo.block"]["count"] == 2
+
+
+def test_span_file_rotates(tmp_path):
+    tracing.enable(tmp_path / "spans.jsonl", max_bytes=400, backups=2)
+    try:
+        for i in range(50):
+            with span("rotate", i=i):
+                pass
+    finally:
+        tracing.disable()
+    files = sorted(tmp_path.glob("spans.jsonl*"))
+    assert [f.name for f in files] == ["spans.jsonl", "spans.jsonl.1", "spans.jsonl.2"]
+    assert all(f.stat().st_size <= 400 for f in files)
+
+
+def test_csv_writes_are_traced(tracer, tmp_path):
+    writer = TradeLogWriter(tmp_path / "trades.csv", fsync=False)
+    writer.append({"Date": "2025-01-02", "Ticker": "ABC"})
+    with writer.batch():
+        writer.append({"Date": "2025-01-03", "Ticker": "ABC"})
+        writer.append({"Date": "2025-01-03", "Ticker": "XYZ"})
+    spans = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    appends = [s for s in spans if s["name"] == "csv.trade_log.append"]
+    assert [s["rows"] for s in appends] == [1, 2]
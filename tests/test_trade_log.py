@@ -0,0 +1,54 @@
+import csv
+
+from storage.trade_log import TRADE_LOG_COLUMNS, TradeLogWriter
+
+
+def _rows(path):
+    with path.open(newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_buy_and_sell_rows_share_one_header(tmp_path):
+    path = tmp_path / "trade_log.csv"
+    log = TradeLogWriter(path)
+    log.append({"Date": "2025-08-01", "Ticker": "AAA", "Shares Bought": 2, "Buy Price": 5.0, "Cost Basis": 10.0, "PnL": 0.0, "Reason": "MANUAL BUY - New position"})
+    log.append({"Date": "2025-08-02", "Ticker": "AAA", "Shares Sold": 2, "Sell Price": 6.0, "Cost Basis": 5.0, "PnL": 2.0, "Reason": "AUTOMATED SELL - STOPLOSS TRIGGERED"})
+    rows = _rows(path)
+    assert rows[0] == TRADE_LOG_COLUMNS
+    assert rows[1] == ["2025-08-01", "AAA", "2", "5.0", "10.0", "0.0", "MANUAL BUY - New position", "", ""]
+    assert rows[2] == ["2025-08-02", "AAA", "", "", "5.0", "2.0", "AUTOMATED SELL - STOPLOSS TRIGGERED", "2", "6.0"]
+
+
+def test_batch_defers_writes_until_exit(tmp_path):
+    path = tmp_path / "trade_log.csv"
+    log = TradeLogWriter(path)
+    with log.batch():
+        log.append({"Date": "2025-08-01", "Ticker": "AAA"})
+        log.append({"Date": "2025-08-01", "Ticker": "BBB"})
+        assert not path.exists()
+    assert [r[1] for r in _rows(path)[1:]] == ["AAA", "BBB"]
+
+
+def test_torn_tail_is_dropped_and_legacy_header_migrated(tmp_path):
+    path = tmp_path / "trade_log.csv"
+    path.write_text("Date,Ticker,Shares Sold,Sell Price,Cost Basis,PnL,Reason\n2025-08-01,AAA,1,4.0,5.0,-1.0,STOP\n2025-08-02,BB")
+    TradeLogWriter(path).append({"Date": "2025-08-03", "Ticker": "CCC", "Shares Bought": 1, "Buy Price": 3.0})
+    rows = _rows(path)
+    assert rows[0] == ["Date", "Ticker", "Shares Sold", "Sell Price", "Cost Basis", "PnL", "Reason", "Shares Bought", "Buy Price"]
+    assert rows[1] == ["2025-08-01", "AAA", "1", "4.0", "5.0", "-1.0", "STOP", "", ""]
+    assert rows[2] == ["2025-08-03", "CCC", "", "", "", "", "", "1", "3.0"]
+    assert len(rows) == 3
+
+
+def test_unterminated_complete_lines_are_kept(tmp_path):
+    path = tmp_path / "trade_log.csv"
+    path.write_text(",".join(TRADE_LOG_COLUMNS))
+    log = TradeLogWriter(path)
+    log.append({"Date": "2025-07-02", "Ticker": "XYZ"})
+    assert _rows(path) == [TRADE_LOG_COLUMNS, ["2025-07-02", "XYZ", "", "", "", "", "", "", ""]]
+
+    # A hand-edited file whose last row has no newline.
+    with path.open("a", newline="") as f:
+        f.write("2025-07-03,ABC,,,,,,1,2.0")
+    log.append({"Date": "2025-07-04", "Ticker": "DEF"})
+    assert [r[1] for r in _rows(path)[1:]] == ["XYZ", "ABC", "DEF"]
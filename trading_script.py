@@ -5,59 +5,229 @@ results. It is intentionally lightweight and avoids changing existing
 logic or behaviour.
 """
 
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
-from typing import Any, cast
+from typing import Any
 import os
-import time
 from typing import Optional
+from analytics.metrics import METRICS_STATE_FILE, MetricsEngine, PerformanceMetrics
 from config import load_config, AppConfig
-from risk.manager import RiskManager, RiskConfig, EquityContext
+from risk.manager import RiskManager, RiskConfig
 from execution.executor import Executor, TradePlanItem
-from exchange.alpaca_client import AlpacaClient
+from exchange.quote_cache import QuoteCache
+from execution.ledger import PortfolioLedger
+from execution.stop_monitor import BarFeed, PriceSource, QuoteFeed, StopBook, StopFill, StopMonitor
+from marketdata.benchmarks import REPORT_BENCHMARKS, SP500, default_benchmarks
+from marketdata.cache import default_cache
+from observability.tracing import configure as configure_tracing, span, traced
+from orchestration.market_calendar import MARKET_TZ, MarketCalendar
+from storage.backend import (
+    PORTFOLIO_COLUMNS,
+    PORTFOLIO_FILE,
+    TRADE_LOG_FILE,
+    CsvStorage,
+    StorageBackend,
+    open_storage,
+    snapshot_from_history,
+)
 
-EXECUTOR: Optional[Executor] = None
-CFG: Optional[AppConfig] = None
+SCRIPT_DIR = Path(__file__).resolve().parent
 
 
-# Shared file locations
-SCRIPT_DIR = Path(__file__).resolve().parent
-DATA_DIR = SCRIPT_DIR  # Save files in the same folder as this script
-PORTFOLIO_CSV = DATA_DIR / "chatgpt_portfolio_update.csv"
-TRADE_LOG_CSV = DATA_DIR / "chatgpt_trade_log.csv"
+@dataclass
+class PortfolioContext:
+    """Where one portfolio lives and how its trades are executed.
+
+    Every function below that reads or writes portfolio state takes an
+    optional ``ctx``. Without one it uses the default context (see
+    :func:`set_data_dir`), so several portfolios can be processed side by
+    side in one interpreter without touching module state.
+
+    Attributes
+    ----------
+    data_dir:
+        Directory holding ``chatgpt_portfolio_update.csv``,
+        ``chatgpt_trade_log.csv`` and the metrics state.
+    storage:
+        Backend for portfolio history, trades and the execution audit.
+    executor:
+        Broker executor for stop-loss and manual trades; ``None`` in dry-run.
+    cfg:
+        Configuration the portfolio was opened with, if any.
+    """
+
+    data_dir: Path
+    storage: StorageBackend
+    executor: Optional[Executor] = None
+    cfg: Optional[AppConfig] = None
+
+    @classmethod
+    def open(
+        cls,
+        data_dir: Path | str,
+        backend: str | None = None,
+        executor: Optional[Executor] = None,
+        cfg: Optional[AppConfig] = None,
+    ) -> "PortfolioContext":
+        """Create ``data_dir`` if needed and open its storage.
+
+        ``backend`` is ``"csv"`` or ``"sqlite"`` and defaults to
+        ``STORAGE_BACKEND`` from ``cfg`` (or the environment).
+        """
+        path = Path(data_dir)
+        os.makedirs(path, exist_ok=True)
+        kind = backend or (cfg or load_config()).storage_backend
+        return cls(path, open_storage(kind, path), executor=executor, cfg=cfg)
+
+    @property
+    def portfolio_csv(self) -> Path:
+        return self.data_dir / PORTFOLIO_FILE
+
+    @property
+    def trade_log_csv(self) -> Path:
+        return self.data_dir / TRADE_LOG_FILE
+
 
+# Save files in the same folder as this script unless told otherwise
+_DEFAULT_CONTEXT = PortfolioContext(SCRIPT_DIR, CsvStorage(SCRIPT_DIR))
 
-def set_data_dir(data_dir: Path) -> None:
-    """Update global paths for portfolio and trade logs.
+
+def default_context() -> PortfolioContext:
+    """Return the context used by calls that do not pass one."""
+    return _DEFAULT_CONTEXT
+
+
+def _context(ctx: Optional[PortfolioContext]) -> PortfolioContext:
+    return _DEFAULT_CONTEXT if ctx is None else ctx
+
+
+def set_data_dir(data_dir: Path, backend: str | None = None) -> PortfolioContext:
+    """Point the default context at another directory.
 
     Parameters
     ----------
     data_dir:
         Directory where ``chatgpt_portfolio_update.csv`` and
         ``chatgpt_trade_log.csv`` are stored.
+    backend:
+        Storage backend for portfolio history, trades and the execution
+        audit: ``"csv"`` or ``"sqlite"``. Defaults to ``STORAGE_BACKEND``
+        from the configuration.
+
+    Returns
+    -------
+    PortfolioContext
+        The new default context. Its executor and configuration are
+        carried over from the previous one.
     """
 
-    global DATA_DIR, PORTFOLIO_CSV, TRADE_LOG_CSV
-    DATA_DIR = Path(data_dir)
-    os.makedirs(DATA_DIR, exist_ok=True)
-    PORTFOLIO_CSV = DATA_DIR / "chatgpt_portfolio_update.csv"
-    TRADE_LOG_CSV = DATA_DIR / "chatgpt_trade_log.csv"
+    global _DEFAULT_CONTEXT
+    opened = PortfolioContext.open(data_dir, backend, cfg=_DEFAULT_CONTEXT.cfg)
+    _DEFAULT_CONTEXT = replace(opened, executor=_DEFAULT_CONTEXT.executor)
+    return _DEFAULT_CONTEXT
 
 # Today's date reused across logs
 today = datetime.today().strftime("%Y-%m-%d")
 now = datetime.now()
-day = now.weekday()
+MARKET_CALENDAR = MarketCalendar()
+
+
+
+def _held_tickers(portfolio: pd.DataFrame) -> list[str]:
+    """Return the distinct tickers in ``portfolio`` in their original order."""
+    if portfolio.empty or "ticker" not in portfolio.columns:
+        return []
+    return list(dict.fromkeys(portfolio["ticker"].astype(str)))
+
 
+@traced("trading_script.fetch_daily_bars")
+def fetch_daily_bars(tickers: list[str]) -> pd.DataFrame:
+    """Download the latest daily bar for every ticker in one batched request.
+
+    Returns a frame indexed by ticker with ``Low`` and ``Close`` columns.
+    Tickers without any data are absent from the index.
+    """
+    bars = default_cache().get_bars_batch(tickers, "1d", period="1d")
+    frames = {ticker: frame for ticker, frame in bars.items() if not frame.empty}
+    if not frames:
+        return pd.DataFrame(columns=["Low", "Close"], dtype=float)
+    latest = pd.concat(frames, names=["Ticker"]).groupby(level="Ticker").last()
+    return latest[["Low", "Close"]].astype(float).dropna(how="any")
+
+
+def _mark_to_market(portfolio: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+    """Value every holding against ``bars`` in one vectorised pass.
+
+    Parameters
+    ----------
+    portfolio:
+        Holdings with ``ticker``, ``shares``, ``buy_price``, ``cost_basis`` and
+        ``stop_loss`` columns.
+    bars:
+        Latest daily bar per ticker as returned by :func:`fetch_daily_bars`.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per holding in the ``PORTFOLIO_CSV`` layout. Rows whose low
+        crossed the stop are priced at the stop and marked as stop-loss sells;
+        their value and PnL are left for the caller to fill in once the sell
+        has been executed.
+    """
+    if portfolio.empty:
+        return pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+    tickers = portfolio["ticker"].to_numpy()
+    shares = portfolio["shares"].astype(float).to_numpy().astype(int)
+    cost = portfolio["buy_price"].to_numpy(dtype=float)
+    stop = portfolio["stop_loss"].to_numpy(dtype=float)
+
+    aligned = bars.reindex(tickers)
+    low = np.round(aligned["Low"].to_numpy(dtype=float), 2)
+    close = np.round(aligned["Close"].to_numpy(dtype=float), 2)
+    has_data = ~(np.isnan(low) | np.isnan(close))
+    triggered = has_data & (low <= stop)
+    hold = has_data & ~triggered
+
+    price = np.where(triggered, stop, close)
+    value = np.round(price * shares, 2)
+    pnl = np.round((price - cost) * shares, 2)
+    action = np.where(triggered, "SELL - Stop Loss Triggered", np.where(hold, "HOLD", "NO DATA"))
+
+    def _blank_unless(values: np.ndarray, mask: np.ndarray) -> pd.Series:
+        return pd.Series(values, dtype=object).where(mask, "")
+
+    return pd.DataFrame(
+        {
+            "Date": today,
+            "Ticker": tickers,
+            "Shares": shares,
+            "Buy Price": portfolio["buy_price"].tolist(),
+            "Cost Basis": portfolio["cost_basis"].tolist(),
+            "Stop Loss": portfolio["stop_loss"].tolist(),
+            "Current Price": _blank_unless(price, has_data),
+            "Total Value": _blank_unless(value, hold),
+            "PnL": _blank_unless(pnl, hold),
+            "Action": action,
+            "Cash Balance": "",
+            "Total Equity": "",
+        },
+        columns=PORTFOLIO_COLUMNS,
+    )
 
 
+@traced("trading_script.process_portfolio")
 def process_portfolio(
     portfolio: pd.DataFrame | dict[str, list[object]] | list[dict[str, object]],
     cash: float,
     interactive: bool = True,
+    bars: Optional[pd.DataFrame] = None,
+    ctx: Optional[PortfolioContext] = None,
 ) -> tuple[pd.DataFrame, float]:
     """Update daily price information, log stop-loss sells, and prompt for trades.
 
@@ -74,12 +244,19 @@ def process_portfolio(
         When ``True`` (default) the function prompts for manual trades via
         ``input``. Set to ``False`` to skip all interactive prompts – useful
         when the function is driven by a user interface or automated tests.
+    bars:
+        Latest daily bars as returned by :func:`fetch_daily_bars`, e.g.
+        fetched once for several portfolios. Downloaded when omitted.
+    ctx:
+        Portfolio to update; the default context when omitted.
 
     Returns
     -------
     tuple[pd.DataFrame, float]
         Updated portfolio and cash balance.
     """
+    ctx = _context(ctx)
+    executor = ctx.executor
     print(portfolio)
     if isinstance(portfolio, pd.DataFrame):
         portfolio_df = portfolio.copy()
@@ -88,14 +265,11 @@ def process_portfolio(
     else:  # pragma: no cover - defensive type check
         raise TypeError("portfolio must be a DataFrame, dict, or list of dicts")
 
-    results: list[dict[str, object]] = []
-    total_value = 0.0
-    total_pnl = 0.0
-
-    if day == 6 or day == 5 and interactive:
+    if interactive and not MARKET_CALENDAR.is_trading_day(now.date()):
+        last_session = MARKET_CALENDAR.last_session_on_or_before(now.date()).date
         check = input(
-            """Today is currently a weekend, so markets were never open.
-This will cause the program to calculate data from the last day (usually Friday), and save it as today.
+            f"""Today is not a trading day (weekend or market holiday), so markets were never open.
+This will cause the program to calculate data from the last session ({last_session}), and save it as today.
 Are you sure you want to do this? To exit, enter 1. """
         )
         if check == "1":
@@ -125,6 +299,7 @@ Would you like to log a manual trade? Enter 'b' for buy, 's' for sell, or press
                         stop_loss,
                         cash,
                         portfolio_df,
+                        ctx=ctx,
                     )
                 continue
             if action == "s":
@@ -143,86 +318,58 @@ Would you like to log a manual trade? Enter 'b' for buy, 's' for sell, or press
                         ticker,
                         cash,
                         portfolio_df,
+                        ctx=ctx,
                     )
                 continue
             break
     print(portfolio_df)
-    for _, stock in portfolio_df.iterrows():
-        ticker = stock["ticker"]
-        shares = int(stock["shares"])
-        cost = stock["buy_price"]
-        cost_basis = stock["cost_basis"]
-        stop = stock["stop_loss"]
-        data = yf.Ticker(ticker).history(period="1d")
-
-        if data.empty:
-            print(f"No data for {ticker}")
-            row = {
-                "Date": today,
-                "Ticker": ticker,
-                "Shares": shares,
-                "Buy Price": cost,
-                "Cost Basis": cost_basis,
-                "Stop Loss": stop,
-                "Current Price": "",
-                "Total Value": "",
-                "PnL": "",
-                "Action": "NO DATA",
-                "Cash Balance": "",
-                "Total Equity": "",
-            }
-        else:
-            low_price = round(float(data["Low"].iloc[-1]), 2)
-            close_price = round(float(data["Close"].iloc[-1]), 2)
-
-            if low_price <= stop:
-                price = stop
-                action = "SELL - Stop Loss Triggered"
-                if EXECUTOR is not None:
-                    try:
-                        plan = TradePlanItem(symbol=ticker, side="sell", qty=shares, type="market")
-                        ctx = EquityContext(equity=total_value + cash, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
-                        resp = EXECUTOR.place_and_reconcile(plan, ctx)
-                        fill_price = float(resp.avg_fill_price) if resp.avg_fill_price is not None else price
-                        value = round(fill_price * shares, 2)
-                        pnl = round((fill_price - cost) * shares, 2)
-                        cash += value
-                        portfolio_df = log_sell(ticker, shares, fill_price, cost, pnl, portfolio_df)
-                    except Exception as e:
-                        print(f"Stop-loss execution failed for {ticker}: {e}")
-                        value = round(price * shares, 2)
-                        pnl = round((price - cost) * shares, 2)
-                        cash += value
-                        portfolio_df = log_sell(ticker, shares, price, cost, pnl, portfolio_df)
-                else:
-                    value = round(price * shares, 2)
-                    pnl = round((price - cost) * shares, 2)
-                    cash += value
-                    portfolio_df = log_sell(ticker, shares, price, cost, pnl, portfolio_df)
-            else:
-                price = close_price
-                value = round(price * shares, 2)
-                pnl = round((price - cost) * shares, 2)
-                action = "HOLD"
-                total_value += value
-                total_pnl += pnl
-
-            row = {
-                "Date": today,
-                "Ticker": ticker,
-                "Shares": shares,
-                "Buy Price": cost,
-                "Cost Basis": cost_basis,
-                "Stop Loss": stop,
-                "Current Price": price,
-                "Total Value": value,
-                "PnL": pnl,
-                "Action": action,
-                "Cash Balance": "",
-                "Total Equity": "",
-            }
-
-        results.append(row)
+    if bars is None:
+        bars = fetch_daily_bars(_held_tickers(portfolio_df))
+    marked = _mark_to_market(portfolio_df, bars)
+    hold = (marked["Action"] == "HOLD").to_numpy()
+    hold_value = np.where(hold, pd.to_numeric(marked["Total Value"], errors="coerce"), 0.0)
+    hold_pnl = np.where(hold, pd.to_numeric(marked["PnL"], errors="coerce"), 0.0)
+
+    for i in np.flatnonzero((marked["Action"] == "NO DATA").to_numpy()):
+        print(f"No data for {marked.at[i, 'Ticker']}")
+
+    stop_rows = np.flatnonzero((marked["Action"] == "SELL - Stop Loss Triggered").to_numpy())
+    ledger = None
+    if executor is not None and len(stop_rows):
+        executor.prefetch_quotes([str(t) for t in marked["Ticker"].to_numpy()[stop_rows]])
+        priced = pd.to_numeric(marked["Current Price"], errors="coerce")
+        ledger = PortfolioLedger.from_portfolio(
+            portfolio_df, cash, prices=dict(zip(marked["Ticker"].str.upper()[priced.notna()], priced[priced.notna()]))
+        )
+    # Broker fills are logged one by one so a crash cannot lose an executed sell.
+    with ctx.storage.batch() if executor is None else nullcontext():
+        for i in stop_rows:
+            ticker = marked.at[i, "Ticker"]
+            shares = int(marked.at[i, "Shares"])
+            cost = marked.at[i, "Buy Price"]
+            price = float(marked.at[i, "Current Price"])
+            fill_price = price
+            if executor is not None:
+                try:
+                    plan = TradePlanItem(symbol=ticker, side="sell", qty=shares, type="market", reduce_only=True)
+                    assert ledger is not None
+                    resp = executor.place_and_reconcile(plan, ledger.context(ticker))
+                    fill_price = float(resp.avg_fill_price) if resp.avg_fill_price is not None else price
+                except Exception as e:
+                    print(f"Stop-loss execution failed for {ticker}: {e}")
+                    fill_price = price
+                assert ledger is not None
+                ledger.apply_fill(ticker, "sell", shares, fill_price)
+            value = round(fill_price * shares, 2)
+            pnl = round((fill_price - cost) * shares, 2)
+            marked.at[i, "Total Value"] = value
+            marked.at[i, "PnL"] = pnl
+            cash += value
+            portfolio_df = log_sell(ticker, shares, fill_price, cost, pnl, portfolio_df, ctx=ctx)
+
+    total_value = float(np.cumsum(hold_value)[-1]) if len(hold_value) else 0.0
+    total_pnl = float(np.cumsum(hold_pnl)[-1]) if len(hold_pnl) else 0.0
+    results = marked.to_dict(orient="records")
 
     # Append TOTAL summary row
     total_row = {
@@ -241,18 +388,11 @@ Would you like to log a manual trade? Enter 'b' for buy, 's' for sell, or press
     }
     results.append(total_row)
 
-    df = pd.DataFrame(results)
-    if PORTFOLIO_CSV.exists():
-        existing = pd.read_csv(PORTFOLIO_CSV)
-        existing = existing[existing["Date"] != today]
-        print("Saving results to CSV...")
-        time.sleep(1)
-        df = pd.concat([existing, df], ignore_index=True)
-
-    df.to_csv(PORTFOLIO_CSV, index=False)
+    ctx.storage.save_portfolio_snapshot(today, pd.DataFrame(results))
     return portfolio_df, cash
 
 
+@traced("trading_script.log_sell")
 def log_sell(
     ticker: str,
     shares: float,
@@ -260,10 +400,15 @@ def log_sell(
     cost: float,
     pnl: float,
     portfolio: pd.DataFrame,
+    ctx: Optional[PortfolioContext] = None,
+    date: Optional[str] = None,
 ) -> pd.DataFrame:
-    """Record a stop-loss sale in ``TRADE_LOG_CSV`` and remove the ticker."""
+    """Record a stop-loss sale in the trade log and remove the ticker.
+
+    The trade is dated ``date``, or ``today`` when omitted.
+    """
     log = {
-        "Date": today,
+        "Date": date or today,
         "Ticker": ticker,
         "Shares Sold": shares,
         "Sell Price": price,
@@ -274,15 +419,11 @@ def log_sell(
 
     portfolio = portfolio[portfolio["ticker"] != ticker]
 
-    if TRADE_LOG_CSV.exists():
-        df = pd.read_csv(TRADE_LOG_CSV)
-        df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-    else:
-        df = pd.DataFrame([log])
-    df.to_csv(TRADE_LOG_CSV, index=False)
+    _context(ctx).storage.append_trade(log)
     return portfolio
 
 
+@traced("trading_script.log_manual_buy")
 def log_manual_buy(
     buy_price: float,
     shares: float,
@@ -291,6 +432,7 @@ def log_manual_buy(
     cash: float,
     chatgpt_portfolio: pd.DataFrame,
     interactive: bool = True,
+    ctx: Optional[PortfolioContext] = None,
 ) -> tuple[float, pd.DataFrame]:
     """Log a manual purchase and append to the portfolio.
 
@@ -299,7 +441,10 @@ def log_manual_buy(
     interactive:
         When ``False`` the confirmation prompt is skipped. Useful for driving
         the function from a graphical user interface.
+    ctx:
+        Portfolio to trade in; the default context when omitted.
     """
+    ctx = _context(ctx)
     if interactive:
         check = input(
             f"""You are currently trying to buy {shares} shares of {ticker} with a price of {buy_price} and a stoploss of {stoploss}.
@@ -309,11 +454,11 @@ def log_manual_buy(
             print("Returning...")
             return cash, chatgpt_portfolio
 
-    if EXECUTOR is not None:
+    if ctx.executor is not None:
         try:
             plan = TradePlanItem(symbol=ticker, side="buy", qty=shares, type="market")
-            ctx = EquityContext(equity=cash, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
-            resp = EXECUTOR.place_and_reconcile(plan, ctx)
+            equity = PortfolioLedger.from_portfolio(chatgpt_portfolio, cash).context(ticker)
+            resp = ctx.executor.place_and_reconcile(plan, equity)
             fill_price = float(resp.avg_fill_price) if resp.avg_fill_price is not None else buy_price
             effective_cost = fill_price * shares
             if effective_cost > cash:
@@ -329,12 +474,7 @@ def log_manual_buy(
                 "PnL": pnl,
                 "Reason": "MANUAL BUY - New position",
             }
-            if os.path.exists(TRADE_LOG_CSV):
-                df = pd.read_csv(TRADE_LOG_CSV)
-                df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-            else:
-                df = pd.DataFrame([log])
-            df.to_csv(TRADE_LOG_CSV, index=False)
+            ctx.storage.append_trade(log)
             mask = chatgpt_portfolio["ticker"] == ticker
             if not mask.any():
                 new_trade = {
@@ -357,8 +497,7 @@ def log_manual_buy(
             return cash, chatgpt_portfolio
         except Exception as e:
             print(f"Live buy failed for {ticker}: {e}. Falling back to dry-run validation.")
-    data = yf.download(ticker, period="1d")
-    data = cast(pd.DataFrame, data)
+    data = default_cache().get_bars(ticker, "1d", period="1d")
     if data.empty:
         print(f"Manual buy for {ticker} failed: no market data available.")
         return cash, chatgpt_portfolio
@@ -386,12 +525,7 @@ def log_manual_buy(
         "Reason": "MANUAL BUY - New position",
     }
 
-    if os.path.exists(TRADE_LOG_CSV):
-        df = pd.read_csv(TRADE_LOG_CSV)
-        df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-    else:
-        df = pd.DataFrame([log])
-    df.to_csv(TRADE_LOG_CSV, index=False)
+    ctx.storage.append_trade(log)
     # if the portfolio doesn't already contain ticker, create a new row.
     
     mask = chatgpt_portfolio["ticker"] == ticker
@@ -419,6 +553,7 @@ def log_manual_buy(
     return cash, chatgpt_portfolio
 
 
+@traced("trading_script.log_manual_sell")
 def log_manual_sell(
     sell_price: float,
     shares_sold: float,
@@ -427,6 +562,7 @@ def log_manual_sell(
     chatgpt_portfolio: pd.DataFrame,
     reason: str | None = None,
     interactive: bool = True,
+    ctx: Optional[PortfolioContext] = None,
 ) -> tuple[float, pd.DataFrame]:
     """Log a manual sale and update the portfolio.
 
@@ -437,7 +573,10 @@ def log_manual_sell(
         ``interactive`` is ``True``.
     interactive:
         When ``False`` no interactive confirmation is requested.
+    ctx:
+        Portfolio to trade in; the default context when omitted.
     """
+    ctx = _context(ctx)
     if interactive:
         reason = input(
             f"""You are currently trying to sell {shares_sold} shares of {ticker} at a price of {sell_price}.
@@ -461,11 +600,11 @@ If this is a mistake, enter 1. """
         )
         return cash, chatgpt_portfolio
 
-    if EXECUTOR is not None:
+    if ctx.executor is not None:
         try:
             plan = TradePlanItem(symbol=ticker, side="sell", qty=shares_sold, type="market")
-            ctx = EquityContext(equity=cash, symbol_exposure=0.0, day_realized_pnl_pct=0.0, open_positions=0, portfolio_heat_pct=0.0)
-            resp = EXECUTOR.place_and_reconcile(plan, ctx)
+            equity = PortfolioLedger.from_portfolio(chatgpt_portfolio, cash).context(ticker)
+            resp = ctx.executor.place_and_reconcile(plan, equity)
             fill_price = float(resp.avg_fill_price) if resp.avg_fill_price is not None else sell_price
             buy_price = float(ticker_row["buy_price"].item())
             cost_basis = buy_price * shares_sold
@@ -481,12 +620,7 @@ If this is a mistake, enter 1. """
                 "Shares Sold": shares_sold,
                 "Sell Price": fill_price,
             }
-            if os.path.exists(TRADE_LOG_CSV):
-                df = pd.read_csv(TRADE_LOG_CSV)
-                df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-            else:
-                df = pd.DataFrame([log])
-            df.to_csv(TRADE_LOG_CSV, index=False)
+            ctx.storage.append_trade(log)
 
             if total_shares == shares_sold:
                 chatgpt_portfolio = chatgpt_portfolio[chatgpt_portfolio["ticker"] != ticker]
@@ -504,8 +638,7 @@ If this is a mistake, enter 1. """
         except Exception as e:
             print(f"Live sell failed for {ticker}: {e}. Falling back to dry-run validation.")
 
-    data = yf.download(ticker, period="1d")
-    data = cast(pd.DataFrame, data)
+    data = default_cache().get_bars(ticker, "1d", period="1d")
     if data.empty:
         print(f"Manual sell for {ticker} failed: no market data available.")
         return cash, chatgpt_portfolio
@@ -530,12 +663,7 @@ If this is a mistake, enter 1. """
         "Shares Sold": shares_sold,
         "Sell Price": sell_price,
     }
-    if os.path.exists(TRADE_LOG_CSV):
-        df = pd.read_csv(TRADE_LOG_CSV)
-        df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-    else:
-        df = pd.DataFrame([log])
-    df.to_csv(TRADE_LOG_CSV, index=False)
+    ctx.storage.append_trade(log)
 
     if total_shares == shares_sold:
         chatgpt_portfolio = chatgpt_portfolio[chatgpt_portfolio["ticker"] != ticker]
@@ -552,17 +680,32 @@ If this is a mistake, enter 1. """
     return cash, chatgpt_portfolio
 
 
-def daily_results(chatgpt_portfolio: pd.DataFrame, cash: float) -> None:
-    """Print daily price updates and performance metrics."""
+@traced("trading_script.daily_results")
+def daily_results(chatgpt_portfolio: pd.DataFrame, cash: float, ctx: Optional[PortfolioContext] = None) -> PerformanceMetrics:
+    """Print daily price updates and performance metrics.
+
+    Returns the :class:`PerformanceMetrics` behind the printed figures.
+    """
+    ctx = _context(ctx)
     portfolio_dict = chatgpt_portfolio.to_dict(orient="records")
 
-    print(f"prices and updates for {today}")
-    time.sleep(1)
-    for stock in portfolio_dict + [{"ticker": "^RUT"}] + [{"ticker": "IWO"}] + [{"ticker": "XBI"}]:
-        ticker = stock["ticker"]
+    session = MARKET_CALENDAR.last_session_on_or_before(now.date())
+    if session.date == now.date():
+        print(f"prices and updates for {today}")
+    else:
+        print(f"prices and updates for {today} (market closed; last session {session.date})")
+    held = [str(stock["ticker"]) for stock in portfolio_dict]
+    tickers = held + list(REPORT_BENCHMARKS)
+    benchmarks = default_benchmarks()
+    try:
+        bars = default_cache().get_bars_batch(held, "1d", period="2d")
+        benchmarks.refresh([*REPORT_BENCHMARKS, SP500])
+        bars.update({sym: benchmarks.series(sym, refresh=False).tail(2) for sym in REPORT_BENCHMARKS})
+    except Exception as e:
+        raise Exception(f"Download for {', '.join(tickers)} failed. {e} Try checking internet connection.")
+    for ticker in tickers:
         try:
-            data = yf.download(ticker, period="2d", progress=False)
-            data = cast(pd.DataFrame, data)
+            data = bars[ticker.upper()]
             if data.empty or len(data) < 2:
                 print(f"Data for {ticker} was empty or incomplete.")
                 continue
@@ -576,49 +719,21 @@ def daily_results(chatgpt_portfolio: pd.DataFrame, cash: float) -> None:
         print(f"{ticker} closing price: {price:.2f}")
         print(f"{ticker} volume for today: ${volume:,}")
         print(f"percent change from the day before: {percent_change:.2f}%")
-    chatgpt_df = pd.read_csv(PORTFOLIO_CSV)
-
-    # Filter TOTAL rows and get latest equity
-    chatgpt_totals = chatgpt_df[chatgpt_df["Ticker"] == "TOTAL"].copy()
-    chatgpt_totals["Date"] = pd.to_datetime(chatgpt_totals["Date"])
+    # Only TOTAL rows the persisted metrics state has not seen yet
+    metrics_engine = MetricsEngine(ctx.data_dir / METRICS_STATE_FILE)
+    chatgpt_totals = metrics_engine.pending_totals(ctx.storage)
     final_date = chatgpt_totals["Date"].max()
-    final_value = chatgpt_totals[chatgpt_totals["Date"] == final_date]
-    final_equity = float(final_value["Total Equity"].values[0])
-    equity_series = chatgpt_totals["Total Equity"].astype(float).reset_index(drop=True)
-
-    # Daily returns
-    daily_pct = equity_series.pct_change().dropna()
-
-    total_return = (equity_series.iloc[-1] - equity_series.iloc[0]) / equity_series.iloc[0] 
-
-    # Number of total trading days
-    n_days = len(chatgpt_totals)
-    # Risk-free return over total trading period (assuming 4.5% risk-free rate)
-    rf_annual = 0.045
-    rf_period = (1 + rf_annual) ** (n_days / 252) - 1
-    # Standard deviation of daily returns
-    std_daily = daily_pct.std()
-    negative_pct = daily_pct[daily_pct < 0]
-    negative_std = negative_pct.std()
-    # Sharpe Ratio
-    sharpe_total = (total_return - rf_period) / (std_daily * np.sqrt(n_days))
-    # Sortino Ratio
-    sortino_total = (total_return - rf_period) / (negative_std * np.sqrt(n_days))
+
+    # S&P 500 from the shared benchmark store, normalised to $100 at its stored baseline
+    spx = benchmarks.series(SP500, end=final_date, refresh=False)
+    metrics = metrics_engine.sync(chatgpt_totals, benchmark=spx["Close"])
 
     # Output
-    print(f"Total Sharpe Ratio over {n_days} days: {sharpe_total:.4f}")
-    print(f"Total Sortino Ratio over {n_days} days: {sortino_total:.4f}")
-    print(f"Latest ChatGPT Equity: ${final_equity:.2f}")
-    # Get S&P 500 data
-    spx = yf.download("^SPX", start="2025-06-27", end=final_date + pd.Timedelta(days=1), progress=False)
-    spx = cast(pd.DataFrame, spx)
-    spx = spx.reset_index()
-
-    # Normalize to $100
-    initial_price = spx["Close"].iloc[0].item()
-    price_now = spx["Close"].iloc[-1].item()
-    scaling_factor = 100 / initial_price
-    spx_value = price_now * scaling_factor
+    print(f"Total Sharpe Ratio over {metrics.n_days} days: {metrics.sharpe:.4f}")
+    print(f"Total Sortino Ratio over {metrics.n_days} days: {metrics.sortino:.4f}")
+    print(f"Max drawdown: {metrics.max_drawdown:.2%}  CAGR: {metrics.cagr:.2%}" + ("" if metrics.beta is None else f"  Beta vs S&P 500: {metrics.beta:.2f}"))
+    print(f"Latest ChatGPT Equity: ${metrics.final_equity:.2f}")
+    spx_value = float(spx["Value"].iloc[-1])
     print(f"$100 Invested in the S&P 500: ${spx_value:.2f}")
     print("today's portfolio:")
     print(chatgpt_portfolio)
@@ -630,6 +745,152 @@ def daily_results(chatgpt_portfolio: pd.DataFrame, cash: float) -> None:
         "You can however use the Internet and check current prices for potenial buys."
         "*"
     )
+    return metrics
+
+
+def _market_date(ts: float) -> str:
+    """The New York calendar date of epoch seconds ``ts``."""
+    return datetime.fromtimestamp(ts, MARKET_TZ).strftime("%Y-%m-%d")
+
+
+def _holdings_snapshot(holdings: pd.DataFrame, cash: float, book: StopBook, date: str) -> pd.DataFrame:
+    """``date``'s rows for ``holdings`` marked at the monitor's last prices, plus TOTAL."""
+    if holdings.empty:
+        rows = pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+    else:
+        tickers = holdings["ticker"].astype(str).to_numpy()
+        shares = holdings["shares"].to_numpy(dtype=float)
+        buy = holdings["buy_price"].to_numpy(dtype=float)
+        last = np.array([book.last_price(t) for t in tickers], dtype=float)
+        price = np.round(np.where(np.isnan(last), buy, last), 2)
+        rows = pd.DataFrame(
+            {
+                "Date": date,
+                "Ticker": tickers,
+                "Shares": shares,
+                "Buy Price": buy,
+                "Cost Basis": holdings["cost_basis"].tolist(),
+                "Stop Loss": holdings["stop_loss"].tolist(),
+                "Current Price": price,
+                "Total Value": np.round(price * shares, 2),
+                "PnL": np.round((price - buy) * shares, 2),
+                "Action": "HOLD",
+                "Cash Balance": "",
+                "Total Equity": "",
+            },
+            columns=PORTFOLIO_COLUMNS,
+        )
+    total_value = float(pd.to_numeric(rows["Total Value"]).sum()) if len(rows) else 0.0
+    total = {c: "" for c in PORTFOLIO_COLUMNS}
+    total.update(
+        {
+            "Date": date,
+            "Ticker": "TOTAL",
+            "Total Value": round(total_value, 2),
+            "PnL": round(float(pd.to_numeric(rows["PnL"]).sum()) if len(rows) else 0.0, 2),
+            "Cash Balance": round(cash, 2),
+            "Total Equity": round(total_value + cash, 2),
+        }
+    )
+    total_row = pd.DataFrame([total], columns=PORTFOLIO_COLUMNS)
+    return total_row if rows.empty else pd.concat([rows, total_row], ignore_index=True)
+
+
+def stop_monitor(source: Optional[PriceSource] = None, ctx: Optional[PortfolioContext] = None) -> tuple[StopMonitor, PriceSource]:
+    """Build an intraday stop-loss monitor over the latest holdings.
+
+    :func:`process_portfolio` only compares each day's low with the stops
+    once, after the fact. The returned monitor sells a holding (through
+    the context's executor when set) as soon as ``source`` shows its stop
+    crossed. Without a ``source`` it polls bid quotes through the executor, or
+    minute bars in dry-run mode. Each sale is logged like
+    ``process_portfolio``'s stop-loss sells, dated by the fill's market
+    day. The latest stored snapshot is then saved again under that day
+    without the sold shares, so a later :func:`process_portfolio` run starts
+    from the post-sale holdings and cash.
+    """
+    ctx = _context(ctx)
+    executor = ctx.executor
+    snapshot = ctx.storage.latest_snapshot()
+    holdings = pd.DataFrame(snapshot.holdings)
+    book = StopBook.from_portfolio(holdings)
+    if executor is not None and executor.ledger is None:
+        executor.ledger = PortfolioLedger.from_portfolio(holdings, float(snapshot.cash or 0.0))
+    if source is None:
+        source = QuoteFeed(executor.prefetch_quotes, book.symbols) if executor is not None else BarFeed(book.symbols)
+
+    def record(fill: StopFill) -> None:
+        if fill.error is not None:
+            print(f"Stop-loss execution failed for {fill.symbol}: {fill.error}")
+        # Only shares actually sold are booked; a failed sell stays armed for the next tick.
+        if fill.shares <= 0:
+            return
+        day = _market_date(fill.ts)
+        # Reload: process_portfolio, a manual trade or another run may have saved since the monitor started.
+        latest = ctx.storage.latest_snapshot()
+        holdings = pd.DataFrame(latest.holdings, columns=["ticker", "shares", "buy_price", "cost_basis", "stop_loss"])
+        cash = float(latest.cash or 0.0) + round(fill.fill_price * fill.shares, 2)
+        held = holdings[holdings["ticker"] == fill.symbol]
+        left = float(held["shares"].sum()) - fill.shares
+        holdings = log_sell(fill.symbol, fill.shares, fill.fill_price, fill.cost, fill.pnl, holdings, ctx=ctx, date=day)
+        if left > 0:
+            holdings = pd.concat([holdings, held.assign(shares=left, cost_basis=round(left * fill.cost, 2))], ignore_index=True)
+        print(f"Stop-loss hit for {fill.symbol}: sold {fill.shares:g} at {fill.fill_price:.2f} (stop {fill.stop:.2f})")
+        ctx.storage.save_portfolio_snapshot(day, _holdings_snapshot(holdings, cash, book, day))
+
+    return StopMonitor(book, executor=executor, on_fill=record), source
+
+
+@traced("trading_script.monitor_stops")
+def monitor_stops(
+    source: Optional[PriceSource] = None,
+    stop: Optional[threading.Event] = None,
+    interval: float = 30.0,
+    ctx: Optional[PortfolioContext] = None,
+) -> list[StopFill]:
+    """Run :func:`stop_monitor` until ``source`` is exhausted or ``stop`` is set."""
+    monitor, source = stop_monitor(source, ctx=ctx)
+    return monitor.run(source, stop=stop, interval=interval)
+
+
+def open_context(data_dir: Path | None, cfg: AppConfig) -> PortfolioContext:
+    """Open the portfolio in ``data_dir`` for a run configured by ``cfg``.
+
+    Without a ``data_dir`` the default context's directory is used, and its
+    storage too when that is the backend ``cfg`` asks for. Unless
+    ``cfg.mode`` is ``"dry-run"`` the context gets its own Alpaca executor,
+    auditing into the portfolio's storage.
+    """
+    if data_dir is None and isinstance(_DEFAULT_CONTEXT.storage, CsvStorage) == (cfg.storage_backend == "csv"):
+        ctx = replace(_DEFAULT_CONTEXT, executor=None, cfg=cfg)
+    elif data_dir is None:
+        ctx = PortfolioContext.open(_DEFAULT_CONTEXT.data_dir, cfg.storage_backend, cfg=cfg)
+    else:
+        ctx = PortfolioContext.open(data_dir, cfg.storage_backend, cfg=cfg)
+    if cfg.mode != "dry-run":
+        risk_cfg = RiskConfig(
+            max_notional_per_trade=cfg.max_notional_per_trade,
+            max_symbol_exposure_pct=cfg.max_symbol_exposure_pct,
+            daily_loss_cap_pct=cfg.daily_loss_cap_pct,
+            min_price=cfg.min_price,
+            max_spread_pct=cfg.max_spread_pct,
+            allow_after_hours=cfg.allow_after_hours,
+            max_position_risk_pct=cfg.max_position_risk_pct,
+            max_portfolio_heat_pct=cfg.max_portfolio_heat_pct,
+            max_positions=cfg.max_positions,
+            daily_loss_tier_warn_pct=cfg.daily_loss_tier_warn_pct,
+            daily_loss_tier_block_pct=cfg.daily_loss_tier_block_pct,
+            require_bracket=cfg.require_bracket,
+            default_stop_loss_pct=cfg.default_stop_loss_pct,
+        )
+        risk = RiskManager(risk_cfg)
+        # alpaca-py takes most of a second to import; dry runs never need it.
+        from exchange.alpaca_client import AlpacaClient
+
+        client = AlpacaClient(base_url=cfg.alpaca_base_url)
+        quotes = QuoteCache(client, ttl_seconds=cfg.quote_ttl_seconds, stale_seconds=cfg.quote_stale_seconds)
+        ctx.executor = Executor(client, risk, audit_backend=ctx.storage, quote_cache=quotes)
+    return ctx
 
 
 def main(file: str, data_dir: Path | None = None) -> None:
@@ -638,51 +899,37 @@ def main(file: str, data_dir: Path | None = None) -> None:
     Parameters
     ----------
     file:
-        CSV file containing historical portfolio records.
+        CSV file containing historical portfolio records. With the SQLite
+        backend the ledger in ``data_dir`` is read instead; a new ledger is
+        seeded from the CSV files there.
     data_dir:
-        Directory where trade and portfolio CSVs will be stored.
+        Directory where trade and portfolio CSVs will be stored. With the
+        SQLite backend it defaults to the directory holding ``file``.
     """
-    chatgpt_portfolio, cash = load_latest_portfolio_state(file)
-    if data_dir is not None:
-        set_data_dir(data_dir)
-
-    global CFG, EXECUTOR
-    CFG = load_config()
-    EXECUTOR = None
-    assert CFG is not None
-    if CFG.mode != "dry-run":
-        risk_cfg = RiskConfig(
-            max_notional_per_trade=CFG.max_notional_per_trade,
-            max_symbol_exposure_pct=CFG.max_symbol_exposure_pct,
-            daily_loss_cap_pct=CFG.daily_loss_cap_pct,
-            min_price=CFG.min_price,
-            max_spread_pct=CFG.max_spread_pct,
-            allow_after_hours=CFG.allow_after_hours,
-            max_position_risk_pct=CFG.max_position_risk_pct,
-            max_portfolio_heat_pct=CFG.max_portfolio_heat_pct,
-            max_positions=CFG.max_positions,
-            daily_loss_tier_warn_pct=CFG.daily_loss_tier_warn_pct,
-            daily_loss_tier_block_pct=CFG.daily_loss_tier_block_pct,
-            require_bracket=CFG.require_bracket,
-            default_stop_loss_pct=CFG.default_stop_loss_pct,
-        )
-        risk = RiskManager(risk_cfg)
-        client = AlpacaClient(base_url=CFG.alpaca_base_url)
-        audit = DATA_DIR / "execution_log.csv"
-        EXECUTOR = Executor(client, risk, audit_log_path=audit)
-
-    chatgpt_portfolio, cash = process_portfolio(chatgpt_portfolio, cash)
-    daily_results(chatgpt_portfolio, cash)
-
+    cfg = load_config()
+    configure_tracing(cfg)
+    sqlite = cfg.storage_backend == "sqlite"
+    if sqlite and data_dir is None:
+        data_dir = Path(file).resolve().parent
+    ctx = open_context(data_dir, cfg)
+    chatgpt_portfolio, cash = load_latest_portfolio_state(None if sqlite else file, ctx=ctx)
+    chatgpt_portfolio, cash = process_portfolio(chatgpt_portfolio, cash, ctx=ctx)
+    daily_results(chatgpt_portfolio, cash, ctx=ctx)
+
+@traced("trading_script.load_latest_portfolio_state")
 def load_latest_portfolio_state(
-    file: str,
+    file: str | None = None,
+    ctx: Optional[PortfolioContext] = None,
 ) -> tuple[pd.DataFrame | list[dict[str, Any]], float]:
     """Load the most recent portfolio snapshot and cash balance.
 
     Parameters
     ----------
     file:
-        CSV file containing historical portfolio records.
+        CSV file containing historical portfolio records. When ``None`` the
+        snapshot comes from the context's storage backend instead.
+    ctx:
+        Portfolio to load; the default context when omitted.
 
     Returns
     -------
@@ -691,8 +938,13 @@ def load_latest_portfolio_state(
         list of row dictionaries) and the associated cash balance.
     """
 
-    df = pd.read_csv(file)
-    if df.empty:
+    if file is None:
+        snapshot = _context(ctx).storage.latest_snapshot()
+    else:
+        with span("csv.portfolio.read", path=str(file)):
+            history = pd.read_csv(file)
+        snapshot = snapshot_from_history(history)
+    if snapshot.cash is None:
         portfolio = pd.DataFrame([])
         print(
             "Portfolio CSV is empty. Returning set amount of cash for creating portfolio."
@@ -704,20 +956,5 @@ def load_latest_portfolio_state(
                 "Cash could not be converted to float datatype. Please enter a valid number."
             )
         return portfolio, cash
-    non_total = df[df["Ticker"] != "TOTAL"].copy()
-    non_total["Date"] = pd.to_datetime(non_total["Date"])
-
-    latest_date = non_total["Date"].max()
-
-    # Get all tickers from the latest date
-    latest_tickers = non_total[non_total["Date"] == latest_date].copy()
-    latest_tickers.drop(columns=["Date", "Cash Balance", "Total Equity", "Action", "Current Price", "PnL", "Total Value"], inplace=True)
-    latest_tickers.rename(columns={"Cost Basis": "cost_basis", "Buy Price": "buy_price", "Shares": "shares", "Ticker": "ticker", "Stop Loss": "stop_loss"}, inplace=True)
-    print(latest_tickers)
-    latest_tickers = latest_tickers.reset_index(drop=True).to_dict(orient='records')
-    df = df[df["Ticker"] == "TOTAL"]  # Only the total summary rows
-    df["Date"] = pd.to_datetime(df["Date"])
-    latest = df.sort_values("Date").iloc[-1]
-    cash = float(latest["Cash Balance"])
-    return latest_tickers, cash
-
+    print(pd.DataFrame(snapshot.holdings))
+    return snapshot.holdings, snapshot.cash